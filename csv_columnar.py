@@ -0,0 +1,348 @@
+"""
+CSV Columnar - Lưu các row đo của log dạng cột trên đĩa (thư mục .npy / .npz)
+để các lần phân tích sau không phải đọc lại file CSV
+
+Cấu trúc thư mục:
+- meta.json: tên parametric, limit, dtype và danh sách row group
+- rgNNNNN.npy: values của row group, dạng [cột, row] (đọc qua mmap)
+  hoặc rgNNNNN.npz (nén, mỗi cột một mảng "cK", chỉ giải nén cột cần đọc)
+- rgNNNNN_serials.npy / rgNNNNN_rows.npy: serial và row index trong file gốc
+Store gộp từ nhiều log (csv_merge): meta.json có danh sách sources, mỗi row
+group có "source" là vị trí của log trong sources.
+"""
+
+import json
+import os
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from csv_measurements import (
+    BLOCK_ROWS,
+    MeasurementBlock,
+    iter_measurement_blocks,
+    limits_config,
+)
+from csv_names import registry
+from csv_processor_v2 import (
+    Config,
+    DataTool,
+    LimitData,
+    ParametricData,
+    build_key_matcher,
+    load_bundle,
+)
+
+# Định dạng thư mục columnar
+STORE_VERSION = 1
+
+META_FILE = "meta.json"
+
+STORE_DTYPES = ("float32", "float64")
+
+# Kích thước row group (không phụ thuộc block khi đọc): tối đa ROW_GROUP_ROWS
+# row và ROW_GROUP_CELLS ô => file nhiều cột vẫn có ít row group, mỗi cột của
+# một row group là một đoạn liên tục đủ dài để đọc riêng từng cột
+ROW_GROUP_ROWS = 1 << 16
+ROW_GROUP_CELLS = 1 << 23
+
+
+def is_columnar(path: str) -> bool:
+    """True nếu path là thư mục columnar (có meta.json)"""
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+class ColumnarStore:
+    """Đọc thư mục columnar: limit, từng cột hoặc từng block các cột được chọn"""
+
+    def __init__(self, path: str):
+        if not is_columnar(path):
+            raise FileNotFoundError(f"Không tìm thấy columnar store: {path}")
+        self.path = path
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as file:
+            self.meta = json.load(file)
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"columnar store không hợp lệ: {path}")
+        self.names: List[str] = self.meta["names"]
+        self.row_groups: List[dict] = self.meta["row_groups"]
+        self.compressed: bool = self.meta["compressed"]
+        self.sources: List[str] = self.meta.get("sources") or [self.meta["source"]]
+
+    def __len__(self) -> int:
+        """Tổng số row đo"""
+        return self.meta["total_rows"]
+
+    def _file(self, group: dict, suffix: str) -> str:
+        return os.path.join(self.path, group["name"] + suffix)
+
+    def _values(self, group: dict):
+        """values[cột, row] của row group (mmap hoặc npz đọc từng cột)"""
+        if self.compressed:
+            return np.load(self._file(group, ".npz"))
+        return np.load(self._file(group, ".npy"), mmap_mode="r")
+
+    def _group_columns(self, group: dict, columns: Sequence[int]) -> np.ndarray:
+        """Mảng [row, cột được chọn] (float64) của row group"""
+        values = self._values(group)
+        if self.compressed:
+            with values:
+                selected = [values[f"c{column}"] for column in columns]
+            selected = np.array(selected, dtype=np.float64)
+            return selected.reshape(len(columns), group["rows"]).T
+        return np.asarray(values[list(columns)], dtype=np.float64).T
+
+    def data_tool(self, config: Optional[Config] = None) -> DataTool:
+        """
+        DataTool với limit đã lưu (lọc theo get_columns / include / exclude
+        của config như khi đọc file CSV); columns là vị trí cột trong store
+        """
+        config = config or Config()
+        key_matcher = build_key_matcher(config)
+        wanted = set(config.get_columns)
+        data_tool = DataTool(
+            parametric_index=self.meta["parametric_index"],
+            key_row_index=self.meta["key_row_index"],
+            limit_row_indices=dict(self.meta["limit_row_indices"]),
+        )
+        columns = array("q")
+        for column, name in enumerate(self.names):
+            if key_matcher is not None and not key_matcher(name):
+                continue
+            limits = self.meta["limits"][column]
+            limit = LimitData({col: limits[col] for col in limits if col in wanted})
+            data_tool.data.append(ParametricData(limit=limit, name=name))
+            columns.append(column)
+        data_tool.total_params = len(data_tool.data)
+        data_tool.key_ids = registry.ids(param.name for param in data_tool.data)
+        data_tool.columns = columns
+        # Limit được so ở độ chính xác của giá trị đã lưu (csv_stats.value_precision)
+        data_tool.value_dtype = self.meta["dtype"]
+        return data_tool
+
+    def column(self, column) -> np.ndarray:
+        """Toàn bộ giá trị của một cột (tên hoặc vị trí)"""
+        if isinstance(column, str):
+            column = self.names.index(column)
+        return self.read([column])[:, 0]
+
+    def read(self, columns: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Mảng [row, cột] (float64) của các cột được chọn (mặc định: tất cả)"""
+        if columns is None:
+            columns = range(len(self.names))
+        parts = [self._group_columns(group, columns) for group in self.row_groups]
+        if not parts:
+            return np.empty((0, len(columns)))
+        return np.concatenate(parts)
+
+    def row_sources(self) -> np.ndarray:
+        """Vị trí trong sources của log gốc của từng row"""
+        parts = [
+            np.full(group["rows"], group.get("source", 0), dtype=np.int32)
+            for group in self.row_groups
+        ]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int32)
+
+    def row_indices(self) -> np.ndarray:
+        """Row index trong log gốc của từng row"""
+        parts = [np.load(self._file(group, "_rows.npy")) for group in self.row_groups]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+    def serials(self) -> List[str]:
+        """Serial của tất cả các row"""
+        serials: List[str] = []
+        for group in self.row_groups:
+            serials.extend(np.load(self._file(group, "_serials.npy")).tolist())
+        return serials
+
+    def iter_blocks(
+        self, columns: Optional[Sequence[int]] = None, block_rows: int = BLOCK_ROWS
+    ) -> Iterator[MeasurementBlock]:
+        """Các block row đo (giống iter_measurement_blocks) của các cột được chọn"""
+        for index in range(len(self.row_groups)):
+            yield from self.iter_group_blocks(index, columns, block_rows)
+
+    def iter_group_blocks(
+        self,
+        index: int,
+        columns: Optional[Sequence[int]] = None,
+        block_rows: int = BLOCK_ROWS,
+    ) -> Iterator[MeasurementBlock]:
+        """
+        Các block row đo của row group thứ index
+        Row group không nén: mỗi block chỉ đọc đoạn row của nó (mmap)
+        """
+        if columns is None:
+            columns = range(len(self.names))
+        columns = list(columns)
+        group = self.row_groups[index]
+        if self.compressed:
+            values = self._group_columns(group, columns)
+        else:
+            values = self._values(group)
+        serials = np.load(self._file(group, "_serials.npy")).tolist()
+        rows = np.load(self._file(group, "_rows.npy"))
+        for start in range(0, group["rows"], block_rows):
+            stop = start + block_rows
+            if self.compressed:
+                block = values[start:stop]
+            else:
+                block = np.asarray(values[columns, start:stop], dtype=np.float64).T
+            yield MeasurementBlock(
+                row_indices=rows[start:stop],
+                serials=serials[start:stop],
+                values=block,
+            )
+
+
+def row_group_rows(columns: int) -> int:
+    """Số row của mỗi row group với số cột columns"""
+    return max(1, min(ROW_GROUP_ROWS, ROW_GROUP_CELLS // max(columns, 1)))
+
+
+def iter_row_groups(
+    blocks: Iterable[MeasurementBlock], group_rows: int
+) -> Iterator[MeasurementBlock]:
+    """Gộp / tách các block thành các row group đúng group_rows row (trừ cuối)"""
+    pending: List[MeasurementBlock] = []
+    count = 0
+    for block in blocks:
+        start = 0
+        while start < len(block.serials):
+            take = min(group_rows - count, len(block.serials) - start)
+            stop = start + take
+            pending.append(
+                MeasurementBlock(
+                    block.row_indices[start:stop],
+                    block.serials[start:stop],
+                    block.values[start:stop],
+                )
+            )
+            count += take
+            start = stop
+            if count == group_rows:
+                yield _concat_blocks(pending)
+                pending = []
+                count = 0
+    if pending:
+        yield _concat_blocks(pending)
+
+
+def _concat_blocks(blocks: List[MeasurementBlock]) -> MeasurementBlock:
+    if len(blocks) == 1:
+        return blocks[0]
+    serials: List[str] = []
+    for block in blocks:
+        serials.extend(block.serials)
+    return MeasurementBlock(
+        np.concatenate([block.row_indices for block in blocks]),
+        serials,
+        np.concatenate([block.values for block in blocks]),
+    )
+
+
+def prepare_store(output_dir: str):
+    """Tạo thư mục và xóa meta.json cũ (store chưa ghi xong không hợp lệ)"""
+    os.makedirs(output_dir, exist_ok=True)
+    meta_path = os.path.join(output_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+
+def write_row_group(
+    output_dir: str,
+    name: str,
+    block: MeasurementBlock,
+    dtype: str = "float64",
+    compress: bool = False,
+) -> Dict:
+    """Ghi một block thành row group, trả về mục row_groups của meta"""
+    values = np.ascontiguousarray(block.values.T, dtype=dtype)
+    base = os.path.join(output_dir, name)
+    if compress:
+        np.savez_compressed(
+            base + ".npz", **{f"c{k}": values[k] for k in range(len(values))}
+        )
+    else:
+        np.save(base + ".npy", values)
+    np.save(base + "_serials.npy", np.array(block.serials, dtype=str))
+    np.save(base + "_rows.npy", np.asarray(block.row_indices, dtype=np.int64))
+    return {"name": name, "rows": len(block.serials)}
+
+
+def write_meta(
+    output_dir: str,
+    data_tool: DataTool,
+    row_groups: List[Dict],
+    source: str = "",
+    dtype: str = "float64",
+    compress: bool = False,
+    sources: Optional[List[str]] = None,
+) -> ColumnarStore:
+    """Ghi meta.json (bước cuối cùng) và mở store"""
+    meta = {
+        "version": STORE_VERSION,
+        "source": source,
+        "dtype": dtype,
+        "compressed": compress,
+        "names": [param.name for param in data_tool.data],
+        "limits": [param.limit.data for param in data_tool.data],
+        "parametric_index": data_tool.parametric_index,
+        "key_row_index": data_tool.key_row_index,
+        "limit_row_indices": data_tool.limit_row_indices,
+        "total_rows": sum(group["rows"] for group in row_groups),
+        "row_groups": row_groups,
+    }
+    if sources is not None:
+        meta["sources"] = sources
+    meta_path = os.path.join(output_dir, META_FILE)
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, meta_path)
+    return ColumnarStore(output_dir)
+
+
+def write_columnar(
+    blocks: Iterable[MeasurementBlock],
+    data_tool: DataTool,
+    output_dir: str,
+    source: str = "",
+    dtype: str = "float64",
+    compress: bool = False,
+    group_rows: Optional[int] = None,
+) -> ColumnarStore:
+    """
+    Ghi các block row đo thành thư mục columnar, các block được gộp thành row
+    group group_rows row (mặc định: row_group_rows theo số cột)
+    meta.json được ghi sau cùng: thư mục chưa ghi xong không được coi là store
+    dtype "float32": limit được so ở độ chính xác float32 khi đọc lại
+    (csv_stats.value_precision)
+    """
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"dtype không hỗ trợ: {dtype}")
+    prepare_store(output_dir)
+    groups = iter_row_groups(blocks, group_rows or row_group_rows(len(data_tool.data)))
+    row_groups = [
+        write_row_group(output_dir, f"rg{index:05d}", group, dtype, compress)
+        for index, group in enumerate(groups)
+    ]
+    return write_meta(output_dir, data_tool, row_groups, source, dtype, compress)
+
+
+def convert_to_columnar(
+    file_path: str,
+    output_dir: str,
+    config: Optional[Config] = None,
+    dtype: str = "float64",
+    compress: bool = False,
+    block_rows: int = BLOCK_ROWS,
+    group_rows: Optional[int] = None,
+) -> ColumnarStore:
+    """Đọc file CSV một lần và ghi các row đo ra thư mục columnar"""
+    config = config or Config()
+    data_tool = load_bundle(file_path, limits_config(config))
+    blocks = iter_measurement_blocks(file_path, data_tool, config, block_rows)
+    return write_columnar(
+        blocks, data_tool, output_dir, file_path, dtype, compress, group_rows
+    )
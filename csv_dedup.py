@@ -0,0 +1,274 @@
+"""
+CSV Dedup - Lọc các unit test lại nhiều lần (trùng serial) khi đọc các row đo,
+trước khi tính thống kê / chuyển sang columnar, không đọc toàn bộ log vào bộ nhớ
+
+Policy (Config.retest_policy):
+- first: giữ lần test đầu tiên của mỗi serial (một lần đọc)
+- last: giữ lần test cuối cùng
+- best: giữ lần pass cuối cùng (tất cả parametric trong limit), nếu serial chưa
+  pass lần nào thì giữ lần test cuối cùng
+last / best đọc log 2 lần: lần 1 ghi hash serial (và pass / fail) của từng row
+ra file tạm, quét ngược file tạm để đánh dấu các row được giữ (bitmap), lần 2
+trả về các block chỉ gồm các row được giữ.
+"""
+
+import os
+import sqlite3
+import tempfile
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from csv_failures import block_failures
+from csv_measurements import BLOCK_ROWS, MeasurementBlock, iter_all_blocks
+from csv_processor_v2 import Config, DataTool
+from csv_stats import limit_arrays
+
+RETEST_POLICIES = ("all", "first", "last", "best")
+
+# Bộ nhớ tối đa cho tập serial đã gặp, vượt quá thì chuyển sang sqlite (file tạm)
+SERIAL_MEMORY_BYTES = 64 << 20
+
+# Mỗi serial là một int64 (8 byte), thêm bản sao tạm khi gộp các mảng đã sắp xếp
+MAX_MEMORY_SERIALS = SERIAL_MEMORY_BYTES // 16
+
+# Số row mỗi lần quét ngược file tạm / số tham số mỗi câu SELECT của sqlite
+SCAN_ROWS = 1 << 16
+SQL_CHUNK = 500
+
+
+def serial_keys(serials: Iterable[str]) -> List[int]:
+    """
+    Hash 64-bit của serial (dùng trong một lần đọc, không lưu lại)
+    Xác suất trùng hash ~ n^2 / 2^65 (10 triệu serial: ~3e-6)
+    """
+    return [hash(serial) for serial in serials]
+
+
+def _sorted_member(run: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """keys[i] có trong mảng đã sắp xếp run hay không"""
+    positions = np.searchsorted(run, keys)
+    positions[positions == len(run)] = 0
+    return run[positions] == keys
+
+
+class SerialSet:
+    """
+    Tập các hash serial đã gặp
+    Giữ trong các mảng int64 đã sắp xếp (8 byte mỗi serial): mỗi lần add thêm
+    một mảng mới, mảng cuối được gộp với mảng trước nếu không nhỏ hơn một nửa
+    (số mảng ~ log n, mỗi key được gộp lại ~ log n lần). Vượt quá max_memory
+    thì chuyển sang bảng sqlite tạm trên đĩa (sqlite tự xóa khi đóng kết nối).
+    """
+
+    def __init__(self, max_memory: int = MAX_MEMORY_SERIALS):
+        self.max_memory = max_memory
+        self.runs: List[np.ndarray] = []
+        self.connection: Optional[sqlite3.Connection] = None
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def spilled(self) -> bool:
+        return self.connection is not None
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _spill(self):
+        # Tên file rỗng: database tạm trên đĩa
+        self.connection = sqlite3.connect("")
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute(
+            "CREATE TABLE seen (key INTEGER PRIMARY KEY) WITHOUT ROWID"
+        )
+        for run in self.runs:
+            self._insert(run.tolist())
+        self.runs = []
+
+    def _insert(self, keys: Iterable[int]):
+        self.connection.executemany(
+            "INSERT INTO seen VALUES (?)", ((key,) for key in keys)
+        )
+
+    def _existing(self, keys: List[int]) -> set:
+        """Các key đã có trong bảng sqlite"""
+        found = set()
+        for start in range(0, len(keys), SQL_CHUNK):
+            chunk = keys[start : start + SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                f"SELECT key FROM seen WHERE key IN ({marks})", chunk
+            )
+            found.update(row[0] for row in rows)
+        return found
+
+    def _member(self, keys: np.ndarray) -> np.ndarray:
+        """Mask các key đã có trong các mảng đã sắp xếp"""
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            found |= _sorted_member(run, keys)
+        return found
+
+    def _push(self, run: np.ndarray):
+        """Thêm mảng key mới (đã sắp xếp, chưa có trong tập) và gộp các mảng"""
+        self.runs.append(run)
+        while len(self.runs) > 1 and 2 * len(self.runs[-1]) >= len(self.runs[-2]):
+            last = self.runs.pop()
+            merged = np.concatenate((self.runs.pop(), last))
+            merged.sort(kind="stable")
+            self.runs.append(merged)
+
+    def contains(self, keys: List[int]) -> List[bool]:
+        """True với các key đã có trong tập"""
+        if self.connection is None:
+            return self._member(np.array(keys, dtype=np.int64)).tolist()
+        found = self._existing(list(set(keys)))
+        return [key in found for key in keys]
+
+    def add(self, keys: List[int]) -> List[bool]:
+        """Thêm các key theo thứ tự, True với key chưa gặp (lần đầu trong keys)"""
+        if self.connection is None:
+            values = np.array(keys, dtype=np.int64)
+            unique, first = np.unique(values, return_index=True)
+            is_new = ~self._member(unique)
+            new = np.zeros(len(values), dtype=bool)
+            new[first[is_new]] = True
+            if is_new.any():
+                self._push(unique[is_new])
+                self.count += int(is_new.sum())
+            if self.count > self.max_memory:
+                self._spill()
+            return new.tolist()
+
+        found = self._existing(list(set(keys)))
+        new = []
+        for key in keys:
+            if key in found:
+                new.append(False)
+            else:
+                found.add(key)
+                new.append(True)
+        added = [key for key, is_new in zip(keys, new) if is_new]
+        self._insert(added)
+        self.count += len(added)
+        return new
+
+
+def filter_block(block: MeasurementBlock, keep: np.ndarray) -> MeasurementBlock:
+    """Block chỉ gồm các row có keep[r] = True"""
+    return MeasurementBlock(
+        row_indices=block.row_indices[keep],
+        serials=[serial for serial, kept in zip(block.serials, keep.tolist()) if kept],
+        values=block.values[keep],
+    )
+
+
+def _mark_last(
+    keys: np.ndarray,
+    keep: np.ndarray,
+    seen: SerialSet,
+    rows: Optional[np.ndarray] = None,
+    skip: Optional[SerialSet] = None,
+):
+    """
+    Quét ngược keys, đánh dấu keep cho row cuối cùng của mỗi serial
+    rows: chỉ xét các row có rows[i] = True; skip: bỏ qua serial có trong skip
+    """
+    for stop in range(len(keys), 0, -SCAN_ROWS):
+        positions = np.arange(stop - 1, max(0, stop - SCAN_ROWS) - 1, -1)
+        if rows is not None:
+            positions = positions[rows[positions]]
+        chunk = keys[positions].tolist()
+        if skip is not None:
+            outside = ~np.array(skip.contains(chunk), dtype=bool)
+            positions = positions[outside]
+            chunk = keys[positions].tolist()
+        new = np.array(seen.add(chunk), dtype=bool)
+        keep[positions[new]] = True
+
+
+def retest_keep_mask(
+    blocks: Iterable[MeasurementBlock],
+    policy: str,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    max_memory: int = MAX_MEMORY_SERIALS,
+) -> np.ndarray:
+    """
+    Lần đọc thứ nhất của policy last / best: mask keep theo thứ tự row đo
+    Hash serial / pass của từng row được ghi ra file tạm, không giữ trong bộ nhớ.
+    """
+    with tempfile.TemporaryDirectory(prefix="csv_dedup_") as temp_dir:
+        keys_path = os.path.join(temp_dir, "keys.bin")
+        passed_path = os.path.join(temp_dir, "passed.bin")
+        total = 0
+        with open(keys_path, "wb") as keys_file, open(passed_path, "wb") as passed_file:
+            for block in blocks:
+                np.array(serial_keys(block.serials), dtype=np.int64).tofile(keys_file)
+                if policy == "best":
+                    fails = block_failures(block.values, lower, upper)
+                    (~fails.any(axis=1)).tofile(passed_file)
+                total += len(block.serials)
+
+        keep = np.zeros(total, dtype=bool)
+        if not total:
+            return keep
+        keys = np.memmap(keys_path, dtype=np.int64, mode="r")
+        passing = SerialSet(max_memory)
+        attempts = SerialSet(max_memory)
+        try:
+            if policy == "best":
+                passed = np.fromfile(passed_path, dtype=bool)
+                _mark_last(keys, keep, passing, rows=passed)
+                _mark_last(keys, keep, attempts, rows=~passed, skip=passing)
+            else:
+                _mark_last(keys, keep, attempts)
+        finally:
+            passing.close()
+            attempts.close()
+            # Đóng memmap trước khi xóa thư mục tạm
+            del keys
+        return keep
+
+
+def dedup_blocks(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    block_rows: int = BLOCK_ROWS,
+    max_memory: int = MAX_MEMORY_SERIALS,
+) -> Iterator[MeasurementBlock]:
+    """Các block row đo của file, unit trùng serial được lọc theo retest_policy"""
+    policy = config.retest_policy
+    if policy not in RETEST_POLICIES:
+        raise ValueError(f"retest_policy không hợp lệ: {policy}")
+    if policy == "all":
+        yield from iter_all_blocks(file_path, data_tool, config, block_rows)
+        return
+
+    if policy == "first":
+        seen = SerialSet(max_memory)
+        try:
+            for block in iter_all_blocks(file_path, data_tool, config, block_rows):
+                keep = np.array(seen.add(serial_keys(block.serials)), dtype=bool)
+                if keep.any():
+                    yield filter_block(block, keep)
+        finally:
+            seen.close()
+        return
+
+    lower, upper = limit_arrays(data_tool)
+    blocks = iter_all_blocks(file_path, data_tool, config, block_rows)
+    keep = retest_keep_mask(blocks, policy, lower, upper, max_memory)
+    position = 0
+    for block in iter_all_blocks(file_path, data_tool, config, block_rows):
+        rows = len(block.serials)
+        kept = keep[position : position + rows]
+        position += rows
+        if kept.any():
+            yield filter_block(block, kept)
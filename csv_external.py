@@ -0,0 +1,280 @@
+"""
+CSV External - So sánh bundle lớn hơn RAM bằng các run đã sắp xếp trên đĩa
+"""
+
+import contextlib
+import csv
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+from operator import attrgetter, itemgetter
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from csv_index import MappedBundle, open_mapped
+from csv_reader import QUOTE, detect_compression, open_bundle_stream
+from csv_processor_v2 import (
+    Config,
+    DiffRecord,
+    LimitData,
+    ParametricData,
+    _merge_join,
+    build_key_matcher,
+    iter_joined_diff,
+)
+
+# Bộ nhớ mặc định cho mỗi lần so sánh (bytes)
+DEFAULT_MEMORY_BUDGET = 256 << 20
+
+# Ước lượng bộ nhớ của một key khi nằm trong buffer (tuple, tên, dict limit)
+ENTRY_SIZE = 360
+
+# Số key mỗi lần pickle khi ghi run ra file tạm
+RUN_BATCH = 1024
+
+
+def iter_row_fields(buffer, begin: int, end: int, delimiter: bytes = b","):
+    """
+    Trả về từng field (bytes) của row buffer[begin:end] mà không tách cả row
+    Row có dấu ngoặc kép: tách bằng csv.reader (cả row được đọc vào bộ nhớ)
+    """
+    if begin == end:
+        return
+    if buffer.find(QUOTE, begin, end) >= 0:
+        text = buffer[begin:end].decode("utf-8")
+        record = next(csv.reader([text], delimiter=delimiter.decode()), [])
+        for value in record:
+            yield value.encode("utf-8")
+        return
+
+    start = begin
+    while True:
+        stop = buffer.find(delimiter, start, end)
+        if stop < 0:
+            yield buffer[start:end]
+            return
+        yield buffer[start:stop]
+        start = stop + 1
+
+
+def locate_rows(
+    bundle: MappedBundle, config: Config
+) -> Tuple[int, int, List[Tuple[str, int]]]:
+    """
+    Tìm vị trí các row cần thiết; với stop_after_limits dừng ngay khi đã có key
+    row và đủ limit rows, nếu không thì lấy tất cả limit rows như load_bundle
+    Trả về: (check_column_start, key_row, [(loại limit, row), ...] theo thứ tự row)
+    key_row = -1 nếu không tìm thấy cột parametric hoặc key row
+    """
+    parametric_needle = config.parametric_name_column.lower().encode("utf-8")
+    key_needle = config.key_column.lower().encode("utf-8")
+    limit_needles = [(col, col.lower().encode("utf-8")) for col in config.get_columns]
+    wanted_limits = set(config.get_columns)
+    buffer = bundle.buffer
+
+    check_column_start = -1
+    key_row = -1
+    limit_rows: List[Tuple[str, int]] = []
+
+    for row_index in range(len(bundle)):
+        begin, end = bundle.rows_span(row_index, row_index + 1)
+        first: Optional[bytes] = None
+        fields = iter_row_fields(buffer, begin, end)
+
+        # Cột parametric có thể nằm ở bất kỳ row nào trước key row / limit rows
+        if parametric_needle in buffer[begin:end].lower():
+            for column_index, value in enumerate(fields):
+                if column_index == 0 and check_column_start >= 0:
+                    first = value
+                if parametric_needle in value.lower():
+                    if config.begin_from_parametric:
+                        check_column_start = column_index
+                    else:
+                        check_column_start = column_index + 1
+                    if column_index == 0:
+                        first = value
+        elif check_column_start >= 0:
+            # Row khác chỉ cần field đầu tiên
+            first = next(fields, b"")
+
+        if first is None:
+            continue
+
+        first = first.lower()
+        if key_needle in first:
+            key_row = row_index
+            limit_rows = []
+            continue
+        for col, needle in limit_needles:
+            if needle in first:
+                if key_row >= 0:
+                    limit_rows.append((col, row_index))
+                break
+
+        if (
+            config.stop_after_limits
+            and key_row >= 0
+            and {col for col, _ in limit_rows} >= wanted_limits
+        ):
+            break
+
+    return check_column_start, key_row, limit_rows
+
+
+@contextlib.contextmanager
+def mapped_bundle(file_path: str, tmp_dir: Optional[str] = None):
+    """
+    MappedBundle cho file, file nén được giải nén ra file tạm trên đĩa
+    (không giải nén vào bộ nhớ) và xóa khi kết thúc
+    """
+    if not os.path.exists(file_path):
+        raise FileNotFoundError(f"Không tìm thấy file: {file_path}")
+
+    if detect_compression(file_path) is None:
+        yield open_mapped(file_path)
+        return
+
+    with tempfile.NamedTemporaryFile(suffix=".csv", dir=tmp_dir, delete=False) as tmp:
+        with open_bundle_stream(file_path) as source:
+            shutil.copyfileobj(source, tmp)
+    bundle = MappedBundle(tmp.name, persist_index=False)
+    try:
+        yield bundle
+    finally:
+        bundle.close()
+        os.remove(tmp.name)
+
+
+def iter_bundle_params(
+    file_path: str, config: Config, tmp_dir: Optional[str] = None
+) -> Iterator[ParametricData]:
+    """
+    Đọc từng ParametricData theo thứ tự cột, không giữ cả key row trong bộ nhớ
+    Key row và các limit row được duyệt song song từng field trên mmap.
+    Kết quả giống load_bundle(file_path, config).
+    """
+    null_values = {value.encode("utf-8") for value in config.null_values}
+    key_matcher = build_key_matcher(config)
+
+    with mapped_bundle(file_path, tmp_dir) as bundle:
+        if bundle.size == 0:
+            raise ValueError("file CSV empty")
+
+        check_column_start, key_row, limit_rows = locate_rows(bundle, config)
+        if key_row < 0:
+            return
+
+        buffer = bundle.buffer
+        key_fields = iter_row_fields(buffer, *bundle.rows_span(key_row, key_row + 1))
+        limit_fields = [
+            (col, row, iter_row_fields(buffer, *bundle.rows_span(row, row + 1)))
+            for col, row in limit_rows
+        ]
+
+        for column_index, name in enumerate(key_fields):
+            values = [next(fields, None) for _, _, fields in limit_fields]
+            if column_index < check_column_start:
+                continue
+
+            text = name.decode("utf-8")
+            if key_matcher is not None and not key_matcher(text):
+                continue
+
+            data: Dict[str, float] = {}
+            for (col, row, _), value in zip(limit_fields, values):
+                if value is None or value in null_values:
+                    continue
+                try:
+                    data[col] = float(value)
+                except ValueError:
+                    raise ValueError(
+                        f"invalid {col} at row {row + 1}, "
+                        f"column {column_index + 1}: "
+                        f"{value.decode('utf-8', 'replace')}"
+                    )
+            yield ParametricData(name=text, limit=LimitData(data))
+
+
+def _spill(entries: List[tuple], tmp_dir: Optional[str]) -> IO[bytes]:
+    """Sắp xếp entries theo tên và ghi ra file tạm (tự xóa khi đóng)"""
+    entries.sort(key=itemgetter(0))
+    file = tempfile.TemporaryFile(dir=tmp_dir)
+    for start in range(0, len(entries), RUN_BATCH):
+        pickle.dump(entries[start : start + RUN_BATCH], file, pickle.HIGHEST_PROTOCOL)
+    file.seek(0)
+    return file
+
+
+def _read_run(file: IO[bytes]) -> Iterator[tuple]:
+    while True:
+        try:
+            batch = pickle.load(file)
+        except EOFError:
+            return
+        yield from batch
+
+
+def sorted_params(
+    params: Iterable[ParametricData],
+    memory_budget: int,
+    tmp_dir: Optional[str] = None,
+) -> Iterator[ParametricData]:
+    """
+    Sắp xếp ParametricData theo tên với bộ nhớ giới hạn
+    Khi buffer vượt memory_budget, phần đã đọc được sắp xếp và ghi ra file tạm
+    (một run); cuối cùng các run được trộn lại bằng heapq.merge.
+    Tên trùng nhau giữ nguyên thứ tự ban đầu.
+    """
+    entries: List[tuple] = []
+    used = 0
+    runs: List[IO[bytes]] = []
+    try:
+        for param in params:
+            entries.append((param.name, param.limit.data))
+            used += ENTRY_SIZE + len(param.name)
+            if used >= memory_budget:
+                runs.append(_spill(entries, tmp_dir))
+                entries = []
+                used = 0
+
+        if runs:
+            if entries:
+                runs.append(_spill(entries, tmp_dir))
+                entries = []
+            merged = heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+        else:
+            entries.sort(key=itemgetter(0))
+            merged = iter(entries)
+
+        for name, data in merged:
+            yield ParametricData(name=name, limit=LimitData(data))
+    finally:
+        for run in runs:
+            run.close()
+
+
+def external_iter_diff(
+    file1: str,
+    file2: str,
+    config: Config,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    include_unchanged: bool = False,
+    tmp_dir: Optional[str] = None,
+) -> Iterator[DiffRecord]:
+    """
+    So sánh 2 files với bộ nhớ giới hạn, trả về DiffRecord theo thứ tự tên
+    Mỗi bên được sắp xếp với memory_budget / 2 (tràn ra file tạm nếu cần),
+    sau đó 2 dãy đã sắp xếp được ghép bằng merge-join.
+    """
+    side_budget = max(memory_budget // 2, ENTRY_SIZE)
+    old_sorted = sorted_params(
+        iter_bundle_params(file1, config, tmp_dir), side_budget, tmp_dir
+    )
+    new_sorted = sorted_params(
+        iter_bundle_params(file2, config, tmp_dir), side_budget, tmp_dir
+    )
+    yield from iter_joined_diff(
+        _merge_join(old_sorted, new_sorted, key=attrgetter("name")),
+        include_unchanged,
+    )
@@ -0,0 +1,169 @@
+"""
+CSV Failures - Kiểm tra giá trị đo với limit của bundle, tìm các unit bị fail
+"""
+
+import csv
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from csv_measurements import (
+    BLOCK_ROWS,
+    MeasurementBlock,
+    iter_measurement_blocks,
+    limits_config,
+)
+from csv_processor_v2 import Config, DataTool, load_bundle
+from csv_stats import limit_arrays
+
+# Số unit fail tối đa được giữ lại trong report (số lượng fail vẫn đếm đủ)
+MAX_FAILING_UNITS = 100_000
+
+
+@dataclass
+class FailingUnit:
+    """Một row đo có ít nhất một parametric nằm ngoài limit"""
+
+    row_index: int
+    serial: str
+    failed: List[str] = field(default_factory=list)
+
+
+@dataclass
+class FailureReport:
+    """Kết quả kiểm tra limit của một file"""
+
+    file_path: str
+    names: List[str]
+    lower: np.ndarray
+    upper: np.ndarray
+    # Số giá trị được kiểm tra / số giá trị fail của từng parametric
+    tested: np.ndarray
+    fail_counts: np.ndarray
+    units: List[FailingUnit] = field(default_factory=list)
+    total_units: int = 0
+    failing_units: int = 0
+    # True nếu units bị cắt bớt vì vượt quá max_units
+    truncated: bool = False
+
+    def failed_params(self) -> List[int]:
+        """Index các parametric có fail, nhiều fail nhất trước"""
+        failed = np.flatnonzero(self.fail_counts)
+        order = np.argsort(-self.fail_counts[failed], kind="stable")
+        return failed[order].tolist()
+
+
+def block_failures(
+    values: np.ndarray, lower: np.ndarray, upper: np.ndarray
+) -> np.ndarray:
+    """
+    Mask fail[r, k]: values[r, k] < lower[k] hoặc > upper[k]
+    Giá trị trống (NaN) và limit không có (NaN) không bao giờ fail
+    """
+    return (values < lower) | (values > upper)
+
+
+def iter_failing_units(
+    blocks: Iterable[MeasurementBlock], report: FailureReport
+) -> Iterator[FailingUnit]:
+    """
+    Kiểm tra từng block, cộng dồn số lượng vào report và trả về các unit fail
+    theo thứ tự row (không giữ lại trong report)
+    """
+    names = report.names
+    for block in blocks:
+        fails = block_failures(block.values, report.lower, report.upper)
+        report.tested += (~np.isnan(block.values)).sum(axis=0)
+        report.fail_counts += fails.sum(axis=0)
+        report.total_units += len(block.serials)
+
+        failing_rows = np.flatnonzero(fails.any(axis=1))
+        report.failing_units += len(failing_rows)
+        for r in failing_rows.tolist():
+            yield FailingUnit(
+                row_index=int(block.row_indices[r]),
+                serial=block.serials[r],
+                failed=[names[k] for k in np.flatnonzero(fails[r]).tolist()],
+            )
+
+
+def new_report(file_path: str, data_tool: DataTool) -> FailureReport:
+    """Report rỗng với limit của data_tool"""
+    lower, upper = limit_arrays(data_tool)
+    columns = len(data_tool.data)
+    return FailureReport(
+        file_path=file_path,
+        names=[param.name for param in data_tool.data],
+        lower=lower,
+        upper=upper,
+        tested=np.zeros(columns, dtype=np.int64),
+        fail_counts=np.zeros(columns, dtype=np.int64),
+    )
+
+
+def check_limits(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    block_rows: int = BLOCK_ROWS,
+    max_units: Optional[int] = MAX_FAILING_UNITS,
+) -> FailureReport:
+    """Kiểm tra các row đo của file với limit trong data_tool"""
+    report = new_report(file_path, data_tool)
+    blocks = iter_measurement_blocks(file_path, data_tool, config, block_rows)
+    for unit in iter_failing_units(blocks, report):
+        if max_units is not None and len(report.units) >= max_units:
+            report.truncated = True
+            continue
+        report.units.append(unit)
+    return report
+
+
+def check_file_limits(
+    file_path: str,
+    config: Optional[Config] = None,
+    block_rows: int = BLOCK_ROWS,
+    max_units: Optional[int] = MAX_FAILING_UNITS,
+) -> FailureReport:
+    """Đọc limit (load_bundle) và kiểm tra các row đo của file"""
+    config = config or Config()
+    data_tool = load_bundle(file_path, limits_config(config))
+    return check_limits(file_path, data_tool, config, block_rows, max_units)
+
+
+def write_failures_csv(report: FailureReport, path: str):
+    """
+    Ghi report ra file CSV: bảng số fail của từng parametric có fail,
+    sau đó là danh sách unit fail (row, serial, các parametric fail)
+    """
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["File", report.file_path])
+        writer.writerow(["Total Units", report.total_units])
+        writer.writerow(["Failing Units", report.failing_units])
+        writer.writerow([])
+
+        writer.writerow(["Parameter", "Lower", "Upper", "Tested", "Failed"])
+        for k in report.failed_params():
+            writer.writerow(
+                [
+                    report.names[k],
+                    "" if np.isnan(report.lower[k]) else report.lower[k],
+                    "" if np.isnan(report.upper[k]) else report.upper[k],
+                    int(report.tested[k]),
+                    int(report.fail_counts[k]),
+                ]
+            )
+        writer.writerow([])
+
+        writer.writerow(["Row", "Serial", "Failed Count", "Failed Parameters"])
+        for unit in report.units:
+            writer.writerow(
+                [
+                    unit.row_index + 1,
+                    unit.serial,
+                    len(unit.failed),
+                    ";".join(unit.failed),
+                ]
+            )
@@ -2,12 +2,21 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from typing import Optional
 import threading
+import math
 import os
 from datetime import datetime
 from csv_processor_v2 import CSVProcessorV2, ComparisonResult, Config
+from csv_failures import FailureReport, check_file_limits
+from csv_impact import ImpactReport, changed_keys, file_limit_impact
+from csv_quantiles import bundle_quantiles
+from csv_sample import bundle_sample_stats, exact_stats
 from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
+# Số bin và chiều cao (pixel) của histogram trong tab thống kê row đo
+HISTOGRAM_BINS = 20
+HISTOGRAM_HEIGHT = 180
+
 
 class MaterialColors:
     """Material Design color palette"""
@@ -128,6 +137,17 @@ class CSVComparatorGUI:
         self.file1_path = tk.StringVar()
         self.file2_path = tk.StringVar()
         self.comparison_result: Optional[ComparisonResult] = None
+        # Files và config của lần so sánh gần nhất (dùng khi export)
+        self.comparison_files = ("", "")
+        self.comparison_config: Optional[Config] = None
+        # Ảnh hưởng của limit mới lên các row đo của file 1 (nếu được chọn)
+        self.impact_report: Optional[ImpactReport] = None
+        # Limit gợi ý (từ các row đo của file 2) cho các key mới: tên -> quantiles
+        self.suggested_limits = {}
+        # Lần chạy thống kê row đo gần nhất (bỏ qua kết quả của lần chạy cũ hơn)
+        self.stats_run = 0
+        # Mẫu row đo của lần Quick Stats gần nhất (histogram), None nếu Exact
+        self.measurement_sample = None
 
         # Config variables
         self.parametric_column = tk.StringVar(value="parametric")
@@ -135,6 +155,12 @@ class CSVComparatorGUI:
         self.null_values = tk.StringVar(value="N/A,NULL,-")
         self.key_column = tk.StringVar(value="key")
         self.begin_from_parametric = tk.BooleanVar(value=False)
+        self.include_keys = tk.StringVar(value="")
+        self.exclude_keys = tk.StringVar(value="")
+        self.detect_renames = tk.BooleanVar(value=False)
+        self.check_limits = tk.BooleanVar(value=False)
+        self.analyze_impact = tk.BooleanVar(value=False)
+        self.suggest_limits = tk.BooleanVar(value=False)
 
         self.setup_styles()
         self.create_widgets()
@@ -554,6 +580,35 @@ class CSVComparatorGUI:
             width=30,
         ).pack(side="left", padx=5)
 
+        # Include / Exclude keys (tên hoặc pattern, vd: RF_*)
+        for label_text, variable in (
+            ("Include Keys (e.g. RF_*):", self.include_keys),
+            ("Exclude Keys (e.g. *_DEBUG):", self.exclude_keys),
+        ):
+            filter_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
+            filter_frame.pack(fill="x", pady=5)
+
+            tk.Label(
+                filter_frame,
+                text=label_text,
+                bg=MaterialColors.SURFACE,
+                fg=MaterialColors.TEXT_PRIMARY,
+                font=("Liberation Sans", 9),
+                width=25,
+                anchor="w",
+            ).pack(side="left")
+
+            tk.Entry(
+                filter_frame,
+                textvariable=variable,
+                font=("Liberation Sans", 9),
+                bg=MaterialColors.SURFACE,
+                fg=MaterialColors.TEXT_PRIMARY,
+                relief="solid",
+                borderwidth=1,
+                width=30,
+            ).pack(side="left", padx=5)
+
         # Begin from Parametric checkbox
         begin_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
         begin_frame.pack(fill="x", pady=5)
@@ -570,6 +625,70 @@ class CSVComparatorGUI:
             activeforeground=MaterialColors.PRIMARY,
         ).pack(side="left")
 
+        # Detect renamed keys checkbox
+        rename_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
+        rename_frame.pack(fill="x", pady=5)
+
+        tk.Checkbutton(
+            rename_frame,
+            text="Detect Renamed Keys",
+            variable=self.detect_renames,
+            bg=MaterialColors.SURFACE,
+            fg=MaterialColors.TEXT_PRIMARY,
+            font=("Liberation Sans", 9),
+            selectcolor=MaterialColors.SURFACE,
+            activebackground=MaterialColors.SURFACE,
+            activeforeground=MaterialColors.PRIMARY,
+        ).pack(side="left")
+
+        # Check measurement limits checkbox
+        limits_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
+        limits_frame.pack(fill="x", pady=5)
+
+        tk.Checkbutton(
+            limits_frame,
+            text="Export Measurement Limit Failures",
+            variable=self.check_limits,
+            bg=MaterialColors.SURFACE,
+            fg=MaterialColors.TEXT_PRIMARY,
+            font=("Liberation Sans", 9),
+            selectcolor=MaterialColors.SURFACE,
+            activebackground=MaterialColors.SURFACE,
+            activeforeground=MaterialColors.PRIMARY,
+        ).pack(side="left")
+
+        # Limit impact checkbox
+        impact_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
+        impact_frame.pack(fill="x", pady=5)
+
+        tk.Checkbutton(
+            impact_frame,
+            text="Analyze Limit Impact (File 1 measurements)",
+            variable=self.analyze_impact,
+            bg=MaterialColors.SURFACE,
+            fg=MaterialColors.TEXT_PRIMARY,
+            font=("Liberation Sans", 9),
+            selectcolor=MaterialColors.SURFACE,
+            activebackground=MaterialColors.SURFACE,
+            activeforeground=MaterialColors.PRIMARY,
+        ).pack(side="left")
+
+        # Suggested limits checkbox
+        suggest_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
+        suggest_frame.pack(fill="x", pady=5)
+
+        tk.Checkbutton(
+            suggest_frame,
+            text="Suggest Limits for New Keys (File 2 measurements)",
+            variable=self.suggest_limits,
+            bg=MaterialColors.SURFACE,
+            fg=MaterialColors.TEXT_PRIMARY,
+            font=("Liberation Sans", 9),
+            selectcolor=MaterialColors.SURFACE,
+            activebackground=MaterialColors.SURFACE,
+            activeforeground=MaterialColors.PRIMARY,
+        ).pack(side="left")
+
         # Reset button
         reset_btn_frame = tk.Frame(self.config_content, bg=MaterialColors.SURFACE)
         reset_btn_frame.pack(fill="x", pady=5)
@@ -597,6 +716,12 @@ class CSVComparatorGUI:
         self.null_values.set("N/A,NULL,-")
         self.key_column.set("key")
         self.begin_from_parametric.set(False)
+        self.detect_renames.set(False)
+        self.check_limits.set(False)
+        self.analyze_impact.set(False)
+        self.suggest_limits.set(False)
+        self.include_keys.set("")
+        self.exclude_keys.set("")
         messagebox.showinfo("Reset", "Configuration reset to default values")
 
     def create_results_section(self, parent):
@@ -613,6 +738,11 @@ class CSVComparatorGUI:
         self.create_new_params_tab()
         self.create_removed_params_tab()
         self.create_changed_params_tab()
+        self.create_measurement_stats_tab()
+
+        # Các tab chi tiết chỉ được điền khi người dùng mở tab đó
+        self.filled_tabs = set()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
     def create_summary_tab(self):
         """Tạo tab tổng quan với thống kê dạng bảng"""
@@ -732,7 +862,14 @@ class CSVComparatorGUI:
 
         self.new_params_table = ttk.Treeview(
             tree_frame,
-            columns=("name", "upper_limit", "lower_limit", "status"),
+            columns=(
+                "name",
+                "upper_limit",
+                "lower_limit",
+                "suggested_upper",
+                "suggested_lower",
+                "status",
+            ),
             show="headings",
             style="Material.Treeview",
         )
@@ -741,11 +878,15 @@ class CSVComparatorGUI:
         self.new_params_table.heading("name", text="Parameter Name")
         self.new_params_table.heading("upper_limit", text="Upper Limit")
         self.new_params_table.heading("lower_limit", text="Lower Limit")
+        self.new_params_table.heading("suggested_upper", text="Suggested Upper")
+        self.new_params_table.heading("suggested_lower", text="Suggested Lower")
         self.new_params_table.heading("status", text="Status")
 
         self.new_params_table.column("name", width=250, anchor="w")
         self.new_params_table.column("upper_limit", width=120, anchor="center")
         self.new_params_table.column("lower_limit", width=120, anchor="center")
+        self.new_params_table.column("suggested_upper", width=130, anchor="center")
+        self.new_params_table.column("suggested_lower", width=130, anchor="center")
         self.new_params_table.column("status", width=100, anchor="center")
 
         # Scrollbars
@@ -861,6 +1002,7 @@ class CSVComparatorGUI:
                 "new_upper",
                 "new_lower",
                 "change_type",
+                "impact",
             ),
             show="headings",
             style="Material.Treeview",
@@ -873,6 +1015,7 @@ class CSVComparatorGUI:
         self.changed_params_table.heading("new_upper", text="New Upper")
         self.changed_params_table.heading("new_lower", text="New Lower")
         self.changed_params_table.heading("change_type", text="Change Type")
+        self.changed_params_table.heading("impact", text="Impact")
 
         self.changed_params_table.column("name", width=200, anchor="w")
         self.changed_params_table.column("old_upper", width=100, anchor="center")
@@ -880,6 +1023,7 @@ class CSVComparatorGUI:
         self.changed_params_table.column("new_upper", width=100, anchor="center")
         self.changed_params_table.column("new_lower", width=100, anchor="center")
         self.changed_params_table.column("change_type", width=120, anchor="center")
+        self.changed_params_table.column("impact", width=220, anchor="center")
 
         # Scrollbars
         v_scrollbar3 = ttk.Scrollbar(
@@ -902,11 +1046,124 @@ class CSVComparatorGUI:
         self.changed_params_table.pack(side="left", fill="both", expand=True)
         v_scrollbar3.pack(side="right", fill="y")
 
+    def create_measurement_stats_tab(self):
+        """Tạo tab thống kê các row đo của file 1 (nhanh trên mẫu hoặc chính xác)"""
+        frame = tk.Frame(self.notebook, bg=MaterialColors.SURFACE)
+        self.notebook.add(frame, text="📐 Measurement Stats")
+
+        # Header
+        header_frame = tk.Frame(frame, bg=MaterialColors.SURFACE)
+        header_frame.pack(fill="x", padx=10, pady=(10, 5))
+
+        self.quick_stats_button = MaterialButton(
+            header_frame,
+            text="⚡ Quick Stats (Sample)",
+            command=lambda: self.start_measurement_stats(exact=False),
+            style="primary",
+        )
+        self.quick_stats_button.pack(side="left")
+
+        self.exact_stats_button = MaterialButton(
+            header_frame,
+            text="🎯 Exact Stats",
+            command=lambda: self.start_measurement_stats(exact=True),
+            style="outline",
+        )
+        self.exact_stats_button.pack(side="left", padx=(8, 0))
+
+        self.measurement_stats_label = tk.Label(
+            header_frame,
+            text="Statistics of the measurement rows of File 1",
+            bg=MaterialColors.SURFACE,
+            fg=MaterialColors.TEXT_SECONDARY,
+            font=("Segoe UI", 9),
+            anchor="w",
+        )
+        self.measurement_stats_label.pack(side="left", fill="x", padx=12)
+
+        # Create table
+        table_frame = tk.Frame(frame, bg=MaterialColors.SURFACE)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        tree_frame = tk.Frame(table_frame, bg=MaterialColors.SURFACE)
+        tree_frame.pack(fill="both", expand=True)
+
+        self.measurement_stats_table = ttk.Treeview(
+            tree_frame,
+            columns=(
+                "name",
+                "count",
+                "mean",
+                "std",
+                "min",
+                "max",
+                "lower",
+                "upper",
+                "cpk",
+                "fail_rate",
+            ),
+            show="headings",
+            style="Material.Treeview",
+        )
+
+        # Configure columns
+        self.measurement_stats_table.heading("name", text="Parameter Name")
+        self.measurement_stats_table.heading("count", text="Count")
+        self.measurement_stats_table.heading("mean", text="Mean")
+        self.measurement_stats_table.heading("std", text="Std")
+        self.measurement_stats_table.heading("min", text="Min")
+        self.measurement_stats_table.heading("max", text="Max")
+        self.measurement_stats_table.heading("lower", text="Lower Limit")
+        self.measurement_stats_table.heading("upper", text="Upper Limit")
+        self.measurement_stats_table.heading("cpk", text="Cpk")
+        self.measurement_stats_table.heading("fail_rate", text="Fail (%)")
+
+        self.measurement_stats_table.column("name", width=200, anchor="w")
+        self.measurement_stats_table.column("count", width=80, anchor="center")
+        self.measurement_stats_table.column("mean", width=140, anchor="center")
+        self.measurement_stats_table.column("std", width=140, anchor="center")
+        self.measurement_stats_table.column("min", width=90, anchor="center")
+        self.measurement_stats_table.column("max", width=90, anchor="center")
+        self.measurement_stats_table.column("lower", width=90, anchor="center")
+        self.measurement_stats_table.column("upper", width=90, anchor="center")
+        self.measurement_stats_table.column("cpk", width=70, anchor="center")
+        self.measurement_stats_table.column("fail_rate", width=120, anchor="center")
+
+        # Scrollbars
+        v_scrollbar4 = ttk.Scrollbar(
+            tree_frame,
+            orient="vertical",
+            command=self.measurement_stats_table.yview,
+            style="Material.Vertical.TScrollbar",
+        )
+        self.measurement_stats_table.configure(yscrollcommand=v_scrollbar4.set)
+
+        self.measurement_stats_table.pack(side="left", fill="both", expand=True)
+        v_scrollbar4.pack(side="right", fill="y")
+        self.measurement_stats_table.bind(
+            "<<TreeviewSelect>>", lambda event: self.draw_histogram()
+        )
+
+        # Histogram của parametric được chọn (chỉ với Quick Stats)
+        self.histogram_canvas = tk.Canvas(
+            frame,
+            height=HISTOGRAM_HEIGHT,
+            bg=MaterialColors.SURFACE,
+            highlightthickness=1,
+            highlightbackground=MaterialColors.DIVIDER,
+        )
+        self.histogram_canvas.pack(fill="x", padx=10, pady=(5, 10))
+        self.histogram_canvas.bind("<Configure>", lambda event: self.draw_histogram())
+
     def browse_file(self, var: tk.StringVar):
         """Mở dialog chọn file"""
         filename = filedialog.askopenfilename(
             title="Chọn CSV file",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("Compressed CSV", "*.gz *.bz2 *.xz *.zip"),
+                ("All files", "*.*"),
+            ],
         )
         if filename:
             var.set(filename)
@@ -937,20 +1194,48 @@ class CSVComparatorGUI:
         thread.daemon = True
         thread.start()
 
+    def build_config(self) -> Config:
+        """Tạo config từ UI"""
+        return Config(
+            parametric_name_column=self.parametric_column.get(),
+            get_columns=self.get_columns.get().split(","),
+            begin_from_parametric=self.begin_from_parametric.get(),
+            null_values=self.null_values.get().split(","),
+            key_column=self.key_column.get(),
+            include_keys=self._split_keys(self.include_keys.get()),
+            exclude_keys=self._split_keys(self.exclude_keys.get()),
+            detect_renames=self.detect_renames.get(),
+        )
+
     def perform_comparison(self, file1: str, file2: str):
         """Thực hiện so sánh trong background thread"""
         try:
             # Tạo config từ UI
-            config = Config(
-                parametric_name_column=self.parametric_column.get(),
-                get_columns=self.get_columns.get().split(","),
-                begin_from_parametric=self.begin_from_parametric.get(),
-                null_values=self.null_values.get().split(","),
-                key_column=self.key_column.get(),
-            )
+            config = self.build_config()
 
             # So sánh files với config
             result = CSVProcessorV2.process_files(file1, file2, config)
+            self.comparison_files = (file1, file2)
+            self.comparison_config = config
+
+            # Đánh giá lại các row đo của file 1 với limit cũ / mới
+            self.impact_report = None
+            if self.analyze_impact.get():
+                self.impact_report = file_limit_impact(
+                    file1,
+                    file1,
+                    file2,
+                    config,
+                    keys=changed_keys(result.changed_params, result.renamed_params),
+                    renamed=result.renamed_params,
+                )
+
+            # Limit gợi ý cho các key mới từ các row đo của file 2
+            self.suggested_limits = {}
+            if self.suggest_limits.get() and len(result.new_params):
+                names = [param.name for param in result.new_params]
+                quantiles = bundle_quantiles(file2, config, names=names)
+                self.suggested_limits = {item.name: item for item in quantiles}
 
             # Cập nhật UI trong main thread
             self.root.after(0, self.update_results, result, None)
@@ -959,6 +1244,11 @@ class CSVComparatorGUI:
             # Cập nhật UI với lỗi
             self.root.after(0, self.update_results, None, str(e))
 
+    @staticmethod
+    def _split_keys(text: str):
+        """Tách danh sách key/pattern phân cách bởi dấu phẩy, bỏ phần tử rỗng"""
+        return [key.strip() for key in text.split(",") if key.strip()]
+
     def update_results(self, result: Optional[ComparisonResult], error: Optional[str]):
         """Cập nhật kết quả lên UI"""
         # Enable button
@@ -987,13 +1277,31 @@ class CSVComparatorGUI:
         # Update summary
         self.update_summary_tab(result)
 
-        # Update other tabs
-        self.update_new_params_tab(result.new_params)
-        self.update_removed_params_tab(result.removed_params)
-        self.update_changed_params_tab(result.changed_params)
+        # Các tab chi tiết được điền khi mở (xem on_tab_changed)
+        self.filled_tabs = set()
 
         # Switch to summary tab
         self.notebook.select(0)
+        self.on_tab_changed()
+
+    def on_tab_changed(self, event=None):
+        """Điền bảng của tab chi tiết đang mở (chỉ một lần cho mỗi kết quả)"""
+        result = self.comparison_result
+        if result is None:
+            return
+        tab = self.notebook.index(self.notebook.select())
+        if tab in self.filled_tabs:
+            return
+        self.filled_tabs.add(tab)
+
+        if tab == 1:
+            self.update_new_params_tab(result.new_params)
+        elif tab == 2:
+            self.update_removed_params_tab(result.removed_params)
+        elif tab == 3:
+            self.update_changed_params_tab(
+                result.changed_params, result.renamed_params
+            )
 
     def clear_results(self):
         """Xóa kết quả cũ"""
@@ -1015,26 +1323,27 @@ class CSVComparatorGUI:
         files_info = f"• File 1 (Old Version): {self.file1_path.get()}\n• File 2 (New Version): {self.file2_path.get()}"
         self.files_info_label.config(text=files_info)
 
-        # Calculate totals
-        total_changes = (
-            len(result.new_params)
-            + len(result.removed_params)
-            + len(result.changed_params)
-        )
+        # Chỉ dùng số lượng đã đếm, không tạo danh sách chi tiết
+        counts = result.get_summary()
+        total_changes = counts.total_changes
 
         # Update stats table
         stats_data = [
             (
                 "🆕 New Parametric Keys",
-                len(result.new_params),
+                counts.new_count,
             ),
             (
                 "❌ Removed Parametric Keys",
-                len(result.removed_params),
+                counts.removed_count,
             ),
             (
                 "🔄 Changed Parametric Keys",
-                len(result.changed_params),
+                counts.changed_count,
+            ),
+            (
+                "🔀 Renamed Parametric Keys",
+                counts.renamed_count,
             ),
             ("🔄 Total Change", total_changes),
             (
@@ -1053,30 +1362,26 @@ class CSVComparatorGUI:
         # Update summary text with quick details
         summary = "🔍 QUICK DETAILS:\n\n"
 
-        if result.new_params:
+        if counts.new_count:
             summary += f"🆕 TOP NEW PARAMETRIC KEYS:\n"
-            for i, param in enumerate(result.new_params[:5], 1):  # Show first 5
-                summary += f"   {i}. {param.name}\n"
-            if len(result.new_params) > 5:
-                summary += f"   ... và {len(result.new_params) - 5} parameters khác\n"
+            for i, name in enumerate(counts.top_new[:5], 1):  # Show first 5
+                summary += f"   {i}. {name}\n"
+            if counts.new_count > 5:
+                summary += f"   ... và {counts.new_count - 5} parameters khác\n"
 
-        if result.removed_params:
+        if counts.removed_count:
             summary += f"\n❌ TOP REMOVED PARAMETRIC KEYS:\n"
-            for i, param in enumerate(result.removed_params[:5], 1):  # Show first 5
-                summary += f"   {i}. {param.name}\n"
-            if len(result.removed_params) > 5:
-                summary += (
-                    f"   ... và {len(result.removed_params) - 5} parameters khác\n"
-                )
+            for i, name in enumerate(counts.top_removed[:5], 1):  # Show first 5
+                summary += f"   {i}. {name}\n"
+            if counts.removed_count > 5:
+                summary += f"   ... và {counts.removed_count - 5} parameters khác\n"
 
-        if result.changed_params:
+        if counts.changed_count:
             summary += f"\n🔄 TOP CHANGED PARAMETRIC KEYS:\n"
-            for i, change in enumerate(result.changed_params[:5], 1):  # Show first 5
-                summary += f"   {i}. {change.old.name}\n"
-            if len(result.changed_params) > 5:
-                summary += (
-                    f"   ... và {len(result.changed_params) - 5} parameters khác\n"
-                )
+            for i, name in enumerate(counts.top_changed[:5], 1):  # Show first 5
+                summary += f"   {i}. {name}\n"
+            if counts.changed_count > 5:
+                summary += f"   ... và {counts.changed_count - 5} parameters khác\n"
 
         if total_changes == 0:
             summary += "✅ No differences found between the two files!"
@@ -1094,7 +1399,7 @@ class CSVComparatorGUI:
             self.new_params_table.insert(
                 "",
                 "end",
-                values=("No New Parametric Keys", "-", "-", "No changes"),
+                values=("No New Parametric Keys", "-", "-", "-", "-", "No changes"),
             )
             return
 
@@ -1111,10 +1416,24 @@ class CSVComparatorGUI:
                 else "N/A"
             )
 
+            suggested = self.suggested_limits.get(param.name)
+            if suggested is None:
+                suggested_upper = suggested_lower = "-"
+            else:
+                suggested_upper = self._format_estimate(suggested.suggested_upper)
+                suggested_lower = self._format_estimate(suggested.suggested_lower)
+
             self.new_params_table.insert(
                 "",
                 "end",
-                values=(param.name, upper_val, lower_val, "NEW"),
+                values=(
+                    param.name,
+                    upper_val,
+                    lower_val,
+                    suggested_upper,
+                    suggested_lower,
+                    "NEW",
+                ),
                 tags=("new",),
             )
 
@@ -1162,13 +1481,15 @@ class CSVComparatorGUI:
             "removed", background="#FFEBEE", foreground="#C62828"
         )
 
-    def update_changed_params_tab(self, changed_params):
-        """Cập nhật tab parameters thay đổi với bảng so sánh"""
+    def update_changed_params_tab(self, changed_params, renamed_params=()):
+        """Cập nhật tab parameters thay đổi với bảng so sánh (kể cả key đổi tên)"""
         # Update header
         count_text = f"🔄 CHANGED PARAMETRIC KEYS ({len(changed_params)} items)"
+        if renamed_params:
+            count_text += f" + 🔀 {len(renamed_params)} renamed"
         self.changed_params_count_label.config(text=count_text)
 
-        if not changed_params:
+        if not changed_params and not renamed_params:
             self.changed_params_table.insert(
                 "",
                 "end",
@@ -1179,6 +1500,7 @@ class CSVComparatorGUI:
                     "-",
                     "-",
                     "No changes",
+                    "-",
                 ),
             )
             return
@@ -1224,14 +1546,215 @@ class CSVComparatorGUI:
                     new_upper,
                     new_lower,
                     change_type_str,
+                    self.impact_label(change.old.name),
                 ),
                 tags=("changed",),
             )
 
+        # Key đổi tên: tên cũ → tên mới
+        for rename in renamed_params:
+            self.changed_params_table.insert(
+                "",
+                "end",
+                values=(
+                    f"{rename.old.name} → {rename.new.name}",
+                    rename.old.limit.get_higher(),
+                    rename.old.limit.get_lower(),
+                    rename.new.limit.get_higher(),
+                    rename.new.limit.get_lower(),
+                    f"Renamed ({rename.score:.2f})",
+                    self.impact_label(rename.old.name),
+                ),
+                tags=("renamed",),
+            )
+
         # Configure tag colors
         self.changed_params_table.tag_configure(
             "changed", background="#FFF3E0", foreground="#E65100"
         )
+        self.changed_params_table.tag_configure(
+            "renamed", background="#F3E5F5", foreground="#6A1B9A"
+        )
+
+    def start_measurement_stats(self, exact: bool):
+        """Thống kê các row đo của file 1 trong background thread"""
+        file1 = self.file1_path.get().strip()
+        if not file1 or not os.path.exists(file1):
+            messagebox.showerror("Error", "Please select File 1!")
+            return
+
+        # Kết quả của lần chạy trước (nếu chưa xong) sẽ bị bỏ qua
+        self.stats_run += 1
+        mode = "exact statistics" if exact else "sampling"
+        self.measurement_stats_label.config(
+            text=f"⏳ Running {mode}...", fg=MaterialColors.WARNING
+        )
+        thread = threading.Thread(
+            target=self.perform_measurement_stats,
+            args=(self.stats_run, file1, self.build_config(), exact),
+        )
+        thread.daemon = True
+        thread.start()
+
+    def perform_measurement_stats(self, run: int, file1: str, config, exact: bool):
+        """Tính thống kê (mẫu hoặc chính xác) trong background thread"""
+        try:
+            sample = None
+            if exact:
+                results = exact_stats(file1, config)
+                summary = f"Exact statistics of all measurement rows: {file1}"
+            else:
+                sample, results = bundle_sample_stats(file1, config)
+                summary = (
+                    f"Approximate: {len(sample):,} of ~{sample.population:,} rows "
+                    f"({sample.method}), ± = 95% confidence. "
+                    f"Click 'Exact Stats' for exact values."
+                )
+            self.root.after(
+                0, self.update_measurement_stats, run, results, summary, None, sample
+            )
+        except Exception as e:
+            self.root.after(0, self.update_measurement_stats, run, None, "", str(e))
+
+    @staticmethod
+    def _format_estimate(value, error=None, digits=6) -> str:
+        """Giá trị (và sai số nếu có) dạng '1.234 ± 0.01', '-' nếu không có"""
+        if value is None:
+            return "-"
+        text = f"{value:.{digits}g}"
+        if error is not None:
+            text += f" ± {error:.2g}"
+        return text
+
+    def update_measurement_stats(
+        self, run: int, results, summary: str, error, sample=None
+    ):
+        """Cập nhật tab thống kê row đo"""
+        if run != self.stats_run:
+            return
+        if error:
+            self.measurement_stats_label.config(
+                text=f"Error: {error}", fg=MaterialColors.ERROR
+            )
+            return
+
+        for item in self.measurement_stats_table.get_children():
+            self.measurement_stats_table.delete(item)
+        fmt = self._format_estimate
+        for result in results:
+            stats = result.stats
+            tags = ("failing",) if result.fail_rate else ()
+            self.measurement_stats_table.insert(
+                "",
+                "end",
+                values=(
+                    stats.name,
+                    stats.count,
+                    fmt(stats.mean, result.mean_error),
+                    fmt(stats.std, result.std_error),
+                    fmt(stats.min),
+                    fmt(stats.max),
+                    fmt(stats.lower),
+                    fmt(stats.upper),
+                    fmt(stats.cpk, digits=3),
+                    fmt(result.fail_rate, result.fail_rate_error, digits=3),
+                ),
+                tags=tags,
+            )
+        self.measurement_stats_table.tag_configure(
+            "failing", background="#FFEBEE", foreground="#C62828"
+        )
+        self.measurement_stats_label.config(
+            text=summary, fg=MaterialColors.TEXT_SECONDARY
+        )
+        self.measurement_sample = sample
+        self.draw_histogram()
+
+    def draw_histogram(self):
+        """
+        Vẽ histogram (số row ước lượng của cả file) của parametric được chọn
+        trong bảng thống kê, vạch dọc trên mỗi cột là khoảng tin cậy 95%
+        """
+        canvas = self.histogram_canvas
+        canvas.delete("all")
+        width = canvas.winfo_width()
+        height = canvas.winfo_height()
+        selection = self.measurement_stats_table.selection()
+        sample = self.measurement_sample
+        message = ""
+        if sample is None:
+            message = "Histogram is available after Quick Stats"
+        elif not selection:
+            message = "Select a parameter to show its histogram"
+        else:
+            column = self.measurement_stats_table.index(selection[0])
+            counts, errors, edges = sample.histogram_errors(column, HISTOGRAM_BINS)
+            top = float((counts + errors).max())
+            if not top:
+                message = "No values"
+        if message or width < 100:
+            canvas.create_text(
+                width // 2,
+                height // 2,
+                text=message,
+                fill=MaterialColors.TEXT_SECONDARY,
+                font=("Segoe UI", 9),
+            )
+            return
+
+        left, right, upper, bottom = 60, width - 20, 20, height - 25
+        bar_width = (right - left) / len(counts)
+        scale = (bottom - upper) / top
+        for k, (count, error) in enumerate(zip(counts.tolist(), errors.tolist())):
+            x0 = left + k * bar_width
+            x1 = x0 + bar_width
+            canvas.create_rectangle(
+                x0 + 1,
+                bottom - count * scale,
+                x1 - 1,
+                bottom,
+                fill=MaterialColors.PRIMARY_LIGHT,
+                outline=MaterialColors.PRIMARY,
+            )
+            if error:
+                middle = (x0 + x1) / 2
+                y0 = bottom - min(top, count + error) * scale
+                y1 = bottom - max(0.0, count - error) * scale
+                canvas.create_line(middle, y0, middle, y1, fill=MaterialColors.ERROR)
+                for y in (y0, y1):
+                    canvas.create_line(
+                        middle - 3, y, middle + 4, y, fill=MaterialColors.ERROR
+                    )
+
+        canvas.create_line(left, bottom, right, bottom, fill=MaterialColors.DIVIDER)
+        font = ("Segoe UI", 8)
+        name = sample.names[column]
+        canvas.create_text(
+            left, upper - 10, text=name, anchor="w", font=("Segoe UI", 9, "bold")
+        )
+        canvas.create_text(left - 5, upper, text=f"{top:.3g}", anchor="e", font=font)
+        canvas.create_text(left - 5, bottom, text="0", anchor="e", font=font)
+        canvas.create_text(
+            left, bottom + 12, text=f"{edges[0]:.6g}", anchor="w", font=font
+        )
+        canvas.create_text(
+            right, bottom + 12, text=f"{edges[-1]:.6g}", anchor="e", font=font
+        )
+        canvas.create_text(
+            right,
+            upper - 10,
+            text="Estimated rows per bin, bar = 95% confidence",
+            anchor="e",
+            fill=MaterialColors.TEXT_SECONDARY,
+            font=font,
+        )
+
+    def impact_label(self, name: str) -> str:
+        """Mô tả impact của key (tên trong file 1), "-" nếu không phân tích"""
+        if self.impact_report is None:
+            return "-"
+        impact = self.impact_report.get(name)
+        return impact.label() if impact is not None else "No data"
 
     def export_to_excel(self):
         """Export comparison results to Excel file"""
@@ -1280,6 +1803,8 @@ class CSVComparatorGUI:
             result = self.comparison_result
             if not result:
                 raise ValueError("No comparison result to export.")
+            counts = result.get_summary()
+            impact_report = self.impact_report
 
             # Create workbook
             wb = Workbook()
@@ -1304,6 +1829,9 @@ class CSVComparatorGUI:
             blue_fill = PatternFill(
                 start_color="00B0F0", end_color="00B0F0", fill_type="solid"
             )
+            purple_fill = PatternFill(
+                start_color="CC99FF", end_color="CC99FF", fill_type="solid"
+            )
 
             center_alignment = Alignment(
                 horizontal="center", vertical="center", wrap_text=True
@@ -1369,7 +1897,7 @@ class CSVComparatorGUI:
             ws[f"A{row}"] = "Added Keys"
             ws[f"A{row}"].alignment = left_alignment
             ws[f"A{row}"].border = thin_border
-            ws[f"B{row}"] = len(result.new_params)
+            ws[f"B{row}"] = counts.new_count
             ws[f"B{row}"].alignment = center_alignment
             ws[f"B{row}"].border = thin_border
 
@@ -1377,7 +1905,7 @@ class CSVComparatorGUI:
             ws[f"A{row}"] = "Removed Keys"
             ws[f"A{row}"].alignment = left_alignment
             ws[f"A{row}"].border = thin_border
-            ws[f"B{row}"] = len(result.removed_params)
+            ws[f"B{row}"] = counts.removed_count
             ws[f"B{row}"].alignment = center_alignment
             ws[f"B{row}"].border = thin_border
 
@@ -1385,7 +1913,15 @@ class CSVComparatorGUI:
             ws[f"A{row}"] = "Limits Changed Keys"
             ws[f"A{row}"].alignment = left_alignment
             ws[f"A{row}"].border = thin_border
-            ws[f"B{row}"] = len(result.changed_params)
+            ws[f"B{row}"] = counts.changed_count
+            ws[f"B{row}"].alignment = center_alignment
+            ws[f"B{row}"].border = thin_border
+
+            row += 1
+            ws[f"A{row}"] = "Renamed Keys"
+            ws[f"A{row}"].alignment = left_alignment
+            ws[f"A{row}"].border = thin_border
+            ws[f"B{row}"] = counts.renamed_count
             ws[f"B{row}"].alignment = center_alignment
             ws[f"B{row}"].border = thin_border
 
@@ -1393,10 +1929,19 @@ class CSVComparatorGUI:
             ws[f"A{row}"] = "Overlap Keys"
             ws[f"A{row}"].alignment = left_alignment
             ws[f"A{row}"].border = thin_border
-            ws[f"B{row}"] = len(result.overlap_params)  # Calculate if needed
+            ws[f"B{row}"] = counts.overlap_count
             ws[f"B{row}"].alignment = center_alignment
             ws[f"B{row}"].border = thin_border
 
+            if impact_report is not None:
+                row += 1
+                ws[f"A{row}"] = "Projected Yield Delta (%)"
+                ws[f"A{row}"].alignment = left_alignment
+                ws[f"A{row}"].border = thin_border
+                ws[f"B{row}"] = round(impact_report.yield_delta(), 2)
+                ws[f"B{row}"].alignment = center_alignment
+                ws[f"B{row}"].border = thin_border
+
             # ===== RIGHT SIDE: Comparison Details =====
             # Header row 1
             ws["D1"] = (
@@ -1507,6 +2052,13 @@ class CSVComparatorGUI:
             ws["I7"].fill = header_fill
             ws["I7"].border = thin_border
 
+            if impact_report is not None:
+                ws["J7"] = "Impact"
+                ws["J7"].font = header_font
+                ws["J7"].alignment = center_alignment
+                ws["J7"].fill = header_fill
+                ws["J7"].border = thin_border
+
             # Data rows
             current_row = 8
 
@@ -1573,6 +2125,38 @@ class CSVComparatorGUI:
                 ws[f"I{current_row}"].alignment = center_alignment
                 ws[f"I{current_row}"].border = thin_border
 
+                if impact_report is not None:
+                    ws[f"J{current_row}"] = self.impact_label(change.old.name)
+                    ws[f"J{current_row}"].alignment = center_alignment
+                    ws[f"J{current_row}"].border = thin_border
+
+                current_row += 1
+
+            # Renamed Keys (Purple)
+            for rename in result.renamed_params:
+                ws[f"D{current_row}"] = "Renamed Keys"
+                ws[f"D{current_row}"].fill = purple_fill
+                ws[f"D{current_row}"].alignment = center_alignment
+                ws[f"D{current_row}"].border = thin_border
+
+                ws[f"E{current_row}"] = f"{rename.old.name} → {rename.new.name}"
+                ws[f"E{current_row}"].border = thin_border
+
+                for column, value in (
+                    ("F", rename.old.limit.get_higher()),
+                    ("G", rename.old.limit.get_lower()),
+                    ("H", rename.new.limit.get_higher()),
+                    ("I", rename.new.limit.get_lower()),
+                ):
+                    ws[f"{column}{current_row}"] = value
+                    ws[f"{column}{current_row}"].alignment = center_alignment
+                    ws[f"{column}{current_row}"].border = thin_border
+
+                if impact_report is not None:
+                    ws[f"J{current_row}"] = self.impact_label(rename.old.name)
+                    ws[f"J{current_row}"].alignment = center_alignment
+                    ws[f"J{current_row}"].border = thin_border
+
                 current_row += 1
 
             # Added Keys (Blue)
@@ -1633,6 +2217,14 @@ class CSVComparatorGUI:
             ws.column_dimensions["G"].width = 12
             ws.column_dimensions["H"].width = 12
             ws.column_dimensions["I"].width = 12
+            if impact_report is not None:
+                ws.column_dimensions["J"].width = 32
+
+            # Unit fail theo limit của từng file (đọc các row đo)
+            if self.check_limits.get():
+                for label, path in zip(("Old", "New"), self.comparison_files):
+                    report = check_file_limits(path, self.comparison_config)
+                    self.write_failure_sheet(wb, f"{label} Limit Failures", report)
 
             # Save workbook
             wb.save(filepath)
@@ -1646,6 +2238,65 @@ class CSVComparatorGUI:
             traceback.print_exc()
             self.root.after(0, self.excel_export_complete, filepath, str(e))
 
+    @staticmethod
+    def write_failure_sheet(wb: Workbook, title: str, report: FailureReport):
+        """Thêm sheet: số fail của từng parametric và danh sách unit fail"""
+        ws = wb.create_sheet(title)
+        header_font = Font(bold=True, color="FFFFFF", size=11)
+        header_fill = PatternFill(
+            start_color="1F4E78", end_color="1F4E78", fill_type="solid"
+        )
+        red_fill = PatternFill(
+            start_color="FF0000", end_color="FF0000", fill_type="solid"
+        )
+
+        def header(values):
+            ws.append(values)
+            for column in range(1, len(values) + 1):
+                ws.cell(row=ws.max_row, column=column).font = header_font
+                ws.cell(row=ws.max_row, column=column).fill = header_fill
+
+        def limit(value):
+            return None if math.isnan(value) else float(value)
+
+        ws.append(["File", report.file_path])
+        ws.append(["Total Units", report.total_units])
+        ws.append(["Failing Units", report.failing_units])
+        if report.truncated:
+            ws.append(["Note", f"Only the first {len(report.units)} units are listed"])
+        ws.append([])
+
+        header(["Parameter", "Lower", "Upper", "Tested", "Failed"])
+        for k in report.failed_params():
+            ws.append(
+                [
+                    report.names[k],
+                    limit(report.lower[k]),
+                    limit(report.upper[k]),
+                    int(report.tested[k]),
+                    int(report.fail_counts[k]),
+                ]
+            )
+            ws.cell(row=ws.max_row, column=5).fill = red_fill
+        ws.append([])
+
+        header(["Row", "Serial", "Failed Count", "Failed Parameters"])
+        for unit in report.units:
+            ws.append(
+                [
+                    unit.row_index + 1,
+                    unit.serial,
+                    len(unit.failed),
+                    ";".join(unit.failed),
+                ]
+            )
+
+        ws.column_dimensions["A"].width = 30
+        ws.column_dimensions["B"].width = 20
+        ws.column_dimensions["C"].width = 12
+        ws.column_dimensions["D"].width = 40
+        ws.column_dimensions["E"].width = 12
+
     def excel_export_complete(self, filepath: str, error: Optional[str]):
         """Called when Excel export is complete"""
         self.export_button.config(state="normal", text="📊 Export to Excel")
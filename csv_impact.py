@@ -0,0 +1,185 @@
+"""
+CSV Impact - Đánh giá lại log đo với limit cũ và limit mới: bao nhiêu unit
+sẽ chuyển từ pass sang fail (hoặc ngược lại) khi limit thay đổi
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from csv_failures import block_failures
+from csv_measurements import BLOCK_ROWS, iter_measurement_blocks, limits_config
+from csv_processor_v2 import Config, DataTool, LimitData, load_bundle
+from csv_stats import limit_bounds, value_precision
+
+
+@dataclass
+class LimitImpact:
+    """Ảnh hưởng của việc đổi limit lên một parametric của log"""
+
+    name: str
+    tested: int = 0
+    old_fail: int = 0
+    new_fail: int = 0
+    # pass (limit cũ) -> fail (limit mới) và ngược lại
+    newly_failing: int = 0
+    newly_passing: int = 0
+
+    @property
+    def yield_delta(self) -> float:
+        """Thay đổi tỷ lệ pass (điểm %) khi dùng limit mới"""
+        if not self.tested:
+            return 0.0
+        return 100.0 * (self.old_fail - self.new_fail) / self.tested
+
+    def label(self) -> str:
+        """Mô tả ngắn, vd: '3 new fail, 1 new pass (-0.40%)'"""
+        if not self.tested:
+            return "No data"
+        return (
+            f"{self.newly_failing} new fail, {self.newly_passing} new pass "
+            f"({self.yield_delta:+.2f}%)"
+        )
+
+
+@dataclass
+class ImpactReport:
+    """Kết quả đánh giá một log với 2 bộ limit"""
+
+    log_path: str
+    total_units: int = 0
+    # Số unit pass tất cả parametric với limit cũ / limit mới
+    old_passing_units: int = 0
+    new_passing_units: int = 0
+    impacts: Dict[str, LimitImpact] = field(default_factory=dict)
+
+    def yield_delta(self) -> float:
+        """Thay đổi yield của cả log (điểm %) khi dùng limit mới"""
+        if not self.total_units:
+            return 0.0
+        return 100.0 * (self.new_passing_units - self.old_passing_units) / (
+            self.total_units
+        )
+
+    def get(self, name: str) -> Optional[LimitImpact]:
+        return self.impacts.get(name)
+
+
+def _bounds(limits: Iterable[Optional[LimitData]], columns: int) -> np.ndarray:
+    """Mảng [2, columns] lower / upper (NaN nếu không có limit)"""
+    bounds = np.full((2, columns), np.nan)
+    for k, limit in enumerate(limits):
+        if limit is None:
+            continue
+        lower, upper = limit_bounds(limit)
+        if lower is not None:
+            bounds[0, k] = lower
+        if upper is not None:
+            bounds[1, k] = upper
+    return bounds
+
+
+def limit_impact(
+    log_path: str,
+    log_data: DataTool,
+    old_data: DataTool,
+    new_data: DataTool,
+    config: Config,
+    keys: Optional[Iterable[str]] = None,
+    renamed: Iterable = (),
+    block_rows: int = BLOCK_ROWS,
+) -> ImpactReport:
+    """
+    Đánh giá các row đo của log với limit của old_data và new_data (một lần đọc)
+    - Parametric của log được ghép với limit theo tên (key đổi tên: tên cũ của
+      log dùng limit của tên mới); không có limit => không bao giờ fail
+    - keys: các tên cần báo cáo impact (mặc định: tất cả tên có limit khác nhau)
+    """
+    names = [param.name for param in log_data.data]
+    old_limits = {param.name: param.limit for param in old_data.data}
+    new_limits = {param.name: param.limit for param in new_data.data}
+    for rename in renamed:
+        new_limits.setdefault(rename.old.name, rename.new.limit)
+
+    old_bounds = _bounds((old_limits.get(name) for name in names), len(names))
+    new_bounds = _bounds((new_limits.get(name) for name in names), len(names))
+    # So với giá trị của log ở độ chính xác của log (columnar float32)
+    old_bounds = value_precision(old_bounds, log_data)
+    new_bounds = value_precision(new_bounds, log_data)
+
+    if keys is None:
+        keys = [
+            name
+            for name in names
+            if name in old_limits
+            and name in new_limits
+            and old_limits[name] != new_limits[name]
+        ]
+    wanted = set(keys)
+    selected = np.array([k for k, name in enumerate(names) if name in wanted], int)
+
+    columns = len(names)
+    tested = np.zeros(columns, dtype=np.int64)
+    old_fail = np.zeros(columns, dtype=np.int64)
+    new_fail = np.zeros(columns, dtype=np.int64)
+    newly_failing = np.zeros(columns, dtype=np.int64)
+    newly_passing = np.zeros(columns, dtype=np.int64)
+
+    report = ImpactReport(log_path=log_path)
+    for block in iter_measurement_blocks(log_path, log_data, config, block_rows):
+        values = block.values
+        fails_old = block_failures(values, old_bounds[0], old_bounds[1])
+        fails_new = block_failures(values, new_bounds[0], new_bounds[1])
+
+        tested += (~np.isnan(values)).sum(axis=0)
+        old_fail += fails_old.sum(axis=0)
+        new_fail += fails_new.sum(axis=0)
+        newly_failing += (fails_new & ~fails_old).sum(axis=0)
+        newly_passing += (fails_old & ~fails_new).sum(axis=0)
+
+        report.total_units += len(block.serials)
+        report.old_passing_units += int((~fails_old.any(axis=1)).sum())
+        report.new_passing_units += int((~fails_new.any(axis=1)).sum())
+
+    for k in selected.tolist():
+        report.impacts[names[k]] = LimitImpact(
+            name=names[k],
+            tested=int(tested[k]),
+            old_fail=int(old_fail[k]),
+            new_fail=int(new_fail[k]),
+            newly_failing=int(newly_failing[k]),
+            newly_passing=int(newly_passing[k]),
+        )
+    return report
+
+
+def file_limit_impact(
+    log_path: str,
+    old_file: str,
+    new_file: str,
+    config: Optional[Config] = None,
+    keys: Optional[Iterable[str]] = None,
+    renamed: Iterable = (),
+    block_rows: int = BLOCK_ROWS,
+) -> ImpactReport:
+    """Đọc limit của 2 bundle (load_bundle) và đánh giá các row đo của log"""
+    config = config or Config()
+    bundle_config = limits_config(config)
+    return limit_impact(
+        log_path,
+        load_bundle(log_path, bundle_config),
+        load_bundle(old_file, bundle_config),
+        load_bundle(new_file, bundle_config),
+        config,
+        keys,
+        renamed,
+        block_rows,
+    )
+
+
+def changed_keys(changed_params: Iterable, renamed_params: Iterable = ()) -> List[str]:
+    """Tên (trong log cũ) của các key đổi limit / đổi tên"""
+    return [change.old.name for change in changed_params] + [
+        rename.old.name for rename in renamed_params
+    ]
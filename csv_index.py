@@ -0,0 +1,298 @@
+"""
+CSV Index - Đọc bundle qua mmap với index byte-offset của từng row
+"""
+
+import csv
+import mmap
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from csv_reader import QUOTE, iter_byte_rows
+
+# File index nằm cạnh file log: <file>.rowidx
+INDEX_SUFFIX = ".rowidx"
+# 02: offset của record (không phải dòng vật lý)
+INDEX_MAGIC = b"CSVIDX02"
+# magic, kích thước file, mtime_ns, số offset
+INDEX_HEADER = struct.Struct("<8sQQQ")
+
+# Số bytes quét newline mỗi lần (giới hạn bộ nhớ tạm của numpy)
+SCAN_BLOCK = 64 << 20
+
+# Số bundle được giữ mở trong open_mapped()
+MAX_OPEN_BUNDLES = 8
+
+
+def _iter_lines(buffer, offsets: np.ndarray, line: int) -> Iterator[str]:
+    """Các dòng vật lý từ line (text, kết thúc bằng "\n") để đưa cho csv.reader"""
+    for index in range(line, len(offsets) - 1):
+        text = buffer[int(offsets[index]) : int(offsets[index + 1])]
+        yield text.rstrip(b"\r\n").decode("utf-8", "replace") + "\n"
+
+
+def _record_starts(buffer, offsets: np.ndarray, lines: np.ndarray) -> np.ndarray:
+    """
+    Mask các dòng vật lý là đầu record
+    lines: các dòng có thể mở field nhiều dòng (tăng dần) - chỉ các dòng này
+    được đọc bằng csv.reader để biết record kéo dài bao nhiêu dòng
+    """
+    keep = np.ones(len(offsets), dtype=bool)
+    following = 0
+    for line in lines.tolist():
+        if line < following:
+            continue
+        consumed = 0
+
+        def feed(start: int) -> Iterator[str]:
+            nonlocal consumed
+            for text in _iter_lines(buffer, offsets, start):
+                consumed += 1
+                yield text
+
+        try:
+            next(csv.reader(feed(line)), None)
+        except csv.Error:
+            # Dấu ngoặc kép chưa đóng đến cuối file
+            pass
+        following = line + max(consumed, 1)
+        keep[line + 1 : following] = False
+    return keep
+
+
+def build_row_offsets(buffer) -> np.ndarray:
+    """
+    Quét newline tuần tự một lần, trả về mảng uint64:
+    offsets[i] = byte bắt đầu của row i, offsets[-1] = kích thước buffer
+    Row là record CSV: newline bên trong field có dấu ngoặc kép không bắt đầu
+    row mới (row index giống iter_byte_rows / load_bundle). Dòng có số dấu ngoặc
+    kép chẵn được coi là kết thúc record (đúng với CSV hợp lệ).
+    """
+    size = len(buffer)
+    parts = [np.zeros(1, dtype=np.uint64)]
+    if size == 0:
+        return parts[0]
+
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    for block_start in range(0, size, SCAN_BLOCK):
+        newlines = np.flatnonzero(data[block_start : block_start + SCAN_BLOCK] == 10)
+        parts.append(newlines.astype(np.uint64) + np.uint64(block_start + 1))
+
+    offsets = np.concatenate(parts)
+    # Dòng cuối không có "\n"
+    if offsets[-1] != size:
+        offsets = np.append(offsets, np.uint64(size))
+
+    if buffer.find(QUOTE) >= 0:
+        quoted = []
+        for block_start in range(0, size, SCAN_BLOCK):
+            quotes = np.flatnonzero(data[block_start : block_start + SCAN_BLOCK] == 34)
+            positions = quotes.astype(np.uint64) + np.uint64(block_start)
+            quoted.append(np.searchsorted(offsets, positions, side="right") - 1)
+        # Chỉ dòng có số dấu ngoặc kép lẻ mới có thể mở field kéo dài sang dòng sau
+        counts = np.bincount(np.concatenate(quoted), minlength=len(offsets))
+        lines = np.flatnonzero(counts % 2)
+        offsets = offsets[_record_starts(buffer, offsets, lines)]
+    # Giải phóng view trên buffer để mmap có thể đóng được
+    del data
+    return offsets
+class _MappedStream:
+    """Stream tuần tự (readinto) trên mmap để dùng với csv_reader"""
+
+    def __init__(self, mm: mmap.mmap):
+        self.mm = mm
+        self.pos = 0
+
+    def readinto(self, buffer) -> int:
+        n = min(len(buffer), len(self.mm) - self.pos)
+        buffer[:n] = self.mm[self.pos : self.pos + n]
+        self.pos += n
+        return n
+
+    def peek(self, size: int = 1) -> bytes:
+        return self.mm[self.pos : self.pos + max(size, 1)]
+
+    def close(self):
+        # View (rows_stream) phải được giải phóng trước khi đóng mmap
+        if isinstance(self.mm, memoryview):
+            self.mm.release()
+
+
+class MappedBundle:
+    """
+    Bundle CSV được map vào bộ nhớ
+    - Index offset được tạo bằng một lần quét newline và lưu ra file .rowidx
+    - Truy cập row bất kỳ (hoặc một khoảng row) theo index với chi phí O(1)
+    Row ở đây là record CSV (field có xuống dòng trong dấu ngoặc kép thuộc cùng row)
+    """
+
+    def __init__(self, file_path: str, persist_index: bool = True):
+        self.file_path = file_path
+        self.persist_index = persist_index
+        try:
+            self._file = open(file_path, "rb")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Không tìm thấy file: {file_path}")
+
+        stat = os.fstat(self._file.fileno())
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._mm: Optional[mmap.mmap] = None
+        if self.size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    @property
+    def index_path(self) -> str:
+        return self.file_path + INDEX_SUFFIX
+
+    def is_stale(self) -> bool:
+        """File đã bị thay đổi kể từ lúc map hay chưa"""
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return True
+        return stat.st_size != self.size or stat.st_mtime_ns != self.mtime_ns
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Offsets của các row (đọc từ file index nếu còn hợp lệ, nếu không thì tạo mới)"""
+        with self._lock:
+            if self._offsets is None:
+                self._offsets = self._load_index()
+                if self._offsets is None:
+                    self._offsets = build_row_offsets(self._mm or b"")
+                    if self.persist_index:
+                        self._save_index(self._offsets)
+            return self._offsets
+
+    def _load_index(self) -> Optional[np.ndarray]:
+        try:
+            with open(self.index_path, "rb") as file:
+                header = file.read(INDEX_HEADER.size)
+                if len(header) != INDEX_HEADER.size:
+                    return None
+                magic, size, mtime_ns, count = INDEX_HEADER.unpack(header)
+                if (magic, size, mtime_ns) != (INDEX_MAGIC, self.size, self.mtime_ns):
+                    return None
+                offsets = np.fromfile(file, dtype="<u8", count=count)
+                if len(offsets) != count:
+                    return None
+                return offsets.astype(np.uint64, copy=False)
+        except OSError:
+            return None
+
+    def _save_index(self, offsets: np.ndarray):
+        # Thư mục chỉ đọc: bỏ qua, index vẫn dùng được trong bộ nhớ
+        try:
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(
+                    INDEX_HEADER.pack(
+                        INDEX_MAGIC, self.size, self.mtime_ns, len(offsets)
+                    )
+                )
+                offsets.astype("<u8", copy=False).tofile(file)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def row_bytes(self, index: int) -> bytes:
+        """Nội dung thô của row (không gồm "\\n" / "\\r\\n")"""
+        if index < 0:
+            index += len(self)
+        return self.rows_bytes(index, index + 1)
+
+    def rows_span(self, start: int, stop: int) -> Tuple[int, int]:
+        """Vị trí byte (begin, end) của các row [start, stop), bỏ newline cuối cùng"""
+        offsets = self.offsets
+        count = len(offsets) - 1
+        if start < 0:
+            start += count
+        if not 0 <= start < count or stop <= start:
+            raise IndexError(f"row {start} ngoài phạm vi (0..{count - 1})")
+        stop = min(stop, count)
+
+        begin = int(offsets[start])
+        end = int(offsets[stop])
+        assert self._mm is not None
+        if end > begin and self._mm[end - 1] == 10:
+            end -= 1
+        if end > begin and self._mm[end - 1] == 13:
+            end -= 1
+        return begin, end
+
+    def rows_bytes(self, start: int, stop: int) -> bytes:
+        """Nội dung thô của các row [start, stop), bỏ newline cuối cùng"""
+        begin, end = self.rows_span(start, stop)
+        return self._mm[begin:end]  # type: ignore
+
+    def row(self, index: int) -> List[bytes]:
+        """Row đã tách field (bytes)"""
+        data = self.row_bytes(index)
+        if not data:
+            return []
+        if b'"' not in data:
+            return data.split(b",")
+        return next(iter_byte_rows(_MappedStream(data)), [])  # type: ignore
+
+    def rows(self, start: int, stop: int) -> List[List[bytes]]:
+        """Các row [start, stop) đã tách field"""
+        data = self.rows_bytes(start, stop)
+        return list(iter_byte_rows(_MappedStream(data)))  # type: ignore
+
+    @property
+    def buffer(self):
+        """Vùng nhớ đã map (b"" nếu file rỗng) - dùng với find()/slice theo rows_span"""
+        return self._mm or b""
+
+    def stream(self) -> _MappedStream:
+        """Stream tuần tự trên vùng nhớ đã map (không đọc lại file)"""
+        return _MappedStream(self._mm or b"")  # type: ignore
+
+    def rows_stream(self, start: int, stop: int) -> _MappedStream:
+        """
+        Stream tuần tự trên các row [start, stop): view của vùng nhớ đã map,
+        không copy cả khoảng row (close() để giải phóng view)
+        """
+        begin, end = self.rows_span(start, stop)
+        return _MappedStream(memoryview(self._mm)[begin:end])  # type: ignore
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+_open_bundles: "OrderedDict[str, MappedBundle]" = OrderedDict()
+_open_lock = threading.Lock()
+
+
+def open_mapped(file_path: str) -> MappedBundle:
+    """
+    Lấy MappedBundle cho file (dùng lại bundle đã mở nếu file chưa thay đổi)
+    Chỉ giữ MAX_OPEN_BUNDLES bundle gần nhất
+    """
+    key = os.path.realpath(file_path)
+    with _open_lock:
+        bundle = _open_bundles.get(key)
+        if bundle is not None and not bundle.is_stale():
+            _open_bundles.move_to_end(key)
+            return bundle
+
+        # Bundle cũ không bị đóng ở đây vì thread khác có thể vẫn đang dùng,
+        # mmap sẽ được giải phóng khi không còn tham chiếu
+        bundle = MappedBundle(file_path)
+        _open_bundles[key] = bundle
+        while len(_open_bundles) > MAX_OPEN_BUNDLES:
+            _open_bundles.popitem(last=False)
+        return bundle
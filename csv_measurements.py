@@ -0,0 +1,225 @@
+"""
+CSV Measurements - Đọc các row dữ liệu đo (bên dưới limit rows) theo từng block NumPy
+"""
+
+import dataclasses
+import os
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import BinaryIO, Iterator, List
+
+import numpy as np
+
+from csv_reader import iter_filtered_rows, open_bundle_stream
+from csv_processor_v2 import Config, DataTool, load_bundle
+
+# Số row đo tối đa trong mỗi block
+BLOCK_ROWS = 4096
+
+# Số cell tối đa trong mỗi block (file nhiều cột => block ít row hơn, bộ nhớ
+# của một block không phụ thuộc số cột)
+BLOCK_CELLS = 1 << 20
+
+
+@dataclass
+class MeasurementBlock:
+    """Một block row đo: values[r, k] là giá trị của data[k] ở row r (NaN nếu trống)"""
+
+    row_indices: np.ndarray
+    serials: List[str]
+    values: np.ndarray
+
+
+def _to_float(cells: np.ndarray, null_values: List[bytes]) -> np.ndarray:
+    """
+    Chuyển mảng bytes (dtype S) sang float64; cell rỗng / null / giá trị không
+    hợp lệ -> NaN
+    """
+    missing = cells == b""
+    for value in null_values:
+        missing |= cells == value
+    cells = np.where(missing, b"nan", cells)
+    try:
+        return cells.astype(np.float64)
+    except ValueError:
+        pass
+
+    # Có giá trị không phải số - chuyển từng cell
+    result = np.empty(cells.shape, dtype=np.float64)
+    flat = result.reshape(-1)
+    for position, value in enumerate(cells.reshape(-1)):
+        try:
+            flat[position] = float(value)
+        except ValueError:
+            flat[position] = np.nan
+    return result
+
+
+def records_block(
+    row_indices: List[int],
+    records: List[List[bytes]],
+    columns: List[int],
+    null_values: List[bytes],
+) -> MeasurementBlock:
+    """Block từ các row đo đã tách field (vd: các row được chọn ngẫu nhiên)"""
+    cells = [
+        [record[column] if column < len(record) else b"" for column in columns]
+        for record in records
+    ]
+    return MeasurementBlock(
+        row_indices=np.array(row_indices, dtype=np.int64),
+        serials=[record[0].decode("utf-8", "replace") for record in records],
+        values=_to_float(
+            np.array(cells, dtype=np.bytes_).reshape(len(records), len(columns)),
+            null_values,
+        ),
+    )
+
+
+def label_row_filter(config: Config):
+    """
+    Field đầu tiên -> True nếu là nhãn key row / limit row
+    So sánh cả field (bỏ khoảng trắng, không phân biệt hoa thường), không theo
+    chuỗi con: serial như "SNMAX01" là row đo
+    """
+    labels = {config.key_column.lower().encode("utf-8")} | {
+        col.lower().encode("utf-8") for col in config.get_columns
+    }
+
+    def is_label(first: bytes) -> bool:
+        return first.strip().lower() in labels
+
+    return is_label
+
+
+def measurement_row_filter(config: Config):
+    """
+    Field đầu tiên -> True nếu không phải key row / limit row (label_row_filter)
+    Limit row có nhãn khác (vd: "max limit") được bỏ qua theo
+    data_tool.limit_row_indices
+    """
+    is_label = label_row_filter(config)
+
+    def is_measurement(first: bytes) -> bool:
+        return not is_label(first)
+
+    return is_measurement
+
+
+def limits_config(config: Config) -> Config:
+    """Config chỉ đọc đến hết các limit row (các row đo được đọc riêng theo block)"""
+    return dataclasses.replace(config, stop_after_limits=True)
+
+
+def iter_measurement_blocks(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    block_rows: int = BLOCK_ROWS,
+) -> Iterator[MeasurementBlock]:
+    """
+    Đọc các row đo của bundle (sau key row, không phải limit row, không rỗng)
+    và trả về từng block tối đa block_rows row, cột theo thứ tự data_tool.data
+    Serial là field đầu tiên của mỗi row.
+    Số row mỗi block được giới hạn thêm bởi BLOCK_CELLS / số cột.
+    Unit trùng serial được lọc theo config.retest_policy (csv_dedup).
+    """
+    if config.retest_policy != "all":
+        # csv_dedup import module này nên import tại đây
+        from csv_dedup import dedup_blocks
+
+        yield from dedup_blocks(file_path, data_tool, config, block_rows)
+        return
+    yield from iter_all_blocks(file_path, data_tool, config, block_rows)
+
+
+def block_rows_for(data_tool: DataTool, block_rows: int = BLOCK_ROWS) -> int:
+    """Số row mỗi block (giới hạn bởi BLOCK_CELLS / số cột)"""
+    return max(1, min(block_rows, BLOCK_CELLS // max(len(data_tool.columns), 1)))
+
+
+def iter_all_blocks(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    block_rows: int = BLOCK_ROWS,
+) -> Iterator[MeasurementBlock]:
+    """Các block của tất cả row đo (không lọc unit trùng serial)"""
+    columns = list(data_tool.columns)
+    if not columns or data_tool.key_row_index < 0:
+        return
+    block_rows = block_rows_for(data_tool, block_rows)
+
+    if os.path.isdir(file_path):
+        # Thư mục columnar: data_tool.columns là vị trí cột trong store
+        # (csv_columnar import module này nên import tại đây)
+        from csv_columnar import ColumnarStore
+
+        yield from ColumnarStore(file_path).iter_blocks(columns, block_rows)
+        return
+
+    with open_bundle_stream(file_path) as stream:
+        yield from iter_stream_blocks(stream, data_tool, config, block_rows)
+
+
+def iter_stream_blocks(
+    stream: BinaryIO,
+    data_tool: DataTool,
+    config: Config,
+    block_rows: int,
+    first_row: int = 0,
+) -> Iterator[MeasurementBlock]:
+    """
+    Các block row đo đọc từ stream CSV
+    first_row: row index (trong file) của row đầu tiên của stream
+    """
+    columns = list(data_tool.columns)
+    null_values = [value.encode("utf-8") for value in config.null_values]
+    is_measurement = measurement_row_filter(config)
+    limit_rows = set(data_tool.limit_row_indices.values())
+    last_column = max(columns)
+    # itemgetter với một cột trả về giá trị, không phải tuple
+    pick = itemgetter(*columns) if len(columns) > 1 else lambda row: (row[columns[0]],)
+
+    row_indices: List[int] = []
+    serials: List[bytes] = []
+    cells: List[tuple] = []
+
+    def flush() -> MeasurementBlock:
+        block = MeasurementBlock(
+            row_indices=np.array(row_indices, dtype=np.int64),
+            serials=[serial.decode("utf-8", "replace") for serial in serials],
+            values=_to_float(np.array(cells, dtype=np.bytes_), null_values),
+        )
+        row_indices.clear()
+        serials.clear()
+        cells.clear()
+        return block
+
+    for row_index, record in iter_filtered_rows(stream, is_measurement):
+        row_index += first_row
+        if row_index <= data_tool.key_row_index or not any(record):
+            continue
+        if row_index in limit_rows:
+            continue
+        # Row có dấu ngoặc kép luôn được trả về, cần lọc lại
+        if not is_measurement(record[0]):
+            continue
+        if len(record) <= last_column:
+            record = record + [b""] * (last_column + 1 - len(record))
+        row_indices.append(row_index)
+        serials.append(record[0])
+        cells.append(pick(record))
+        if len(cells) >= block_rows:
+            yield flush()
+
+    if cells:
+        yield flush()
+
+
+def iter_bundle_blocks(
+    file_path: str, config: Config, block_rows: int = BLOCK_ROWS
+) -> Iterator[MeasurementBlock]:
+    """Đọc limit (load_bundle) rồi trả về các block row đo của file"""
+    data_tool = load_bundle(file_path, limits_config(config))
+    yield from iter_measurement_blocks(file_path, data_tool, config, block_rows)
@@ -0,0 +1,171 @@
+"""
+CSV Merge - Gộp các row đo của nhiều log (các build có bộ parametric khác nhau)
+thành một thư mục columnar chung (csv_columnar)
+
+- Schema chung là hợp các tên parametric theo thứ tự xuất hiện (tên -> cột),
+  limit lấy từ log đầu tiên có parametric đó
+- Giá trị của parametric không có trong log là NaN
+- Mỗi row group thuộc một log (source trong meta), row index trong log gốc được
+  giữ lại => nguồn gốc của từng row (ColumnarStore.row_sources / row_indices)
+- Các log được đọc song song bởi các process, mỗi process ghi row group của
+  log mình; thứ tự row group trong meta luôn theo thứ tự log
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from csv_columnar import (
+    STORE_DTYPES,
+    ColumnarStore,
+    iter_row_groups,
+    prepare_store,
+    row_group_rows,
+    write_meta,
+    write_row_group,
+)
+from csv_measurements import (
+    BLOCK_CELLS,
+    BLOCK_ROWS,
+    MeasurementBlock,
+    iter_measurement_blocks,
+    limits_config,
+)
+from csv_names import registry
+from csv_processor_v2 import Config, DataTool, ParametricData, load_bundle
+
+
+@dataclass
+class MergeTask:
+    """Công việc của một process: đọc một log và ghi các row group của nó"""
+
+    source: int
+    file_path: str
+    output_dir: str
+    # Cột trong log (vị trí trong data) -> cột trong schema chung
+    source_columns: List[int]
+    target_columns: List[int]
+    width: int
+    config: Config
+    dtype: str
+    compress: bool
+    block_rows: int
+    # Số row mỗi row group (None: row_group_rows theo số cột của schema chung)
+    group_rows: Optional[int] = None
+
+
+def merge_schema(data_tools: Iterable[DataTool]) -> Tuple[DataTool, List[tuple]]:
+    """
+    Schema chung của các log: DataTool (hợp các parametric) và với mỗi log,
+    (cột trong log, cột trong schema chung); tên trùng trong một log: cột đầu tiên
+    """
+    data_tools = list(data_tools)
+    first = data_tools[0] if data_tools else DataTool()
+    union = DataTool(
+        parametric_index=first.parametric_index,
+        key_row_index=first.key_row_index,
+        limit_row_indices=dict(first.limit_row_indices),
+    )
+    positions: Dict[str, int] = {}
+    mappings = []
+    for data_tool in data_tools:
+        source_columns: List[int] = []
+        target_columns: List[int] = []
+        mapped = set()
+        for column, param in enumerate(data_tool.data):
+            if param.name not in positions:
+                positions[param.name] = len(union.data)
+                union.data.append(ParametricData(limit=param.limit, name=param.name))
+            if param.name in mapped:
+                continue
+            mapped.add(param.name)
+            source_columns.append(column)
+            target_columns.append(positions[param.name])
+        mappings.append((source_columns, target_columns))
+    union.total_params = len(union.data)
+    union.key_ids = registry.ids(param.name for param in union.data)
+    return union, mappings
+
+
+def ingest_log(task: MergeTask) -> List[Dict]:
+    """Đọc các row đo của một log, ghi theo schema chung (chạy trong process con)"""
+    data_tool = load_bundle(task.file_path, limits_config(task.config))
+    source_columns = np.array(task.source_columns, dtype=np.int64)
+    target_columns = np.array(task.target_columns, dtype=np.int64)
+    block_rows = max(1, min(task.block_rows, BLOCK_CELLS // max(task.width, 1)))
+
+    def aligned_blocks():
+        blocks = iter_measurement_blocks(
+            task.file_path, data_tool, task.config, block_rows
+        )
+        for block in blocks:
+            values = np.full((len(block.serials), task.width), np.nan)
+            values[:, target_columns] = block.values[:, source_columns]
+            yield MeasurementBlock(block.row_indices, block.serials, values)
+
+    row_groups = []
+    group_rows = task.group_rows or row_group_rows(task.width)
+    for index, aligned in enumerate(iter_row_groups(aligned_blocks(), group_rows)):
+        name = f"s{task.source:04d}_rg{index:05d}"
+        group = write_row_group(
+            task.output_dir, name, aligned, task.dtype, task.compress
+        )
+        group["source"] = task.source
+        row_groups.append(group)
+    return row_groups
+
+
+def merge_logs(
+    paths: Iterable[str],
+    output_dir: str,
+    config: Optional[Config] = None,
+    dtype: str = "float64",
+    compress: bool = False,
+    workers: Optional[int] = None,
+    block_rows: int = BLOCK_ROWS,
+    group_rows: Optional[int] = None,
+) -> ColumnarStore:
+    """
+    Gộp các row đo của các log (file CSV hoặc thư mục columnar) vào output_dir
+    workers: số process (mặc định: số CPU, tối đa bằng số log; 1 = không song song)
+    config.retest_policy được áp dụng riêng cho từng log.
+    """
+    config = config or Config()
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"dtype không hỗ trợ: {dtype}")
+    paths = list(paths)
+    data_tools = [load_bundle(path, limits_config(config)) for path in paths]
+    union, mappings = merge_schema(data_tools)
+
+    prepare_store(output_dir)
+    tasks = [
+        MergeTask(
+            source=source,
+            file_path=path,
+            output_dir=output_dir,
+            source_columns=source_columns,
+            target_columns=target_columns,
+            width=len(union.data),
+            config=config,
+            dtype=dtype,
+            compress=compress,
+            block_rows=block_rows,
+            group_rows=group_rows,
+        )
+        for source, (path, (source_columns, target_columns)) in enumerate(
+            zip(paths, mappings)
+        )
+    ]
+
+    workers = workers or min(len(tasks), os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) <= 1:
+        results = [ingest_log(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(ingest_log, tasks))
+
+    row_groups = [group for groups in results for group in groups]
+    return write_meta(output_dir, union, row_groups, "", dtype, compress, sources=paths)
@@ -0,0 +1,108 @@
+"""
+CSV Names - Bảng tên parametric dùng chung, ánh xạ tên <-> ID số nguyên
+"""
+
+import json
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+# Định dạng file lưu registry
+REGISTRY_VERSION = 1
+
+
+class NameRegistry:
+    """
+    Bảng tên parametric dùng chung cho mọi bundle trong process
+    - Mỗi tên có một ID cố định (0, 1, 2, ... theo thứ tự được thêm)
+    - Các bundle dùng chung cùng một object str cho mỗi tên
+    ID chỉ dùng để so sánh bằng nhau (không theo thứ tự tên). Mặc định chỉ có
+    giá trị trong process hiện tại; lưu ra file (save / use_registry_file) để
+    ID giữ nguyên giữa các lần chạy.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._names: List[str] = []
+        self._ids: Dict[str, int] = {}
+        # Tên dạng bytes (từ key row) -> ID, tránh decode lại tên đã biết
+        self._byte_ids: Dict[bytes, int] = {}
+        self._lock = threading.Lock()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._ids
+
+    def name(self, name_id: int) -> str:
+        return self._names[name_id]
+
+    def _add(self, name: str) -> int:
+        name_id = self._ids.get(name)
+        if name_id is None:
+            name_id = len(self._names)
+            self._names.append(name)
+            self._ids[name] = name_id
+        return name_id
+
+    def intern(self, name: str) -> int:
+        """ID của tên (thêm mới nếu chưa có)"""
+        name_id = self._ids.get(name)
+        if name_id is None:
+            with self._lock:
+                name_id = self._add(name)
+        return name_id
+
+    def intern_bytes(self, raw: bytes) -> int:
+        """ID của tên dạng bytes utf-8 (chỉ decode khi gặp lần đầu)"""
+        name_id = self._byte_ids.get(raw)
+        if name_id is None:
+            with self._lock:
+                name_id = self._add(raw.decode("utf-8"))
+                self._byte_ids[bytes(raw)] = name_id
+        return name_id
+
+    def ids(self, names: Iterable[str]) -> array:
+        """Mảng ID (int64) của các tên"""
+        return array("q", map(self.intern, names))
+
+    def load(self, path: str):
+        """
+        Đọc các tên đã lưu. Registry rỗng: ID giữ nguyên như trong file;
+        nếu không, tên chưa có được thêm vào cuối
+        """
+        with open(path, "r", encoding="utf-8") as file:
+            content = json.load(file)
+        if content.get("version") != REGISTRY_VERSION:
+            raise ValueError(f"registry không hợp lệ: {path}")
+        with self._lock:
+            for name in content["names"]:
+                self._add(name)
+
+    def save(self, path: Optional[str] = None):
+        """Lưu các tên ra file (mặc định: path lúc khởi tạo)"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("chưa có đường dẫn để lưu registry")
+        with self._lock:
+            names = list(self._names)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"version": REGISTRY_VERSION, "names": names}, file)
+        os.replace(tmp_path, path)
+
+
+# Registry dùng chung của process (GUI, batch, server)
+registry = NameRegistry()
+
+
+def use_registry_file(path: str) -> NameRegistry:
+    """Gắn registry dùng chung với file path (đọc các tên đã lưu nếu có)"""
+    registry.path = path
+    if os.path.exists(path):
+        registry.load(path)
+    return registry
@@ -0,0 +1,219 @@
+"""
+CSV Parallel - Thống kê từng parametric trên nhiều CPU (process pool)
+
+Các row đo được chia thành các phần cố định (không phụ thuộc số worker); mỗi
+phần được tính thành một StatsAccumulator riêng và các phần được gộp theo đúng
+thứ tự => kết quả giống nhau từng bit với mọi số worker (kể cả 1).
+Mỗi phần cũng đếm số giá trị ngoài limit của từng parametric (exact_stats).
+- File CSV không nén: mỗi phần là một khoảng row (record CSV) khoảng
+  SHARD_BYTES bytes, worker tự tách row từ view của mmap (các process dùng
+  chung page cache, không copy cả khoảng row)
+- Thư mục columnar: mỗi phần là một row group, worker tự đọc row group
+- Các nguồn khác (file nén, lọc unit test lại): giải nén / lọc là tuần tự nên
+  các block được thống kê trong process hiện tại, không dùng worker
+"""
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from csv_columnar import ColumnarStore
+from csv_failures import block_failures
+from csv_index import open_mapped
+from csv_measurements import (
+    BLOCK_ROWS,
+    block_rows_for,
+    iter_measurement_blocks,
+    iter_stream_blocks,
+    limits_config,
+)
+from csv_processor_v2 import Config, DataTool, load_bundle
+from csv_reader import detect_compression
+from csv_stats import ParamStats, StatsAccumulator, limit_arrays, param_stats
+
+# Số bytes (trong file) của mỗi phần được giao cho worker: bộ nhớ của worker
+# không phụ thuộc số cột (mỗi row được đọc theo block, block_rows_for)
+SHARD_BYTES = 64 << 20
+
+# Thống kê và số giá trị fail (theo parametric) của một phần
+Partial = Tuple[StatsAccumulator, np.ndarray]
+
+
+@dataclass
+class ShardTask:
+    """Một khoảng row [start, stop) của file CSV"""
+
+    file_path: str
+    start: int
+    stop: int
+    data_tool: DataTool
+    config: Config
+    block_rows: int
+
+
+@dataclass
+class GroupTask:
+    """Row group thứ index của thư mục columnar"""
+
+    file_path: str
+    index: int
+    data_tool: DataTool
+    block_rows: int
+
+
+class _Totals:
+    """Cộng dồn thống kê và số giá trị fail của các block"""
+
+    def __init__(self, data_tool: DataTool):
+        self.lower, self.upper = limit_arrays(data_tool)
+        self.accumulator = StatsAccumulator(len(data_tool.data))
+        self.fails = np.zeros(len(data_tool.data), dtype=np.int64)
+
+    def add_block(self, values: np.ndarray):
+        self.accumulator.add_block(values)
+        self.fails += block_failures(values, self.lower, self.upper).sum(axis=0)
+
+    def partial(self) -> Partial:
+        return self.accumulator, self.fails
+
+
+def shard_stats(task: ShardTask) -> Partial:
+    """Thống kê các row đo trong khoảng row của task (chạy trong process con)"""
+    stream = open_mapped(task.file_path).rows_stream(task.start, task.stop)
+    totals = _Totals(task.data_tool)
+    try:
+        blocks = iter_stream_blocks(
+            stream, task.data_tool, task.config, task.block_rows, task.start
+        )
+        for block in blocks:
+            totals.add_block(block.values)
+    finally:
+        stream.close()
+    return totals.partial()
+
+
+def group_stats(task: GroupTask) -> Partial:
+    """Thống kê các row đo của một row group (chạy trong process con)"""
+    store = ColumnarStore(task.file_path)
+    totals = _Totals(task.data_tool)
+    columns = list(task.data_tool.columns)
+    for block in store.iter_group_blocks(task.index, columns, task.block_rows):
+        totals.add_block(block.values)
+    return totals.partial()
+
+
+def shard_tasks(
+    file_path: str, data_tool: DataTool, config: Config, block_rows: int
+) -> List[ShardTask]:
+    """
+    Các khoảng row sau key row, mỗi khoảng bắt đầu ở row đầu tiên từ vị trí
+    SHARD_BYTES * k (không phụ thuộc số worker)
+    """
+    bundle = open_mapped(file_path)
+    offsets = bundle.offsets
+    first = data_tool.key_row_index + 1
+    total = len(bundle)
+    if first >= total:
+        return []
+    positions = np.arange(
+        int(offsets[first]), int(offsets[total]), SHARD_BYTES, dtype=np.uint64
+    )
+    starts = np.unique(np.searchsorted(offsets[:total], positions)).tolist()
+    stops = starts[1:] + [total]
+    return [
+        ShardTask(file_path, start, stop, data_tool, config, block_rows)
+        for start, stop in zip(starts, stops)
+    ]
+
+
+def _block_partials(
+    file_path: str, data_tool: DataTool, config: Config, block_rows: int
+) -> Iterator[Partial]:
+    """Thống kê từng block (theo thứ tự block) trong process hiện tại"""
+    for block in iter_measurement_blocks(file_path, data_tool, config, block_rows):
+        totals = _Totals(data_tool)
+        totals.add_block(block.values)
+        yield totals.partial()
+
+
+def _run(pool: Optional[Executor], function, tasks: Iterable) -> Iterable:
+    """map theo thứ tự task (pool None: chạy trong process hiện tại)"""
+    if pool is None:
+        return map(function, tasks)
+    return pool.map(function, tasks)
+
+
+def parallel_totals(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    workers: Optional[int] = None,
+    block_rows: int = BLOCK_ROWS,
+) -> Partial:
+    """
+    Cộng dồn thống kê và số giá trị fail (theo parametric) của các row đo của
+    file trên workers process (mặc định: số CPU; 1 = không dùng process con,
+    kết quả giống nhau)
+    """
+    columns = len(data_tool.data)
+    result = StatsAccumulator(columns)
+    fails = np.zeros(columns, dtype=np.int64)
+    if not columns or data_tool.key_row_index < 0:
+        return result, fails
+    block_rows = block_rows_for(data_tool, block_rows)
+    workers = workers or os.cpu_count() or 1
+
+    tasks = None
+    function = shard_stats
+    all_rows = config.retest_policy == "all"
+    if all_rows and os.path.isdir(file_path):
+        groups = range(len(ColumnarStore(file_path).row_groups))
+        tasks = [GroupTask(file_path, k, data_tool, block_rows) for k in groups]
+        function = group_stats
+    elif all_rows and detect_compression(file_path) is None:
+        tasks = shard_tasks(file_path, data_tool, config, block_rows)
+
+    pool = None
+    try:
+        if tasks is None:
+            # Đọc tuần tự (vẫn theo block cố định => không phụ thuộc số worker)
+            partials = _block_partials(file_path, data_tool, config, block_rows)
+        else:
+            if workers > 1:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            partials = _run(pool, function, tasks)
+        # Gộp theo thứ tự phần => không phụ thuộc thứ tự hoàn thành của worker
+        for partial, partial_fails in partials:
+            result.merge(partial)
+            fails += partial_fails
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    return result, fails
+
+
+def parallel_accumulate(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    workers: Optional[int] = None,
+    block_rows: int = BLOCK_ROWS,
+) -> StatsAccumulator:
+    """Cộng dồn thống kê các row đo của file trên workers process"""
+    return parallel_totals(file_path, data_tool, config, workers, block_rows)[0]
+
+
+def parallel_stats(
+    file_path: str,
+    config: Optional[Config] = None,
+    workers: Optional[int] = None,
+    block_rows: int = BLOCK_ROWS,
+) -> List[ParamStats]:
+    """Đọc limit (load_bundle) và thống kê các row đo của file trên nhiều CPU"""
+    config = config or Config()
+    data_tool = load_bundle(file_path, limits_config(config))
+    accumulator = parallel_accumulate(file_path, data_tool, config, workers, block_rows)
+    return param_stats(data_tool, accumulator)
@@ -3,8 +3,27 @@ CSV Processor V2 - Dựa trên csv_tool.py với đầy đủ Config options
 """
 
 import csv
-from typing import List, Dict, Optional
-from dataclasses import dataclass, field
+import fnmatch
+import hashlib
+import io
+import operator
+import os
+import re
+import threading
+from abc import abstractmethod
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from itertools import islice, tee, zip_longest
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+from csv_index import open_mapped
+from csv_names import registry
+from csv_rename import find_renames
+from csv_reader import detect_compression, iter_filtered_rows, open_bundle_stream
 
 
 @dataclass
@@ -25,14 +44,8 @@ class LimitData:
 
     def is_different(self, other: "LimitData") -> bool:
         """Kiểm tra xem 2 LimitData có khác nhau không"""
-        if len(self.data) != len(other.data):
-            return True
-
-        for key, value in self.data.items():
-            if key not in other.data or other.data[key] != value:
-                return True
-
-        return False
+        # So sánh dict: khác số lượng, thiếu key hoặc khác giá trị đều là khác nhau
+        return self.data != other.data
 
     def get_lower(self) -> float | str:
         """Lấy giá trị lower limit"""
@@ -63,6 +76,13 @@ class RemainParametricData:
     new: ParametricData
 
 
+@dataclass
+class RenamedParametricData(RemainParametricData):
+    """Key bị xóa và key mới được ghép cặp là cùng một test đã đổi tên"""
+
+    score: float = 0.0
+
+
 @dataclass
 class DataTool:
     """Container chứa tất cả parametric data"""
@@ -70,6 +90,17 @@ class DataTool:
     parametric_index: int = -1
     total_params: int = 0
     data: List[ParametricData] = field(default_factory=list)
+    # Vị trí (row index) của key row và của từng limit row trong file
+    key_row_index: int = -1
+    limit_row_indices: Dict[str, int] = field(default_factory=dict)
+    # Hash của config + các row header/key/limit (giống nhau => data giống nhau)
+    fingerprint: str = ""
+    # ID (csv_names.registry) của tên từng phần tử trong data, cùng thứ tự
+    key_ids: array = field(default_factory=lambda: array("q"))
+    # Vị trí cột (trong file) của từng phần tử trong data, cùng thứ tự
+    columns: array = field(default_factory=lambda: array("q"))
+    # Kiểu của các giá trị đo khi đọc (thư mục columnar float32: "float32")
+    value_dtype: str = "float64"
 
 
 @dataclass
@@ -81,20 +112,235 @@ class Config:
     begin_from_parametric: bool = False
     null_values: List[str] = field(default_factory=lambda: ["N/A", "NULL", "-", ""])
     key_column: str = "key"
+    # Dừng đọc file ngay khi đã có key row và đủ các limit row trong get_columns
+    stop_after_limits: bool = False
+    # Chỉ lấy các parametric có tên khớp include_keys và không khớp exclude_keys
+    # Mỗi phần tử là tên chính xác hoặc pattern kiểu glob (vd: "RF_*")
+    include_keys: List[str] = field(default_factory=list)
+    exclude_keys: List[str] = field(default_factory=list)
+    # Ghép cặp key bị xóa / key mới có tên gần giống thành "renamed" (csv_rename)
+    detect_renames: bool = False
+    # Unit test lại nhiều lần (trùng serial) khi đọc các row đo (csv_dedup):
+    # "all" giữ tất cả, "first" / "last" lần đầu / lần cuối, "best" lần pass cuối
+    retest_policy: str = "all"
+
+
+# Các field không ảnh hưởng kết quả đọc bundle (key row / limit row)
+NON_BUNDLE_FIELDS = {"detect_renames", "retest_policy"}
+
+
+class _IndexView(Sequence):
+    """View chỉ chứa index vào danh sách của bundle, phần tử được tạo khi truy cập"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Số phần tử của view"""
+
+    @abstractmethod
+    def _item(self, position: int):
+        """Phần tử ở vị trí position (0 <= position < len)"""
+
+    @abstractmethod
+    def _slice(self, positions: slice) -> Sequence:
+        """View con theo slice"""
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._slice(index)
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("index ngoài phạm vi")
+        return self._item(index)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({list(self)!r})"
+
+
+class ParamView(_IndexView):
+    """ParametricData của một bundle theo mảng index"""
+
+    def __init__(self, items: List[ParametricData], indices: Sequence):
+        self.items = items
+        self.indices = indices
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def _item(self, position: int) -> ParametricData:
+        return self.items[self.indices[position]]
+
+    def _slice(self, positions: slice) -> "ParamView":
+        return ParamView(self.items, self.indices[positions])
+
+    def __iter__(self):
+        items = self.items
+        return (items[i] for i in self.indices)
+
+
+class PairView(_IndexView):
+    """RemainParametricData(old[i], new[j]) theo 2 mảng index song song"""
+
+    def __init__(
+        self,
+        old_items: List[ParametricData],
+        new_items: List[ParametricData],
+        old_indices: Sequence,
+        new_indices: Sequence,
+    ):
+        self.old_items = old_items
+        self.new_items = new_items
+        self.old_indices = old_indices
+        self.new_indices = new_indices
+
+    def __len__(self) -> int:
+        return len(self.new_indices)
+
+    def _item(self, position: int) -> RemainParametricData:
+        return RemainParametricData(
+            old=self.old_items[self.old_indices[position]],
+            new=self.new_items[self.new_indices[position]],
+        )
+
+    def _slice(self, positions: slice) -> "PairView":
+        return PairView(
+            self.old_items,
+            self.new_items,
+            self.old_indices[positions],
+            self.new_indices[positions],
+        )
+
+    def __iter__(self):
+        old_items = self.old_items
+        new_items = self.new_items
+        return (
+            RemainParametricData(old=old_items[i], new=new_items[j])
+            for i, j in zip(self.old_indices, self.new_indices)
+        )
+
+
+class AlignedPairs(PairView):
+    """
+    Danh sách RemainParametricData(old[i], new[i]) chỉ được tạo khi truy cập
+    Dùng cho overlap_params khi 2 bundle có cùng fingerprint
+    """
+
+    def __init__(
+        self, old_items: List[ParametricData], new_items: List[ParametricData]
+    ):
+        positions = range(len(new_items))
+        super().__init__(old_items, new_items, positions, positions)
+
+
+# Số tên được giữ lại cho mỗi loại thay đổi trong ComparisonSummary
+SUMMARY_TOP_N = 5
+
+
+@dataclass
+class ComparisonSummary:
+    """Chỉ số lượng (và tối đa top_n tên) của từng loại thay đổi"""
+
+    new_count: int = 0
+    removed_count: int = 0
+    changed_count: int = 0
+    overlap_count: int = 0
+    renamed_count: int = 0
+    top_new: List[str] = field(default_factory=list)
+    top_removed: List[str] = field(default_factory=list)
+    top_changed: List[str] = field(default_factory=list)
+
+    @property
+    def total_changes(self) -> int:
+        return (
+            self.new_count
+            + self.removed_count
+            + self.changed_count
+            + self.renamed_count
+        )
+
+
+class _LazyComparison:
+    """
+    Chạy compare_views() một lần khi danh sách chi tiết được truy cập lần đầu
+    Thứ tự: (new, removed, changed, overlap, renamed)
+    """
+
+    def __init__(
+        self, old_data: "DataTool", new_data: "DataTool", detect_renames: bool = False
+    ):
+        self.old_data = old_data
+        self.new_data = new_data
+        self.detect_renames = detect_renames
+        self._views: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def get(self, index: int) -> Sequence:
+        with self._lock:
+            if self._views is None:
+                views = compare_views(self.old_data, self.new_data)
+                if self.detect_renames:
+                    self._views = split_renames(*views)
+                else:
+                    self._views = views + ([],)
+            return self._views[index]
+
+
+class LazyList(_IndexView):
+    """Một trong các view kết quả so sánh, index chỉ được tính khi được dùng"""
+
+    def __init__(self, details: _LazyComparison, index: int):
+        self.details = details
+        self.index = index
+
+    def __len__(self) -> int:
+        return len(self.details.get(self.index))
+
+    def _item(self, position: int):
+        return self.details.get(self.index)[position]
+
+    def _slice(self, positions: slice) -> Sequence:
+        return self.details.get(self.index)[positions]
+
+    def __iter__(self):
+        return iter(self.details.get(self.index))
 
 
 @dataclass
 class ComparisonResult:
     """Kết quả so sánh"""
 
-    new_params: List[ParametricData] = field(default_factory=list)
-    removed_params: List[ParametricData] = field(default_factory=list)
-    changed_params: List[RemainParametricData] = field(default_factory=list)
-    overlap_params: List[RemainParametricData] = field(default_factory=list)
+    new_params: Sequence = field(default_factory=list)
+    removed_params: Sequence = field(default_factory=list)
+    changed_params: Sequence = field(default_factory=list)
+    overlap_params: Sequence = field(default_factory=list)
+    renamed_params: Sequence = field(default_factory=list)
     old_version: str = ""
     new_version: str = ""
     total_old_version: int = 0
     total_new_version: int = 0
+    summary: Optional[ComparisonSummary] = None
+
+    def get_summary(self) -> ComparisonSummary:
+        """Số lượng từng loại thay đổi (đếm từ danh sách nếu chưa có summary)"""
+        if self.summary is None:
+            self.summary = ComparisonSummary(
+                new_count=len(self.new_params),
+                removed_count=len(self.removed_params),
+                changed_count=len(self.changed_params),
+                overlap_count=len(self.overlap_params),
+                renamed_count=len(self.renamed_params),
+                top_new=[p.name for p in self.new_params[:SUMMARY_TOP_N]],
+                top_removed=[p.name for p in self.removed_params[:SUMMARY_TOP_N]],
+                top_changed=[c.new.name for c in self.changed_params[:SUMMARY_TOP_N]],
+            )
+        return self.summary
 
 
 def remove_element_at(lst: List, index: int) -> List:
@@ -107,12 +353,56 @@ def remove_element_at(lst: List, index: int) -> List:
     return lst
 
 
+def _compile_key_patterns(patterns: List[str]):
+    """Tách tên chính xác (set) và các pattern glob (gộp thành một regex)"""
+    exact = set()
+    globs = []
+    for pattern in patterns:
+        if any(c in pattern for c in "*?["):
+            globs.append(fnmatch.translate(pattern))
+        else:
+            exact.add(pattern)
+    regex = re.compile("|".join(globs)) if globs else None
+    return frozenset(exact), regex
+
+
+def build_key_matcher(config: Config) -> Optional[Callable[[str], bool]]:
+    """
+    Tạo hàm kiểm tra tên parametric theo include_keys / exclude_keys
+    Trả về None nếu không có bộ lọc nào (lấy tất cả)
+    """
+    if not config.include_keys and not config.exclude_keys:
+        return None
+
+    include_exact, include_regex = _compile_key_patterns(config.include_keys)
+    exclude_exact, exclude_regex = _compile_key_patterns(config.exclude_keys)
+    include_all = not config.include_keys
+
+    def match(name: str) -> bool:
+        if not include_all and name not in include_exact:
+            if include_regex is None or include_regex.match(name) is None:
+                return False
+        if name in exclude_exact:
+            return False
+        return exclude_regex is None or exclude_regex.match(name) is None
+
+    return match
+
+
+def new_fingerprint(config: Config):
+    """Khởi tạo hash cho fingerprint (bao gồm cả config)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr(config_key(config)).encode("utf-8"))
+    return hasher
+
+
 def read_csv_file(file_path: str) -> List[List[str]]:
     """
-    Đọc file CSV và trả về records
+    Đọc file CSV và trả về records (hỗ trợ file nén gzip/bz2/xz/zip)
     """
     try:
-        with open(file_path, "r", encoding="utf-8") as file:
+        stream = open_bundle_stream(file_path)
+        with io.TextIOWrapper(stream, encoding="utf-8") as file:
             reader = csv.reader(file, skipinitialspace=False)
             records = list(reader)
 
@@ -132,15 +422,21 @@ def convert_data(records: List[List[str]], config: Config) -> DataTool:
     """
     data_tool = DataTool()
     map_parametric_data: Dict[int, ParametricData] = {}
+    # ID (registry) của tên, cùng key và thứ tự với map_parametric_data
+    map_key_ids: Dict[int, int] = {}
     check_column_start = 0
+    key_matcher = build_key_matcher(config)
+    hasher = new_fingerprint(config)
 
     for row_index, record in enumerate(records):
         parameter_type = ""
         is_key_row = -1
         used_columns = set()
+        is_header_row = False
         for column_index, value in enumerate(record):
             # Tìm cột parametric
             if config.parametric_name_column.lower() in value.lower():
+                is_header_row = True
                 data_tool.parametric_index = column_index
                 if config.begin_from_parametric:
                     check_column_start = column_index
@@ -156,6 +452,7 @@ def convert_data(records: List[List[str]], config: Config) -> DataTool:
                 if config.key_column.lower() in value.lower():
                     is_key_row = row_index
                     parameter_type = ""
+                    data_tool.key_row_index = row_index
                 else:
                     if row_index != is_key_row and is_key_row != -1:
                         is_key_row = -1
@@ -167,6 +464,7 @@ def convert_data(records: List[List[str]], config: Config) -> DataTool:
                         if col.lower() in value.lower():
                             parameter_type = col
                             used_columns.add(col)
+                            data_tool.limit_row_indices[col] = row_index
                             break
 
                 continue
@@ -174,8 +472,13 @@ def convert_data(records: List[List[str]], config: Config) -> DataTool:
             # Xử lý key row (tên của các parametric)
             if is_key_row >= 0:
                 if column_index >= check_column_start:
-                    e = ParametricData(name=value, limit=LimitData())
+                    # Bỏ cột không khớp bộ lọc - các limit của nó không bị chuyển đổi
+                    if key_matcher is not None and not key_matcher(value):
+                        continue
+                    name_id = registry.intern(value)
+                    e = ParametricData(name=registry.name(name_id), limit=LimitData())
                     map_parametric_data[column_index] = e
+                    map_key_ids[column_index] = name_id
                     data_tool.total_params += 1
 
             # Xử lý data rows
@@ -203,12 +506,607 @@ def convert_data(records: List[List[str]], config: Config) -> DataTool:
 
                     map_parametric_data[column_index] = e
 
+        # Fingerprint: chỉ các row ảnh hưởng tới kết quả
+        if is_header_row or is_key_row >= 0 or parameter_type != "":
+            hasher.update("\x1f".join(record).encode("utf-8") + b"\x1e")
+
+    # Chuyển dict sang list
+    data_tool.data = list(map_parametric_data.values())
+    data_tool.key_ids = array("q", map_key_ids.values())
+    data_tool.columns = array("q", map_parametric_data.keys())
+    data_tool.fingerprint = hasher.hexdigest()
+
+    return data_tool
+
+
+def _read_limit_row(
+    record: List[bytes],
+    row_index: int,
+    parameter_type: str,
+    columns: Dict[int, ParametricData],
+    check_column_start: int,
+    null_values: set,
+):
+    """Đọc giá trị limit (bytes) của một row vào các cột trong columns"""
+    row_length = len(record)
+    for column_index, e in columns.items():
+        if column_index < check_column_start or column_index >= row_length:
+            continue
+        value = record[column_index]
+        if value in null_values:
+            continue
+
+        try:
+            e.limit.data[parameter_type] = float(value)
+        except ValueError:
+            raise ValueError(
+                f"invalid {parameter_type} at row {row_index + 1}, "
+                f"column {column_index + 1}: {value.decode('utf-8', 'replace')}"
+            )
+
+
+def convert_byte_rows(
+    rows: Iterable[Tuple[int, List[bytes]]], config: Config
+) -> DataTool:
+    """
+    Chuyển đổi các row bytes (row_index, row) thành DataTool
+    Kết quả giống convert_data, nhưng chỉ decode tên ở key row;
+    các row dữ liệu đo chỉ bị kiểm tra field đầu tiên
+    """
+    data_tool = DataTool()
+    map_parametric_data: Dict[int, ParametricData] = {}
+    # ID (registry) của tên, cùng key và thứ tự với map_parametric_data
+    map_key_ids: Dict[int, int] = {}
+    check_column_start = 0
+
+    parametric_needle = config.parametric_name_column.lower().encode("utf-8")
+    key_needle = config.key_column.lower().encode("utf-8")
+    limit_needles = [(col, col.lower().encode("utf-8")) for col in config.get_columns]
+    null_values = {value.encode("utf-8") for value in config.null_values}
+    key_matcher = build_key_matcher(config)
+    wanted_limits = set(config.get_columns)
+    seen_limits = set()
+    hasher = new_fingerprint(config)
+
+    for row_index, record in rows:
+        if not record:
+            continue
+
+        # Row có chứa tên cột parametric - xử lý từng cell như convert_data
+        has_parametric = parametric_needle in b"\x00".join(record).lower()
+
+        parameter_type = ""
+        is_key_row = False
+        for column_index, value in enumerate(record):
+            if has_parametric and parametric_needle in value.lower():
+                data_tool.parametric_index = column_index
+                if config.begin_from_parametric:
+                    check_column_start = column_index
+                else:
+                    check_column_start = column_index + 1
+
+            if data_tool.parametric_index < 0:
+                continue
+
+            # Cột đầu tiên - xác định loại row
+            if column_index == 0:
+                first = value.lower()
+                if key_needle in first:
+                    is_key_row = True
+                    data_tool.key_row_index = row_index
+                    seen_limits.clear()
+                else:
+                    for col, needle in limit_needles:
+                        if needle in first:
+                            parameter_type = col
+                            data_tool.limit_row_indices[col] = row_index
+                            break
+
+                # Row dữ liệu đo - bỏ qua phần còn lại của row
+                if not is_key_row and parameter_type == "" and not has_parametric:
+                    break
+
+                # Limit row: chỉ duyệt các cột đã có trong key row
+                if parameter_type != "" and not has_parametric:
+                    _read_limit_row(
+                        record,
+                        row_index,
+                        parameter_type,
+                        map_parametric_data,
+                        check_column_start,
+                        null_values,
+                    )
+                    break
+                continue
+
+            if column_index < check_column_start:
+                continue
+
+            # Xử lý key row (tên của các parametric)
+            if is_key_row:
+                # Bỏ cột không khớp bộ lọc trước khi thêm tên vào registry
+                # (registry dùng chung không bao giờ xóa tên)
+                if key_matcher is None:
+                    name_id = registry.intern_bytes(value)
+                else:
+                    name = value.decode("utf-8")
+                    if not key_matcher(name):
+                        continue
+                    # Tên được dùng chung giữa các bundle qua registry
+                    name_id = registry.intern(name)
+                map_parametric_data[column_index] = ParametricData(
+                    name=registry.name(name_id), limit=LimitData()
+                )
+                map_key_ids[column_index] = name_id
+                data_tool.total_params += 1
+
+            # Xử lý limit rows
+            elif parameter_type != "":
+                e = map_parametric_data.get(column_index)
+                if e is not None:
+                    _read_limit_row(
+                        record,
+                        row_index,
+                        parameter_type,
+                        {column_index: e},
+                        check_column_start,
+                        null_values,
+                    )
+
+        # Fingerprint: chỉ các row ảnh hưởng tới kết quả
+        if has_parametric or is_key_row or parameter_type != "":
+            hasher.update(b"\x1f".join(record) + b"\x1e")
+
+        if parameter_type != "" and map_parametric_data:
+            seen_limits.add(parameter_type)
+            if config.stop_after_limits and seen_limits >= wanted_limits:
+                break
+
     # Chuyển dict sang list
     data_tool.data = list(map_parametric_data.values())
+    data_tool.key_ids = array("q", map_key_ids.values())
+    data_tool.columns = array("q", map_parametric_data.keys())
+    data_tool.fingerprint = hasher.hexdigest()
+
+    return data_tool
+
+
+def row_prefilter(config: Config):
+    """
+    Tạo bộ lọc row theo field đầu tiên cho csv_reader.iter_filtered_rows
+    Trả về: (keep_first_field, force)
+    - keep_first_field: True nếu field đầu tiên là key row hoặc một limit row
+    - force: tên cột parametric (row chứa nó luôn được giữ lại)
+    """
+    needles = [config.key_column.lower().encode("utf-8")] + [
+        col.lower().encode("utf-8") for col in config.get_columns
+    ]
+
+    def keep_first_field(first: bytes) -> bool:
+        first = first.lower()
+        for needle in needles:
+            if needle in first:
+                return True
+        return False
+
+    return keep_first_field, config.parametric_name_column.lower().encode("utf-8")
+
+
+def read_bundle(file_path: str, config: Config) -> DataTool:
+    """
+    Đọc file CSV dạng bytes và chuyển đổi thành DataTool
+    Tương đương convert_data(read_csv_file(file_path), config);
+    các row đo không bao giờ bị tách field. File nén được giải nén dần khi đọc
+    và dừng đọc ngay khi stop_after_limits kết thúc.
+    """
+    try:
+        file = open_bundle_stream(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Không tìm thấy file: {file_path}")
+
+    with file:
+        if not file.peek(1):
+            raise ValueError("file CSV empty")
+
+        keep_first_field, force = row_prefilter(config)
+        return convert_byte_rows(
+            iter_filtered_rows(file, keep_first_field, force), config
+        )
+
+
+# Cache kết quả parse: (file, kích thước, mtime_ns, config) -> DataTool
+PARSE_CACHE_SIZE = 16
+_parse_cache: "OrderedDict[tuple, DataTool]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def config_key(config: Config) -> tuple:
+    """Khóa hashable của config (dùng cho cache)"""
+    return tuple(
+        tuple(value) if isinstance(value, list) else value
+        for value in (
+            getattr(config, f.name)
+            for f in fields(config)
+            if f.name not in NON_BUNDLE_FIELDS
+        )
+    )
+
+
+def load_bundle(file_path: str, config: Config) -> DataTool:
+    """
+    Đọc bundle qua mmap (csv_index.open_mapped), có cache theo file và config
+    File nén không map được - đọc dạng stream qua read_bundle.
+    Thư mục columnar (csv_columnar) được đọc từ meta.json.
+    Phân tích lại cùng một file với cùng config không đọc lại file.
+    DataTool trả về được dùng chung giữa các lần gọi - không được sửa đổi.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Không tìm thấy file: {file_path}")
+
+    key = (
+        os.path.realpath(file_path),
+        stat.st_size,
+        stat.st_mtime_ns,
+        config_key(config),
+    )
+    with _parse_cache_lock:
+        data_tool = _parse_cache.get(key)
+        if data_tool is not None:
+            _parse_cache.move_to_end(key)
+            return data_tool
+
+    if os.path.isdir(file_path):
+        # Thư mục columnar (csv_columnar import csv_processor_v2 nên import tại đây)
+        from csv_columnar import ColumnarStore
+
+        data_tool = ColumnarStore(file_path).data_tool(config)
+    elif stat.st_size == 0:
+        raise ValueError("file CSV empty")
+    elif detect_compression(file_path) is not None:
+        data_tool = read_bundle(file_path, config)
+    else:
+        keep_first_field, force = row_prefilter(config)
+        stream = open_mapped(file_path).stream()
+        data_tool = convert_byte_rows(
+            iter_filtered_rows(stream, keep_first_field, force), config  # type: ignore
+        )
 
+    with _parse_cache_lock:
+        _parse_cache[key] = data_tool
+        while len(_parse_cache) > PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
     return data_tool
 
 
+def key_ids(data_tool: DataTool) -> array:
+    """ID tên của các phần tử trong data_tool (tạo mới nếu DataTool chưa có)"""
+    if len(data_tool.key_ids) == len(data_tool.data):
+        return data_tool.key_ids
+    return registry.ids(p.name for p in data_tool.data)
+
+
+def aligned_key_span(old_keys: Sequence, new_keys: Sequence) -> Tuple[int, int]:
+    """
+    Độ dài phần đầu (prefix) và phần cuối (suffix) có key trùng nhau theo vị trí
+    Key là ID số nguyên - so sánh cả mảng bằng numpy
+    """
+    if old_keys == new_keys:
+        return len(old_keys), 0
+
+    old = np.asarray(old_keys, dtype=np.int64)
+    new = np.asarray(new_keys, dtype=np.int64)
+    shortest = min(len(old), len(new))
+    mismatch = np.flatnonzero(old[:shortest] != new[:shortest])
+    prefix = int(mismatch[0]) if len(mismatch) else shortest
+
+    rest = shortest - prefix
+    old_tail = old[len(old) - rest :][::-1]
+    new_tail = new[len(new) - rest :][::-1]
+    mismatch = np.flatnonzero(old_tail != new_tail)
+    suffix = int(mismatch[0]) if len(mismatch) else rest
+
+    return prefix, suffix
+
+
+def aligned_span(
+    old_items: List[ParametricData], new_items: List[ParametricData]
+) -> Tuple[int, int]:
+    """
+    Độ dài phần đầu (prefix) và phần cuối (suffix) có tên trùng nhau theo vị trí
+    Key row giống hệt nhau: trả về (len, 0) sau một lần so sánh mảng
+    """
+    return aligned_key_span(
+        registry.ids(p.name for p in old_items),
+        registry.ids(p.name for p in new_items),
+    )
+
+
+_END = object()
+
+
+def _merge_join(
+    old_items: Iterable, new_items: Iterable, key: Callable
+) -> Iterator[tuple]:
+    """
+    Ghép 2 dãy đã sắp xếp tăng dần theo key bằng 2 con trỏ (bộ nhớ O(1))
+    Trả về (old, new): new=None nếu key chỉ có ở old, old=None nếu chỉ có ở new
+    """
+    old_iter = iter(old_items)
+    new_iter = iter(new_items)
+    old = next(old_iter, _END)
+    new = next(new_iter, _END)
+
+    while old is not _END and new is not _END:
+        old_key = key(old)
+        new_key = key(new)
+        if old_key == new_key:
+            yield old, new
+            old = next(old_iter, _END)
+            new = next(new_iter, _END)
+        elif old_key < new_key:
+            yield old, None
+            old = next(old_iter, _END)
+        else:
+            yield None, new
+            new = next(new_iter, _END)
+
+    while old is not _END:
+        yield old, None
+        old = next(old_iter, _END)
+    while new is not _END:
+        yield None, new
+        new = next(new_iter, _END)
+
+
+def _strictly_increasing(keys: Sequence, start: int, end: int) -> bool:
+    """keys[start:end] tăng dần nghiêm ngặt (một lần duyệt, không copy)"""
+    current, following = tee(islice(keys, start, end))
+    next(following, None)
+    return all(map(operator.lt, current, following))
+
+
+def _merge_middle(
+    old_keys: Sequence,
+    new_keys: Sequence,
+    start: int,
+    old_end: int,
+    new_end: int,
+) -> Iterator[Tuple[Optional[int], Optional[int]]]:
+    """Merge-join 2 con trỏ của match_middle (key 2 bên đều tăng dần)"""
+    removed = array("q")
+    i = j = start
+    while i < old_end and j < new_end:
+        old_key = old_keys[i]
+        new_key = new_keys[j]
+        if old_key == new_key:
+            yield i, j
+            i += 1
+            j += 1
+        elif old_key < new_key:
+            removed.append(i)
+            i += 1
+        else:
+            yield None, j
+            j += 1
+    removed.extend(range(i, old_end))
+    for j in range(j, new_end):
+        yield None, j
+    for i in removed:
+        yield i, None
+
+
+def _map_middle(
+    old_keys: Sequence,
+    new_keys: Sequence,
+    start: int,
+    old_end: int,
+    new_end: int,
+) -> Iterator[Tuple[Optional[int], Optional[int]]]:
+    """Ghép cặp của match_middle bằng map key -> index của old (key bất kỳ)"""
+    old_map = dict(zip(old_keys[start:old_end], range(start, old_end)))
+    for j, key in zip(range(start, new_end), new_keys[start:new_end]):
+        yield old_map.pop(key, None), j
+    for i in old_map.values():
+        yield i, None
+
+
+def match_middle(
+    old_keys: Sequence,
+    new_keys: Sequence,
+    start: int,
+    old_end: int,
+    new_end: int,
+) -> Iterator[Tuple[Optional[int], Optional[int]]]:
+    """
+    Ghép cặp index của phần giữa old_keys[start:old_end] / new_keys[start:new_end]
+    Trả về (i, j); (None, j): key mới; (i, None): key bị xóa
+    Thứ tự: theo new_keys, sau đó các key bị xóa theo thứ tự old_keys.
+    Key 2 bên đều tăng dần: merge-join 2 con trỏ, chỉ giữ index các key bị xóa;
+    nếu không: map key -> index của old.
+    """
+    if _strictly_increasing(old_keys, start, old_end) and _strictly_increasing(
+        new_keys, start, new_end
+    ):
+        return _merge_middle(old_keys, new_keys, start, old_end, new_end)
+    return _map_middle(old_keys, new_keys, start, old_end, new_end)
+
+
+class _MiddleNames(Sequence):
+    """Tên của items[start:end] (index tính từ 0), không tạo list tên"""
+
+    def __init__(self, items: List[ParametricData], start: int, end: int):
+        self.items = items
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, index):
+        return self.items[self.start + index].name
+
+    def __iter__(self) -> Iterator[str]:
+        names = map(operator.attrgetter("name"), self.items)
+        return islice(names, self.start, self.end)
+
+
+def match_middle_keys(
+    old_data: DataTool,
+    new_data: DataTool,
+    old_keys: array,
+    new_keys: array,
+    start: int,
+    old_end: int,
+    new_end: int,
+) -> Iterator[Tuple[Optional[int], Optional[int]]]:
+    """
+    match_middle cho phần giữa của 2 DataTool (old_keys / new_keys: key_ids)
+    ID của registry theo thứ tự gặp lần đầu, không theo thứ tự tên: tên của
+    phần giữa 2 bên đều tăng dần thì merge-join theo tên, nếu không thì ghép
+    theo ID (map số nguyên -> index, chỉ trên phần giữa của mảng ID).
+    """
+    if start == old_end and start == new_end:
+        return
+    old_names = _MiddleNames(old_data.data, start, old_end)
+    new_names = _MiddleNames(new_data.data, start, new_end)
+    if _strictly_increasing(old_names, 0, len(old_names)) and _strictly_increasing(
+        new_names, 0, len(new_names)
+    ):
+        pairs = _merge_middle(old_names, new_names, 0, len(old_names), len(new_names))
+        for i, j in pairs:
+            yield (
+                None if i is None else start + i,
+                None if j is None else start + j,
+            )
+        return
+    yield from _map_middle(old_keys, new_keys, start, old_end, new_end)
+
+
+def compare_indices(old_data: DataTool, new_data: DataTool) -> tuple:
+    """
+    So sánh 2 DataTool, chỉ trả về index vào old_data.data / new_data.data
+    Trả về: (new_idx, removed_idx, changed_old, changed_new, overlap_old, overlap_new)
+    - new_idx: index (trong new) của các key mới
+    - removed_idx: index (trong old) của các key bị xóa
+    - changed_old/changed_new: cặp index của các key thay đổi giá trị limit
+    - overlap_old/overlap_new: cặp index của các key không thay đổi
+
+    Phần đầu/cuối có cùng tên theo vị trí được so sánh trực tiếp theo vị trí,
+    chỉ phần khác nhau ở giữa mới dùng map theo tên.
+
+    Time Complexity: O(n + m) where n = len(old_data), m = len(new_data)
+    Space Complexity: O(n)
+    """
+    new_idx = array("q")
+    removed_idx = array("q")
+    changed_old = array("q")
+    changed_new = array("q")
+    overlap_old = array("q")
+    overlap_new = array("q")
+
+    old_items = old_data.data
+    new_items = new_data.data
+    old_keys = key_ids(old_data)
+    new_keys = key_ids(new_data)
+    prefix, suffix = aligned_key_span(old_keys, new_keys)
+    old_end = len(old_items) - suffix
+    new_end = len(new_items) - suffix
+
+    def compare_aligned(old_start: int, new_start: int, count: int):
+        for offset in range(count):
+            i = old_start + offset
+            j = new_start + offset
+            if old_items[i].limit.data != new_items[j].limit.data:
+                changed_old.append(i)
+                changed_new.append(j)
+            else:
+                overlap_old.append(i)
+                overlap_new.append(j)
+
+    # Phần đầu - so sánh theo vị trí
+    compare_aligned(0, 0, prefix)
+
+    # Phần giữa - ghép cặp theo tên (merge-join nếu đã tăng dần, nếu không dùng map)
+    middle = match_middle_keys(
+        old_data, new_data, old_keys, new_keys, prefix, old_end, new_end
+    )
+    for i, j in middle:
+        if j is None:
+            # Key bị xóa - không có trong new_data
+            removed_idx.append(i)
+        elif i is None:
+            # Key mới - không có trong old_data
+            new_idx.append(j)
+        elif old_items[i].limit.is_different(new_items[j].limit):
+            # Có thay đổi giá trị
+            changed_old.append(i)
+            changed_new.append(j)
+        else:
+            # Không thay đổi
+            overlap_old.append(i)
+            overlap_new.append(j)
+
+    # Phần cuối - so sánh theo vị trí
+    compare_aligned(old_end, new_end, suffix)
+
+    return new_idx, removed_idx, changed_old, changed_new, overlap_old, overlap_new
+
+
+def compare_views(old_data: DataTool, new_data: DataTool) -> tuple:
+    """
+    Giống compare() nhưng trả về các view theo index (phần tử tạo khi truy cập)
+    Trả về: (new_params, removed_params, changed_params, overlap_params)
+    """
+    new_idx, removed_idx, changed_old, changed_new, overlap_old, overlap_new = (
+        compare_indices(old_data, new_data)
+    )
+    old_items = old_data.data
+    new_items = new_data.data
+    return (
+        ParamView(new_items, new_idx),
+        ParamView(old_items, removed_idx),
+        PairView(old_items, new_items, changed_old, changed_new),
+        PairView(old_items, new_items, overlap_old, overlap_new),
+    )
+
+
+def split_renames(
+    new_params: ParamView,
+    removed_params: ParamView,
+    changed_params: PairView,
+    overlap_params: PairView,
+) -> tuple:
+    """
+    Tách các cặp đổi tên (csv_rename.find_renames) ra khỏi new/removed
+    Trả về: (new_params, removed_params, changed_params, overlap_params, renamed)
+    """
+    matches = find_renames(removed_params, new_params)
+    renamed = [
+        RenamedParametricData(old=removed_params[i], new=new_params[j], score=score)
+        for i, j, score in matches
+    ]
+    matched_removed = {i for i, _, _ in matches}
+    matched_new = {j for _, j, _ in matches}
+
+    def without(view: ParamView, positions: set) -> ParamView:
+        if not positions:
+            return view
+        indices = array(
+            "q", (k for pos, k in enumerate(view.indices) if pos not in positions)
+        )
+        return ParamView(view.items, indices)
+
+    return (
+        without(new_params, matched_new),
+        without(removed_params, matched_removed),
+        changed_params,
+        overlap_params,
+        renamed,
+    )
+
+
 def compare(old_data: DataTool, new_data: DataTool) -> tuple:
     """
     So sánh 2 DataTool một cách tối ưu
@@ -217,45 +1115,201 @@ def compare(old_data: DataTool, new_data: DataTool) -> tuple:
     - removed_params: Các parametric keys bị xóa
     - changed_params: Các parametric keys có thay đổi giá trị limit
     - overlap_params: Các parametric keys không thay đổi (giữ nguyên)
+    """
+    return tuple(list(view) for view in compare_views(old_data, new_data))
 
-    Time Complexity: O(n + m) where n = len(old_data), m = len(new_data)
-    Space Complexity: O(n)
+
+def summarize(
+    old_data: DataTool, new_data: DataTool, top_n: int = 0
+) -> ComparisonSummary:
+    """
+    Đếm số key mới / bị xóa / thay đổi / giữ nguyên mà không tạo object cho từng key
+    top_n: lấy thêm tối đa top_n tên đầu tiên của mỗi loại (theo thứ tự của compare)
     """
-    new_params: List[ParametricData] = []
-    removed_params: List[ParametricData] = []
-    changed_params: List[RemainParametricData] = []
-    overlap_params: List[RemainParametricData] = []
+    summary = ComparisonSummary()
+    if old_data.fingerprint and old_data.fingerprint == new_data.fingerprint:
+        summary.overlap_count = len(new_data.data)
+        return summary
 
-    # Tạo map của old_data để lookup O(1)
-    old_map: Dict[str, ParametricData] = {old.name: old for old in old_data.data}
+    old_items = old_data.data
+    new_items = new_data.data
+    old_keys = key_ids(old_data)
+    new_keys = key_ids(new_data)
+    prefix, suffix = aligned_key_span(old_keys, new_keys)
+    old_end = len(old_items) - suffix
+    new_end = len(new_items) - suffix
 
-    # Duyệt qua new_data một lần - O(m)
-    for new_param in new_data.data:
-        old_param = old_map.get(new_param.name)
+    def count_aligned(old_start: int, new_start: int, count: int):
+        for old_param, new_param in zip(
+            old_items[old_start : old_start + count],
+            new_items[new_start : new_start + count],
+        ):
+            if old_param.limit.data != new_param.limit.data:
+                if summary.changed_count < top_n:
+                    summary.top_changed.append(new_param.name)
+                summary.changed_count += 1
+            else:
+                summary.overlap_count += 1
 
-        if old_param is None:
-            # Key mới - không có trong old_data
-            new_params.append(new_param)
+    count_aligned(0, 0, prefix)
+
+    middle = match_middle_keys(
+        old_data, new_data, old_keys, new_keys, prefix, old_end, new_end
+    )
+    for i, j in middle:
+        if j is None:
+            if summary.removed_count < top_n:
+                summary.top_removed.append(old_items[i].name)
+            summary.removed_count += 1
+        elif i is None:
+            if summary.new_count < top_n:
+                summary.top_new.append(new_items[j].name)
+            summary.new_count += 1
+        elif old_items[i].limit.data != new_items[j].limit.data:
+            if summary.changed_count < top_n:
+                summary.top_changed.append(new_items[j].name)
+            summary.changed_count += 1
         else:
-            # Key tồn tại trong cả old và new
-            if old_param.limit.is_different(new_param.limit):
-                # Có thay đổi giá trị
-                changed_params.append(
-                    RemainParametricData(old=old_param, new=new_param)
-                )
-            else:
-                # Không thay đổi
-                overlap_params.append(
-                    RemainParametricData(old=old_param, new=new_param)
-                )
+            summary.overlap_count += 1
+
+    count_aligned(old_end, new_end, suffix)
+    return summary
+
+
+@dataclass
+class Difference:
+    """Khác biệt đầu tiên tìm thấy giữa 2 bundle"""
+
+    kind: str  # "added" / "removed" / "changed"
+    name: str
+
+
+@dataclass
+class DiffRecord:
+    """Một key trong kết quả so sánh dạng stream (xem iter_diff)"""
+
+    kind: str  # "added" / "removed" / "changed" / "unchanged"
+    name: str
+    old: Optional[ParametricData] = None
+    new: Optional[ParametricData] = None
+
+
+def iter_diff(
+    old_data: DataTool, new_data: DataTool, include_unchanged: bool = False
+) -> Iterator[DiffRecord]:
+    """
+    So sánh 2 DataTool và trả về từng DiffRecord ngay khi xác định được
+    Thứ tự cố định (giống compare()):
+    - phần đầu cùng tên theo vị trí
+    - phần giữa theo thứ tự của new_data (added / changed / unchanged)
+    - các key bị xóa theo thứ tự của old_data
+    - phần cuối cùng tên theo vị trí
+    Phần giữa được ghép cặp theo tên bằng match_middle_keys.
+    """
+    old_items = old_data.data
+    new_items = new_data.data
+    if old_data.fingerprint and old_data.fingerprint == new_data.fingerprint:
+        if include_unchanged:
+            for old_param, new_param in zip(old_items, new_items):
+                yield DiffRecord("unchanged", new_param.name, old_param, new_param)
+        return
+
+    old_keys = key_ids(old_data)
+    new_keys = key_ids(new_data)
+    prefix, suffix = aligned_key_span(old_keys, new_keys)
+    old_end = len(old_items) - suffix
+    new_end = len(new_items) - suffix
+
+    def diff_aligned(old_start: int, new_start: int, count: int):
+        for offset in range(count):
+            old_param = old_items[old_start + offset]
+            new_param = new_items[new_start + offset]
+            if old_param.limit.data != new_param.limit.data:
+                yield DiffRecord("changed", new_param.name, old_param, new_param)
+            elif include_unchanged:
+                yield DiffRecord("unchanged", new_param.name, old_param, new_param)
+
+    yield from diff_aligned(0, 0, prefix)
+
+    middle = match_middle_keys(
+        old_data, new_data, old_keys, new_keys, prefix, old_end, new_end
+    )
+    for i, j in middle:
+        if j is None:
+            old_param = old_items[i]
+            yield DiffRecord("removed", old_param.name, old_param, None)
+            continue
+        new_param = new_items[j]
+        if i is None:
+            yield DiffRecord("added", new_param.name, None, new_param)
+            continue
+        old_param = old_items[i]
+        if old_param.limit.data != new_param.limit.data:
+            yield DiffRecord("changed", new_param.name, old_param, new_param)
+        elif include_unchanged:
+            yield DiffRecord("unchanged", new_param.name, old_param, new_param)
+
+    yield from diff_aligned(old_end, new_end, suffix)
+
+
+def iter_joined_diff(
+    pairs: Iterable[tuple], include_unchanged: bool = False
+) -> Iterator[DiffRecord]:
+    """Chuyển các cặp (old, new) của _merge_join thành DiffRecord"""
+    for old_param, new_param in pairs:
+        if old_param is None:
+            yield DiffRecord("added", new_param.name, None, new_param)
+        elif new_param is None:
+            yield DiffRecord("removed", old_param.name, old_param, None)
+        elif old_param.limit.data != new_param.limit.data:
+            yield DiffRecord("changed", new_param.name, old_param, new_param)
+        elif include_unchanged:
+            yield DiffRecord("unchanged", new_param.name, old_param, new_param)
 
-            # Đánh dấu đã xử lý
-            del old_map[new_param.name]
 
-    # Những key còn lại trong old_map là các key bị xóa - O(remaining)
-    removed_params = list(old_map.values())
+def first_difference(old_data: DataTool, new_data: DataTool) -> Optional[Difference]:
+    """
+    Tìm khác biệt đầu tiên (theo thứ tự của iter_diff), dừng ngay khi tìm thấy
+    Trả về None nếu 2 DataTool giống nhau
+    """
+    for record in iter_diff(old_data, new_data):
+        return Difference(record.kind, record.name)
+    return None
+
+
+def first_stream_difference(
+    old_params: Iterable[ParametricData], new_params: Iterable[ParametricData]
+) -> Optional[Difference]:
+    """
+    Tìm khác biệt khi duyệt song song 2 dãy ParametricData (theo thứ tự cột)
+    Key có ở cả 2 bên được so sánh ngay khi bên còn lại tới key đó (tên trùng
+    ghép theo thứ tự xuất hiện) => dừng ở limit thay đổi đầu tiên; key chỉ có
+    ở một bên chỉ xác định được khi hết dãy (added trước removed).
+    """
+    pending_old: Dict[str, List[dict]] = {}
+    pending_new: Dict[str, List[dict]] = {}
+
+    def changed(param: ParametricData, own: dict, other: dict) -> bool:
+        waiting = other.get(param.name)
+        if not waiting:
+            own.setdefault(param.name, []).append(param.limit.data)
+            return False
+        data = waiting.pop(0)
+        if not waiting:
+            del other[param.name]
+        return data != param.limit.data
+
+    for old_param, new_param in zip_longest(old_params, new_params):
+        if old_param is not None and changed(old_param, pending_old, pending_new):
+            return Difference("changed", old_param.name)
+        if new_param is not None and changed(new_param, pending_new, pending_old):
+            return Difference("changed", new_param.name)
 
-    return new_params, removed_params, changed_params, overlap_params
+    for name in pending_new:
+        return Difference("added", name)
+    for name in pending_old:
+        return Difference("removed", name)
+    return None
 
 
 class CSVProcessorV2:
@@ -272,42 +1326,165 @@ class CSVProcessorV2:
             config = Config()
 
         # Đọc file 1
-        records1 = read_csv_file(file1)
         config1 = Config(
             parametric_name_column=config.parametric_name_column,
             get_columns=config.get_columns,
             begin_from_parametric=config.begin_from_parametric,
             null_values=config.null_values,
             key_column=config.key_column,
+            stop_after_limits=config.stop_after_limits,
+            include_keys=config.include_keys,
+            exclude_keys=config.exclude_keys,
         )
-        old_data = convert_data(records1, config1)
+        old_data = load_bundle(file1, config1)
 
         # Đọc file 2
-        records2 = read_csv_file(file2)
         config2 = Config(
             parametric_name_column=config.parametric_name_column,
             get_columns=config.get_columns,
             begin_from_parametric=config.begin_from_parametric,
             null_values=config.null_values,
             key_column=config.key_column,
+            stop_after_limits=config.stop_after_limits,
+            include_keys=config.include_keys,
+            exclude_keys=config.exclude_keys,
         )
-        new_data = convert_data(records2, config2)
+        new_data = load_bundle(file2, config2)
 
-        # So sánh
-        new_params, removed_params, changed_params, overlap_params = compare(
-            old_data, new_data
-        )
-        print(f"Debug: Overlap params count: {len(overlap_params)}")
+        # So sánh - chỉ đếm, danh sách chi tiết được tạo khi cần
+        summary = summarize(old_data, new_data, top_n=SUMMARY_TOP_N)
+        renamed_params: Sequence = []
+        if old_data.fingerprint and old_data.fingerprint == new_data.fingerprint:
+            # Header/key/limit giống hệt nhau - tất cả đều là overlap
+            new_params, removed_params, changed_params = [], [], []
+            overlap_params = AlignedPairs(old_data.data, new_data.data)
+        else:
+            details = _LazyComparison(old_data, new_data, config.detect_renames)
+            new_params, removed_params, changed_params, overlap_params = (
+                LazyList(details, index) for index in range(4)
+            )
+            if config.detect_renames:
+                # Ghép cặp đổi tên cần danh sách key mới / bị xóa
+                renamed_params = details.get(4)
+                summary.renamed_count = len(renamed_params)
+                summary.new_count = len(new_params)
+                summary.removed_count = len(removed_params)
+                summary.top_new = [p.name for p in new_params[:SUMMARY_TOP_N]]
+                summary.top_removed = [
+                    p.name for p in removed_params[:SUMMARY_TOP_N]
+                ]
         # Tạo kết quả
         result = ComparisonResult(
             new_params=new_params,
             removed_params=removed_params,
             changed_params=changed_params,
             overlap_params=overlap_params,
+            renamed_params=renamed_params,
             old_version=file1.split("/")[-1],
             new_version=file2.split("/")[-1],
             total_old_version=old_data.total_params,
             total_new_version=new_data.total_params,
+            summary=summary,
         )
 
         return result
+
+    @staticmethod
+    def summarize_files(
+        file1: str, file2: str, config: Optional[Config] = None, top_n: int = 0
+    ) -> ComparisonSummary:
+        """
+        Chỉ đếm số key mới / bị xóa / thay đổi / giữ nguyên của 2 files
+        (không tạo danh sách chi tiết)
+        """
+        if config is None:
+            config = Config()
+
+        old_data = load_bundle(file1, config)
+        new_data = load_bundle(file2, config)
+        return summarize(old_data, new_data, top_n=top_n)
+
+    @staticmethod
+    def has_differences(
+        file1: str, file2: str, config: Optional[Config] = None
+    ) -> Optional[Difference]:
+        """
+        Kiểm tra nhanh 2 files có khác nhau về key/limit không (dùng cho CI)
+        Các file được đọc giống process_files (config.stop_after_limits: chỉ đọc
+        tới hết phần limit), việc so sánh dừng ở khác biệt đầu tiên.
+        Với stop_after_limits, key row và limit rows của 2 file CSV không nén
+        được duyệt song song trên mmap (csv_external.iter_bundle_params) và
+        dừng ở limit thay đổi đầu tiên, không đọc hết 2 bundle.
+        Trả về Difference (truthy) hoặc None nếu không khác nhau.
+        """
+        if config is None:
+            config = Config()
+
+        check_config = Config(
+            parametric_name_column=config.parametric_name_column,
+            get_columns=config.get_columns,
+            begin_from_parametric=config.begin_from_parametric,
+            null_values=config.null_values,
+            key_column=config.key_column,
+            stop_after_limits=config.stop_after_limits,
+            include_keys=config.include_keys,
+            exclude_keys=config.exclude_keys,
+        )
+        paths = (file1, file2)
+        if check_config.stop_after_limits and all(
+            os.path.isfile(path) and detect_compression(path) is None
+            for path in paths
+        ):
+            # Import tại đây vì csv_external dùng các hàm của module này
+            from csv_external import iter_bundle_params
+
+            old_params, new_params = (
+                iter_bundle_params(path, check_config) for path in paths
+            )
+            return first_stream_difference(old_params, new_params)
+
+        old_data = load_bundle(file1, check_config)
+        new_data = load_bundle(file2, check_config)
+
+        return first_difference(old_data, new_data)
+
+    @staticmethod
+    def iter_diff(
+        file1: str,
+        file2: str,
+        config: Optional[Config] = None,
+        include_unchanged: bool = False,
+        memory_budget: Optional[int] = None,
+    ) -> Iterator[DiffRecord]:
+        """
+        So sánh 2 files và trả về từng DiffRecord (xem iter_diff)
+        Các file được đọc giống process_files (theo config.stop_after_limits).
+        memory_budget (bytes): so sánh trên đĩa với bộ nhớ giới hạn
+        (csv_external), kết quả được trả về theo thứ tự tên
+        """
+        if config is None:
+            config = Config()
+
+        diff_config = Config(
+            parametric_name_column=config.parametric_name_column,
+            get_columns=config.get_columns,
+            begin_from_parametric=config.begin_from_parametric,
+            null_values=config.null_values,
+            key_column=config.key_column,
+            stop_after_limits=config.stop_after_limits,
+            include_keys=config.include_keys,
+            exclude_keys=config.exclude_keys,
+        )
+        if memory_budget is not None:
+            # Import tại đây vì csv_external dùng các hàm của module này
+            from csv_external import external_iter_diff
+
+            yield from external_iter_diff(
+                file1, file2, diff_config, memory_budget, include_unchanged
+            )
+            return
+
+        old_data = load_bundle(file1, diff_config)
+        new_data = load_bundle(file2, diff_config)
+
+        yield from iter_diff(old_data, new_data, include_unchanged)
@@ -0,0 +1,433 @@
+"""
+CSV Quantiles - Quantile sketch (t-digest) cho từng parametric, đọc một lần với bộ
+nhớ giới hạn, gộp được giữa nhiều log / nhiều phần của log, và gợi ý limit
+"""
+
+import json
+import math
+import os
+import dataclasses
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from csv_measurements import BLOCK_ROWS, iter_measurement_blocks, limits_config
+from csv_processor_v2 import Config, DataTool, load_bundle
+from csv_stats import StatsAccumulator, limit_bounds
+
+# Độ nén của t-digest (số centroid tối đa ~ DIGEST_COMPRESSION / 2)
+DIGEST_COMPRESSION = 200
+
+# Các quantile được báo cáo
+REPORT_QUANTILES = (0.001, 0.01, 0.5, 0.99, 0.999)
+
+# Limit gợi ý mặc định: mean ± SUGGEST_SIGMA * std, hoặc quantile SUGGEST_QUANTILE
+SUGGEST_SIGMA = 6.0
+SUGGEST_QUANTILE = 0.001
+
+# Định dạng file lưu sketch
+SKETCH_VERSION = 1
+
+# Buffer giá trị của ColumnSketches (gom vào sketch của mọi cột khi đầy):
+# tối đa SKETCH_BUFFER_ROWS row và SKETCH_BUFFER_CELLS ô, tối thiểu
+# DIGEST_COMPRESSION row để chi phí sắp xếp lại centroid cũ nhỏ so với giá trị mới
+SKETCH_BUFFER_ROWS = 4096
+SKETCH_BUFFER_CELLS = 1 << 22
+
+# Các mảng của StatsAccumulator được gộp / lưu cùng sketch
+STATS_FIELDS = ("count", "mean", "m2", "min", "max")
+
+
+class TDigest:
+    """
+    t-digest (dạng merging) cho một cột: các centroid (mean, weight) đã sắp xếp
+    - Mỗi lần thêm một mảng giá trị (hoặc gộp digest khác), centroid cũ và giá
+      trị mới được sắp xếp chung rồi gom lại theo thang k1 = d/2pi * asin(2q - 1):
+      các điểm có cùng phần nguyên của k (ở giữa khoảng rank) thành một centroid
+    - Centroid ở hai đầu rất nhỏ nên p0.1 / p99.9 chính xác hơn nhiều so với
+      sketch sai số cộng (KLL) cùng bộ nhớ
+    Toàn bộ phép gom dùng NumPy, không lặp theo từng giá trị.
+    """
+
+    def __init__(self, compression: float = DIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values: np.ndarray):
+        """Thêm các giá trị (NaN bị bỏ qua)"""
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.count += len(values)
+        self._compress(
+            np.concatenate((self.means, values)),
+            np.concatenate((self.weights, np.ones(len(values)))),
+        )
+
+    def merge(self, other: "TDigest"):
+        """Gộp digest khác vào digest này"""
+        if not other.count:
+            return
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self._compress(
+            np.concatenate((self.means, other.means)),
+            np.concatenate((self.weights, other.weights)),
+        )
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind="stable")
+        means = means[order]
+        weights = weights[order]
+
+        total = weights.sum()
+        middle = (np.cumsum(weights) - weights / 2) / total
+        scale = self.compression / (2 * math.pi)
+        cluster = np.floor(scale * np.arcsin(2 * middle - 1))
+        starts = np.flatnonzero(np.diff(cluster, prepend=-math.inf))
+
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def quantiles(self, qs: Iterable[float]) -> List[Optional[float]]:
+        """Giá trị tại các quantile q (0..1), None nếu digest rỗng"""
+        qs = list(qs)
+        if not self.count:
+            return [None] * len(qs)
+        # Nội suy tuyến tính giữa tâm các centroid, hai đầu là min / max
+        centers = np.cumsum(self.weights) - self.weights / 2
+        ranks = np.concatenate(([0.0], centers, [float(self.count)]))
+        values = np.concatenate(([self.min], self.means, [self.max]))
+        targets = np.asarray(qs, dtype=np.float64) * self.count
+        return [float(value) for value in np.interp(targets, ranks, values)]
+
+    def size(self) -> int:
+        """Số centroid đang được lưu"""
+        return len(self.means)
+
+    def to_dict(self) -> dict:
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(data["compression"])
+        digest.count = data["count"]
+        if digest.count:
+            digest.min = data["min"]
+            digest.max = data["max"]
+        digest.means = np.array(data["means"], dtype=np.float64)
+        digest.weights = np.array(data["weights"], dtype=np.float64)
+        return digest
+
+
+def update_digests(digests: List[TDigest], values: np.ndarray):
+    """
+    Thêm values[rows, columns] vào digests[column] (cùng compression) một lần
+    cho mọi cột: kết quả giống digests[column].update(values[:, column]) nhưng
+    việc sắp xếp và gom centroid được làm trên cả ma trận, không lặp theo cột
+    """
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    columns = np.flatnonzero(counts)
+    if not len(columns):
+        return
+    values = values[:, columns]
+    valid = valid[:, columns]
+    targets = [digests[column] for column in columns.tolist()]
+
+    # Mỗi cột (một hàng của ma trận): các centroid cũ (thiếu thì là NaN,
+    # weight 0) rồi đến giá trị mới
+    sizes = np.array([digest.size() for digest in targets], dtype=np.int64)
+    width = int(sizes.max())
+    means = np.full((len(columns), width + len(values)), np.nan)
+    weights = np.zeros(means.shape)
+    if width:
+        cols = np.repeat(np.arange(len(columns)), sizes)
+        rows = np.arange(sizes.sum()) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        means[cols, rows] = np.concatenate([digest.means for digest in targets])
+        weights[cols, rows] = np.concatenate([digest.weights for digest in targets])
+    means[:, width:] = values.T
+    weights[:, width:] = valid.T
+
+    # Sắp xếp từng cột (NaN ở cuối), gom theo thang k1 như TDigest._compress
+    order = np.argsort(means, axis=1, kind="stable")
+    means = np.take_along_axis(means, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+    middle = (np.cumsum(weights, axis=1) - weights / 2) / weights.sum(axis=1)[:, None]
+    scale = targets[0].compression / (2 * math.pi)
+    with np.errstate(invalid="ignore"):
+        cluster = np.floor(scale * np.arcsin(2 * middle - 1))
+
+    # Duyệt lần lượt từng cột: centroid mới khi đổi cột hoặc đổi cluster
+    keep = weights > 0
+    flat_means = means[keep]
+    flat_weights = weights[keep]
+    flat_cluster = cluster[keep]
+    flat_column = np.repeat(np.arange(len(columns)), keep.sum(axis=1))
+    boundary = np.ones(len(flat_means), dtype=bool)
+    boundary[1:] = (np.diff(flat_cluster) != 0) | (np.diff(flat_column) != 0)
+    starts = np.flatnonzero(boundary)
+    merged_weights = np.add.reduceat(flat_weights, starts)
+    merged_means = np.add.reduceat(flat_means * flat_weights, starts) / merged_weights
+    splits = np.cumsum(np.bincount(flat_column[starts], minlength=len(columns)))
+
+    column_means = np.split(merged_means, splits[:-1])
+    column_weights = np.split(merged_weights, splits[:-1])
+    lows = np.fmin.reduce(values, axis=0).tolist()
+    highs = np.fmax.reduce(values, axis=0).tolist()
+    for k, count in enumerate(counts[columns].tolist()):
+        digest = targets[k]
+        digest.means = column_means[k]
+        digest.weights = column_weights[k]
+        digest.count += count
+        digest.min = min(digest.min, lows[k])
+        digest.max = max(digest.max, highs[k])
+
+
+@dataclass
+class ParamQuantiles:
+    """Quantile và limit gợi ý của một parametric"""
+
+    name: str
+    count: int
+    p0_1: Optional[float]
+    p1: Optional[float]
+    p50: Optional[float]
+    p99: Optional[float]
+    p99_9: Optional[float]
+    suggested_lower: Optional[float]
+    suggested_upper: Optional[float]
+    # Limit hiện tại của bundle (để so sánh với limit gợi ý)
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+
+class ColumnSketches:
+    """
+    Sketch + count/mean/std (StatsAccumulator) cho từng parametric theo tên
+    Gộp được với ColumnSketches của log khác (các cột được ghép theo tên).
+    """
+
+    def __init__(self, names: Iterable[str], compression: float = DIGEST_COMPRESSION):
+        self.compression = compression
+        self.names: List[str] = list(names)
+        # Tên -> cột (tên trùng: cột đầu tiên)
+        self.positions: Dict[str, int] = {}
+        for column, name in enumerate(self.names):
+            self.positions.setdefault(name, column)
+        self.sketches = [TDigest(compression) for _ in self.names]
+        self.stats = StatsAccumulator(len(self.names))
+        # Các row chưa được gom vào sketches (xem flush)
+        self._buffer: Optional[np.ndarray] = None
+        self._buffered = 0
+
+    def add_block(self, values: np.ndarray):
+        """Thêm block values[rows, columns] theo thứ tự names"""
+        self.stats.add_block(values)
+        start = 0
+        while start < len(values):
+            if self._buffer is None:
+                columns = max(len(self.names), 1)
+                rows = min(SKETCH_BUFFER_ROWS, SKETCH_BUFFER_CELLS // columns)
+                rows = max(rows, int(self.compression))
+                self._buffer = np.empty((rows, len(self.names)))
+            take = min(len(self._buffer) - self._buffered, len(values) - start)
+            self._buffer[self._buffered : self._buffered + take] = values[
+                start : start + take
+            ]
+            self._buffered += take
+            start += take
+            if self._buffered == len(self._buffer):
+                self.flush()
+
+    def flush(self):
+        """Gom các row trong buffer vào sketch của mọi cột (update_digests)"""
+        if self._buffered:
+            update_digests(self.sketches, self._buffer[: self._buffered])
+            self._buffered = 0
+
+    def _add_columns(self, names: Iterable[str]):
+        """Thêm các cột rỗng cho tên chưa có"""
+        self.flush()
+        self._buffer = None
+        columns = len(self.names)
+        for name in names:
+            if name not in self.positions:
+                self.positions[name] = len(self.names)
+                self.names.append(name)
+                self.sketches.append(TDigest(self.compression))
+        if len(self.names) == columns:
+            return
+        grown = StatsAccumulator(len(self.names))
+        for attr in STATS_FIELDS:
+            getattr(grown, attr)[:columns] = getattr(self.stats, attr)
+        self.stats = grown
+
+    def merge(self, other: "ColumnSketches"):
+        """Gộp sketch của log khác theo tên (cột chưa có được thêm vào)"""
+        other.flush()
+        self._add_columns(other.positions)
+        source = np.array(list(other.positions.values()), dtype=np.int64)
+        target = np.array(
+            [self.positions[name] for name in other.positions], dtype=np.int64
+        )
+
+        aligned = StatsAccumulator(len(self.names))
+        for attr in STATS_FIELDS:
+            getattr(aligned, attr)[target] = getattr(other.stats, attr)[source]
+        self.stats.merge(aligned)
+        for column, other_column in zip(target.tolist(), source.tolist()):
+            self.sketches[column].merge(other.sketches[other_column])
+
+    def report(
+        self,
+        limits: Optional[Dict[str, tuple]] = None,
+        sigma: Optional[float] = SUGGEST_SIGMA,
+        quantile: float = SUGGEST_QUANTILE,
+    ) -> List[ParamQuantiles]:
+        """
+        Quantile của từng parametric và limit gợi ý
+        - sigma: limit = mean ± sigma * std
+        - sigma=None: limit = quantile(quantile) .. quantile(1 - quantile)
+        limits: tên -> (lower, upper) hiện tại
+        """
+        self.flush()
+        std = self.stats.std()
+        results = []
+        for column, (name, sketch) in enumerate(zip(self.names, self.sketches)):
+            p0_1, p1, p50, p99, p99_9 = sketch.quantiles(REPORT_QUANTILES)
+            lower = upper = None
+            if sketch.count:
+                if sigma is not None and not math.isnan(std[column]):
+                    mean = float(self.stats.mean[column])
+                    lower = mean - sigma * float(std[column])
+                    upper = mean + sigma * float(std[column])
+                elif sigma is None:
+                    lower, upper = sketch.quantiles((quantile, 1.0 - quantile))
+            current = (limits or {}).get(name, (None, None))
+            results.append(
+                ParamQuantiles(
+                    name=name,
+                    count=sketch.count,
+                    p0_1=p0_1,
+                    p1=p1,
+                    p50=p50,
+                    p99=p99,
+                    p99_9=p99_9,
+                    suggested_lower=lower,
+                    suggested_upper=upper,
+                    lower=current[0],
+                    upper=current[1],
+                )
+            )
+        return results
+
+    def save(self, path: str):
+        """Lưu sketch ra file JSON (gộp lại sau bằng load + merge)"""
+        self.flush()
+        content = {
+            "version": SKETCH_VERSION,
+            "compression": self.compression,
+            "names": self.names,
+            "sketches": [sketch.to_dict() for sketch in self.sketches],
+            "stats": {
+                attr: getattr(self.stats, attr).tolist() for attr in STATS_FIELDS
+            },
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(content, file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ColumnSketches":
+        with open(path, "r", encoding="utf-8") as file:
+            content = json.load(file)
+        if content.get("version") != SKETCH_VERSION:
+            raise ValueError(f"sketch không hợp lệ: {path}")
+        sketches = cls(content["names"], content["compression"])
+        sketches.sketches = [TDigest.from_dict(data) for data in content["sketches"]]
+        for attr, values in content["stats"].items():
+            current = getattr(sketches.stats, attr)
+            setattr(sketches.stats, attr, np.array(values, dtype=current.dtype))
+        return sketches
+
+
+def bundle_limits(data_tool: DataTool) -> Dict[str, tuple]:
+    """Tên -> (lower, upper) của bundle"""
+    return {param.name: limit_bounds(param.limit) for param in data_tool.data}
+
+
+def select_params(data_tool: DataTool, names: Iterable[str]) -> DataTool:
+    """
+    Bản sao của data_tool chỉ gồm các parametric có tên trong names (giữ thứ
+    tự cột); DataTool của load_bundle được dùng chung nên không bị sửa
+    """
+    wanted = set(names)
+    keep = [k for k, param in enumerate(data_tool.data) if param.name in wanted]
+    ids = data_tool.key_ids
+    return dataclasses.replace(
+        data_tool,
+        total_params=len(keep),
+        data=[data_tool.data[k] for k in keep],
+        fingerprint="",
+        key_ids=array("q", [ids[k] for k in keep] if len(ids) else []),
+        columns=array("q", [data_tool.columns[k] for k in keep]),
+    )
+
+
+def sketch_measurements(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    compression: float = DIGEST_COMPRESSION,
+    block_rows: int = BLOCK_ROWS,
+) -> ColumnSketches:
+    """Sketch các row đo của file (một lần đọc)"""
+    sketches = ColumnSketches([param.name for param in data_tool.data], compression)
+    for block in iter_measurement_blocks(file_path, data_tool, config, block_rows):
+        sketches.add_block(block.values)
+    sketches.flush()
+    return sketches
+
+
+def bundle_quantiles(
+    file_path: str,
+    config: Optional[Config] = None,
+    names: Optional[Iterable[str]] = None,
+    sigma: Optional[float] = SUGGEST_SIGMA,
+    quantile: float = SUGGEST_QUANTILE,
+    compression: float = DIGEST_COMPRESSION,
+) -> List[ParamQuantiles]:
+    """
+    Quantile và limit gợi ý cho các parametric của file
+    names: chỉ đọc và báo cáo các cột có tên này (vd: tên của new_params);
+    retest_policy "best" cần limit của mọi cột để chọn lần pass nên vẫn đọc
+    tất cả các cột
+    """
+    config = config or Config()
+    data_tool = load_bundle(file_path, limits_config(config))
+    wanted = None if names is None else set(names)
+    if wanted is not None and config.retest_policy != "best":
+        data_tool = select_params(data_tool, wanted)
+    sketches = sketch_measurements(file_path, data_tool, config, compression)
+    results = sketches.report(bundle_limits(data_tool), sigma, quantile)
+    if wanted is not None:
+        results = [result for result in results if result.name in wanted]
+    return results
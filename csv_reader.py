@@ -0,0 +1,207 @@
+"""
+CSV Reader - Đọc CSV dạng bytes, tách trực tiếp các dòng không có dấu ngoặc kép
+"""
+
+import bz2
+import csv
+import gzip
+import lzma
+import zipfile
+from typing import BinaryIO, Callable, Iterator, List, Optional, Tuple
+
+# Kích thước mỗi lần đọc từ file (bytes)
+CHUNK_SIZE = 1 << 20
+
+QUOTE = b'"'
+
+# Magic bytes của các định dạng nén được hỗ trợ
+COMPRESSION_MAGIC = [
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bz2"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"PK\x03\x04", "zip"),
+]
+
+
+def detect_compression(file_path: str) -> Optional[str]:
+    """Xác định định dạng nén từ magic bytes (None nếu là file thường)"""
+    with open(file_path, "rb") as file:
+        head = file.read(8)
+    for magic, name in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def open_bundle_stream(file_path: str) -> BinaryIO:
+    """
+    Mở file bundle dạng binary, tự giải nén gzip/bz2/xz/zip theo magic bytes
+    Dữ liệu được giải nén dần khi đọc, không tạo file tạm.
+    Với zip: đọc file .csv đầu tiên trong archive (hoặc file đầu tiên nếu không có)
+    """
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, "rb")
+    if compression == "gzip":
+        return gzip.open(file_path, "rb")  # type: ignore
+    if compression == "bz2":
+        return bz2.open(file_path, "rb")  # type: ignore
+    if compression == "xz":
+        return lzma.open(file_path, "rb")  # type: ignore
+
+    archive = zipfile.ZipFile(file_path)
+    try:
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        if not members:
+            raise ValueError(f"file zip không có dữ liệu: {file_path}")
+        csv_members = [m for m in members if m.filename.lower().endswith(".csv")]
+        # File trong archive vẫn đọc được sau khi đóng ZipFile
+        return archive.open((csv_members or members)[0])  # type: ignore
+    finally:
+        archive.close()
+
+
+def iter_line_spans(
+    stream: BinaryIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Đọc stream theo từng chunk và trả về (data, start, end) cho từng dòng
+    - data[start:end] là nội dung dòng, không gồm "\\n" / "\\r\\n"
+    - Chỉ copy phần chứa các dòng hoàn chỉnh của mỗi chunk một lần
+    """
+    buf = bytearray(chunk_size)
+    filled = 0
+
+    while True:
+        with memoryview(buf) as view:
+            n = stream.readinto(view[filled:])
+            if not n:
+                break
+            filled += n
+
+            last_newline = buf.rfind(b"\n", 0, filled)
+            if last_newline < 0:
+                # Dòng dài hơn buffer - tăng kích thước buffer
+                if filled == len(buf):
+                    view.release()
+                    buf.extend(bytes(len(buf)))
+                continue
+
+            data = bytes(view[: last_newline + 1])
+
+        start = 0
+        while start <= last_newline:
+            newline = data.find(b"\n", start)
+            end = newline
+            if end > start and data[end - 1] == 13:
+                end -= 1
+            yield data, start, end
+            start = newline + 1
+
+        # Dời phần dư (dòng chưa hoàn chỉnh) về đầu buffer
+        rest = filled - start
+        buf[:rest] = buf[start:filled]
+        filled = rest
+
+    # Dòng cuối cùng không có "\n"
+    if filled:
+        data = bytes(buf[:filled])
+        end = filled
+        if data[end - 1] == 13:
+            end -= 1
+        yield data, 0, end
+
+
+class _LineFeeder:
+    """Cấp từng dòng text cho csv.reader khi record có dấu ngoặc kép"""
+
+    def __init__(self, spans: Iterator[Tuple[bytes, int, int]]):
+        self.spans = spans
+        self.first = ""
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if self.first:
+            line, self.first = self.first, ""
+            return line
+        # Field có xuống dòng bên trong dấu ngoặc kép - lấy thêm dòng tiếp theo
+        data, start, end = next(self.spans)
+        return data[start:end].decode("utf-8") + "\n"
+
+
+def iter_byte_rows(
+    stream: BinaryIO, delimiter: bytes = b",", chunk_size: int = CHUNK_SIZE
+) -> Iterator[List[bytes]]:
+    """
+    Đọc CSV và trả về từng row dưới dạng list các field bytes
+    - Dòng không có dấu ngoặc kép: tách trực tiếp theo delimiter, không decode
+    - Dòng có dấu ngoặc kép: fallback về csv.reader (kể cả field nhiều dòng)
+    Kết quả giống csv.reader(..., skipinitialspace=False) sau khi encode utf-8
+    """
+    for _, row in iter_filtered_rows(stream, None, None, delimiter, chunk_size):
+        yield row
+
+
+def iter_filtered_rows(
+    stream: BinaryIO,
+    keep_first_field: Optional[Callable[[bytes], bool]],
+    force: Optional[bytes] = None,
+    delimiter: bytes = b",",
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[Tuple[int, List[bytes]]]:
+    """
+    Giống iter_byte_rows nhưng chỉ tách các row cần thiết, trả về (row_index, row)
+    - keep_first_field: nhận field đầu tiên (bytes), trả về True nếu cần row này
+      (None: giữ tất cả các row)
+    - force: chuỗi bytes viết thường, row nào chứa nó (không phân biệt hoa thường)
+      thì luôn được giữ lại
+    Row không cần thiết được bỏ qua ngay sau delimiter đầu tiên, không bị tách.
+    Row có dấu ngoặc kép luôn được trả về (đã tách bằng csv.reader).
+    """
+    spans = iter_line_spans(stream, chunk_size)
+    feeder = _LineFeeder(spans)
+    reader = csv.reader(feeder, delimiter=delimiter.decode(), skipinitialspace=False)
+
+    # Vị trí khớp tiếp theo của force trong chunk hiện tại (tìm một lần cho cả chunk)
+    current = b""
+    lowered = b""
+    next_force = -1
+
+    row_index = -1
+    for data, start, end in spans:
+        row_index += 1
+
+        if data.find(QUOTE, start, end) >= 0:
+            feeder.first = data[start:end].decode("utf-8") + "\n"
+            record = next(reader, None)
+            if record is None:
+                return
+            yield row_index, [value.encode("utf-8") for value in record]
+            continue
+
+        if force is not None:
+            if data is not current:
+                current = data
+                lowered = data.lower()
+                next_force = -1
+            if next_force < start:
+                next_force = lowered.find(force, start)
+                if next_force < 0:
+                    next_force = len(data)
+            if next_force < end:
+                yield row_index, data[start:end].split(delimiter)
+                continue
+
+        if keep_first_field is not None:
+            first_end = data.find(delimiter, start, end)
+            if first_end < 0:
+                first_end = end
+            if not keep_first_field(data[start:first_end]):
+                continue
+
+        if start == end:
+            yield row_index, []
+        else:
+            yield row_index, data[start:end].split(delimiter)
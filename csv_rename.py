@@ -0,0 +1,119 @@
+"""
+CSV Rename - Ghép cặp key bị xóa / key mới có khả năng là cùng một test bị đổi tên
+"""
+
+import math
+import re
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set, Tuple
+
+# Điểm tối thiểu để coi là đổi tên (độ giống tên + điểm cộng nếu limit giống nhau)
+MIN_RENAME_SCORE = 0.7
+
+# Điểm cộng khi limit của 2 key giống hệt nhau
+LIMIT_BONUS = 0.2
+
+# Số ứng viên tốt nhất giữ lại cho mỗi key mới
+MAX_CANDIDATES = 5
+
+# Số ứng viên tối đa lấy từ inverted index cho mỗi key mới (n-gram / token
+# hiếm nhất luôn được tra, các n-gram tiếp theo chỉ khi còn trong giới hạn)
+MAX_PROBE_POSTINGS = 100
+
+TOKEN_PATTERN = re.compile(r"[a-z]+|[0-9]+")
+
+
+def name_grams(name: str, size: int = 3) -> Set[str]:
+    """Tập n-gram ký tự của tên (không phân biệt hoa thường, có dấu đầu/cuối)"""
+    text = f"^{name.lower()}$"
+    if len(text) <= size:
+        return {text}
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def name_tokens(name: str) -> Set[str]:
+    """Các token chữ / số của tên (vd: VBAT_3V3 -> #vbat, #3, #v), dùng để tra index"""
+    return {"#" + token for token in TOKEN_PATTERN.findall(name.lower())}
+
+
+def find_renames(
+    removed: Sequence, added: Sequence, min_score: float = MIN_RENAME_SCORE
+) -> List[Tuple[int, int, float]]:
+    """
+    Tìm các cặp (removed[i], added[j]) có khả năng là đổi tên
+    Phần tử cần có .name và .limit.data (ParametricData)
+    - Điểm = hệ số Dice của 2 tập n-gram + LIMIT_BONUS nếu limit giống nhau
+    - Inverted index (n-gram và token) -> các key bị xóa; với mỗi key mới chỉ
+      tra các n-gram / token hiếm nhất, tối đa MAX_PROBE_POSTINGS ứng viên
+      (tên đổi thường giữ lại phần lớn tên cũ), không duyệt removed x added
+    - Ứng viên có độ dài tên chênh lệch quá nhiều bị loại trước khi tính điểm
+    - Mỗi key chỉ được ghép một lần, ưu tiên cặp có điểm cao nhất
+    Trả về: [(i, j, score), ...] theo thứ tự j
+    """
+    if not removed or not added:
+        return []
+
+    # Độ giống tên tối thiểu (khi được cộng LIMIT_BONUS)
+    min_similarity = min_score - LIMIT_BONUS
+    if min_similarity <= 0:
+        raise ValueError("min_score phải lớn hơn LIMIT_BONUS")
+
+    removed_grams = [name_grams(param.name) for param in removed]
+    index: Dict[str, List[int]] = defaultdict(list)
+    for i, grams in enumerate(removed_grams):
+        for gram in grams | name_tokens(removed[i].name):
+            index[gram].append(i)
+
+    candidates: List[Tuple[float, int, int]] = []
+    for j, new_param in enumerate(added):
+        grams = name_grams(new_param.name)
+        # Dice >= t => số n-gram chung >= t * |A| / (2 - t)
+        min_shared = math.ceil(min_similarity * len(grams) / (2 - min_similarity))
+        present = [gram for gram in grams if gram in index]
+        if len(present) < min_shared:
+            continue
+        present += [token for token in name_tokens(new_param.name) if token in index]
+        present.sort(key=lambda gram: len(index[gram]))
+        # Dice >= t => t / (2 - t) <= |B| / |A| <= (2 - t) / t
+        shortest = len(grams) * min_similarity / (2 - min_similarity)
+        longest = len(grams) * (2 - min_similarity) / min_similarity
+
+        seen: Set[int] = set()
+        scored = []
+        new_limits = new_param.limit.data
+        budget = MAX_PROBE_POSTINGS
+        for position, gram in enumerate(present):
+            postings = index[gram]
+            if position and len(postings) > budget:
+                break
+            budget -= len(postings)
+            for i in postings:
+                if i in seen:
+                    continue
+                seen.add(i)
+                other = removed_grams[i]
+                if not shortest <= len(other) <= longest:
+                    continue
+                score = 2.0 * len(grams & other) / (len(grams) + len(other))
+                limits = removed[i].limit.data
+                if limits and limits == new_limits:
+                    score += LIMIT_BONUS
+                if score >= min_score:
+                    scored.append((score, i))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        candidates.extend((score, i, j) for score, i in scored[:MAX_CANDIDATES])
+
+    # Ghép cặp tham lam theo điểm giảm dần (thứ tự cố định khi bằng điểm)
+    candidates.sort(key=lambda item: (-item[0], item[2], item[1]))
+    used_removed: Set[int] = set()
+    used_added: Set[int] = set()
+    matches = []
+    for score, i, j in candidates:
+        if i in used_removed or j in used_added:
+            continue
+        used_removed.add(i)
+        used_added.add(j)
+        matches.append((i, j, round(score, 4)))
+
+    matches.sort(key=lambda item: item[1])
+    return matches
@@ -0,0 +1,320 @@
+"""
+CSV Sample - Thống kê gần đúng trên mẫu ngẫu nhiên các row đo (xem nhanh log lớn)
+
+- seek: chọn ngẫu nhiên các row qua row index (csv_index), chỉ đọc các row được
+  chọn - dùng cho file CSV không nén
+- reservoir: lấy mẫu đều (Algorithm R) trong một lần đọc theo block - dùng cho
+  file nén, thư mục columnar hoặc khi có lọc unit test lại (retest_policy)
+Kết quả (thống kê, histogram) kèm nửa khoảng tin cậy 95% (có hiệu chỉnh quần
+thể hữu hạn).
+"""
+
+import math
+import os
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from csv_failures import block_failures
+from csv_index import open_mapped
+from csv_measurements import (
+    BLOCK_ROWS,
+    MeasurementBlock,
+    iter_measurement_blocks,
+    limits_config,
+    measurement_row_filter,
+    records_block,
+)
+from csv_parallel import parallel_totals
+from csv_processor_v2 import Config, DataTool, load_bundle
+from csv_reader import detect_compression
+from csv_stats import ParamStats, accumulate, limit_arrays, param_stats
+
+# Số row đo mặc định của mẫu
+SAMPLE_ROWS = 10_000
+
+# z của khoảng tin cậy 95%
+Z_95 = 1.96
+
+SAMPLE_METHODS = ("auto", "seek", "reservoir")
+
+
+@dataclass
+class RowSample:
+    """Mẫu các row đo của một file, cột theo thứ tự data_tool.data"""
+
+    file_path: str
+    names: List[str]
+    row_indices: np.ndarray
+    serials: List[str]
+    values: np.ndarray
+    # Số row đo của file (ước lượng nếu method = "seek")
+    population: int
+    method: str
+
+    def __len__(self) -> int:
+        return len(self.serials)
+
+    @property
+    def fraction(self) -> float:
+        """Tỷ lệ số row trong mẫu / số row đo"""
+        return len(self) / self.population if self.population else 0.0
+
+    def histogram(self, column: int, bins: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+        """(số row ước lượng của cả file, biên) của histogram một cột"""
+        values = self.values[:, column]
+        values = values[~np.isnan(values)]
+        counts, edges = np.histogram(values, bins=bins)
+        scale = 1.0 / self.fraction if self.fraction else 0.0
+        return counts * scale, edges
+
+    def histogram_errors(
+        self, column: int, bins: int = 20
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        (số row ước lượng, nửa khoảng tin cậy 95%, biên) của histogram một cột
+        Sai số của mỗi bin: Wilson trên tỷ lệ row của bin trong mẫu (hiệu chỉnh
+        quần thể hữu hạn), nhân với số row có giá trị ước lượng của cả file.
+        Với method "seek" chưa tính sai số của số row đo ước lượng (population).
+        """
+        counts, edges = self.histogram(column, bins)
+        valid = int(np.count_nonzero(~np.isnan(self.values[:, column])))
+        errors = np.zeros(len(counts))
+        if valid and self.fraction:
+            correction = math.sqrt(max(0.0, 1.0 - self.fraction))
+            total = valid / self.fraction
+            for k, count in enumerate(counts.tolist()):
+                rate = count / total
+                errors[k] = _wilson_error(rate, valid) * correction * total
+        return counts, errors, edges
+
+
+@dataclass
+class ApproxStats:
+    """
+    Thống kê của một parametric và nửa khoảng tin cậy 95%
+    (sai số None: thống kê chính xác trên tất cả các row)
+    """
+
+    stats: ParamStats
+    mean_error: Optional[float]
+    std_error: Optional[float]
+    # Tỷ lệ giá trị ngoài limit (%)
+    fail_rate: Optional[float]
+    fail_rate_error: Optional[float]
+
+
+def reservoir_sample(
+    blocks: Iterable[MeasurementBlock], size: int, rng: np.random.Generator
+) -> Tuple[Optional[MeasurementBlock], int]:
+    """
+    Mẫu đều size row từ các block (một lần đọc), trả về (mẫu, tổng số row)
+    Mỗi row thứ t (từ 0) thay vào ô j ~ U[0, t] nếu j < size; trong một block
+    các row được xử lý cùng lúc, row sau ghi đè row trước ở cùng ô.
+    """
+    row_indices = np.empty(size, dtype=np.int64)
+    serials: List[str] = [""] * size
+    values: Optional[np.ndarray] = None
+    seen = 0
+    for block in blocks:
+        rows = len(block.serials)
+        if values is None:
+            values = np.empty((size, block.values.shape[1]))
+        # Ô còn trống: lấy trực tiếp
+        fill = max(0, min(size - seen, rows))
+        row_indices[seen : seen + fill] = block.row_indices[:fill]
+        serials[seen : seen + fill] = block.serials[:fill]
+        values[seen : seen + fill] = block.values[:fill]
+
+        if fill < rows:
+            positions = np.arange(fill, rows)
+            slots = rng.integers(0, seen + positions + 1)
+            accepted = slots < size
+            positions = positions[accepted][::-1]
+            slots = slots[accepted][::-1]
+            # Row cuối cùng cho mỗi ô
+            slots, first = np.unique(slots, return_index=True)
+            positions = positions[first]
+            row_indices[slots] = block.row_indices[positions]
+            values[slots] = block.values[positions]
+            for slot, position in zip(slots.tolist(), positions.tolist()):
+                serials[slot] = block.serials[position]
+        seen += rows
+
+    if values is None:
+        return None, 0
+    kept = min(size, seen)
+    sample = MeasurementBlock(row_indices[:kept], serials[:kept], values[:kept])
+    return sample, seen
+
+
+def seek_sample(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    size: int,
+    rng: np.random.Generator,
+) -> Tuple[Optional[MeasurementBlock], int]:
+    """
+    Chọn ngẫu nhiên size row sau key row qua row index và chỉ đọc các row đó
+    Row index là index của record CSV (field có xuống dòng không bị tách), giống
+    row_indices của reservoir_sample
+    Trả về (mẫu, số row đo ước lượng theo tỷ lệ row đo trong các row đã chọn)
+    """
+    bundle = open_mapped(file_path)
+    start = data_tool.key_row_index + 1
+    candidates = len(bundle) - start
+    if candidates <= 0 or not len(data_tool.columns):
+        return None, 0
+    chosen = min(size, candidates)
+    picked = np.sort(rng.choice(candidates, chosen, replace=False)) + start
+
+    is_measurement = measurement_row_filter(config)
+    limit_rows = set(data_tool.limit_row_indices.values())
+    row_indices: List[int] = []
+    records: List[List[bytes]] = []
+    for row_index in picked.tolist():
+        if row_index in limit_rows:
+            continue
+        record = bundle.row(row_index)
+        if not any(record) or not is_measurement(record[0]):
+            continue
+        row_indices.append(row_index)
+        records.append(record)
+    population = round(candidates * len(records) / chosen)
+    if not records:
+        return None, population
+
+    null_values = [value.encode("utf-8") for value in config.null_values]
+    columns = list(data_tool.columns)
+    return records_block(row_indices, records, columns, null_values), population
+
+
+def sample_measurements(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    size: int = SAMPLE_ROWS,
+    seed: Optional[int] = None,
+    method: str = "auto",
+) -> RowSample:
+    """
+    Mẫu ngẫu nhiên các row đo của file
+    method "auto": seek nếu là file CSV không nén và không lọc unit test lại
+    """
+    if method not in SAMPLE_METHODS:
+        raise ValueError(f"method không hợp lệ: {method}")
+    if method == "auto":
+        seekable = (
+            os.path.isfile(file_path)
+            and detect_compression(file_path) is None
+            and config.retest_policy == "all"
+        )
+        method = "seek" if seekable else "reservoir"
+
+    rng = np.random.default_rng(seed)
+    if method == "seek":
+        block, population = seek_sample(file_path, data_tool, config, size, rng)
+    else:
+        blocks = iter_measurement_blocks(file_path, data_tool, config, BLOCK_ROWS)
+        block, population = reservoir_sample(blocks, size, rng)
+
+    names = [param.name for param in data_tool.data]
+    if block is None:
+        block = MeasurementBlock(
+            np.empty(0, dtype=np.int64), [], np.empty((0, len(names)))
+        )
+    return RowSample(
+        file_path=file_path,
+        names=names,
+        row_indices=block.row_indices,
+        serials=block.serials,
+        values=block.values,
+        population=population,
+        method=method,
+    )
+
+
+def _wilson_error(rate: float, count: int) -> float:
+    """Nửa khoảng tin cậy Wilson của tỷ lệ (khác 0 cả khi rate = 0)"""
+    z2 = Z_95 * Z_95
+    spread = rate * (1 - rate) / count + z2 / (4 * count * count)
+    return Z_95 * math.sqrt(spread) / (1 + z2 / count)
+
+
+def approx_stats(sample: RowSample, data_tool: DataTool) -> List[ApproxStats]:
+    """Thống kê các parametric trên mẫu kèm sai số (khoảng tin cậy 95%)"""
+    columns = len(data_tool.data)
+    stats = param_stats(data_tool, accumulate([sample.values], columns))
+    lower, upper = limit_arrays(data_tool)
+    fails = block_failures(sample.values, lower, upper).sum(axis=0)
+    # Hiệu chỉnh quần thể hữu hạn (mẫu là toàn bộ file => sai số 0)
+    correction = math.sqrt(max(0.0, 1.0 - sample.fraction))
+    return _with_errors(stats, fails, lower, upper, correction)
+
+
+def _with_errors(
+    stats: List[ParamStats],
+    fails: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    correction: Optional[float],
+) -> List[ApproxStats]:
+    """Tỷ lệ fail và sai số (correction None: không có sai số)"""
+    results = []
+    for k, param in enumerate(stats):
+        count = param.count
+        mean_error = std_error = fail_rate = fail_rate_error = None
+        if correction is not None and param.std is not None and count > 1:
+            mean_error = Z_95 * param.std / math.sqrt(count) * correction
+            std_error = Z_95 * param.std / math.sqrt(2 * (count - 1)) * correction
+        if count and not (np.isnan(lower[k]) and np.isnan(upper[k])):
+            rate = float(fails[k]) / count
+            fail_rate = 100.0 * rate
+            if correction is not None:
+                fail_rate_error = 100.0 * _wilson_error(rate, count) * correction
+        results.append(
+            ApproxStats(
+                stats=param,
+                mean_error=mean_error,
+                std_error=std_error,
+                fail_rate=fail_rate,
+                fail_rate_error=fail_rate_error,
+            )
+        )
+    return results
+
+
+def bundle_sample_stats(
+    file_path: str,
+    config: Optional[Config] = None,
+    size: int = SAMPLE_ROWS,
+    seed: Optional[int] = None,
+    method: str = "auto",
+) -> Tuple[RowSample, List[ApproxStats]]:
+    """Đọc limit (load_bundle), lấy mẫu các row đo và thống kê gần đúng"""
+    config = config or Config()
+    data_tool = load_bundle(file_path, limits_config(config))
+    sample = sample_measurements(file_path, data_tool, config, size, seed, method)
+    return sample, approx_stats(sample, data_tool)
+
+
+def exact_stats(
+    file_path: str,
+    config: Optional[Config] = None,
+    block_rows: int = BLOCK_ROWS,
+    workers: Optional[int] = None,
+) -> List[ApproxStats]:
+    """
+    Thống kê và tỷ lệ fail chính xác trên tất cả các row đo, tính trên workers
+    process (csv_parallel, mặc định: số CPU)
+    """
+    config = config or Config()
+    data_tool = load_bundle(file_path, limits_config(config))
+    lower, upper = limit_arrays(data_tool)
+    accumulator, fails = parallel_totals(
+        file_path, data_tool, config, workers, block_rows
+    )
+    stats = param_stats(data_tool, accumulator)
+    return _with_errors(stats, fails, lower, upper, None)
@@ -0,0 +1,242 @@
+"""
+CSV Serials - Index serial number -> (file, byte offset, độ dài row) cho các row
+đo của nhiều log, lưu trong sqlite, để tra cứu một unit mà không đọc lại log
+"""
+
+import csv
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from csv_index import MappedBundle
+from csv_measurements import label_row_filter, limits_config
+from csv_processor_v2 import Config, load_bundle
+from csv_reader import QUOTE, detect_compression
+
+# Số row được ghi vào sqlite mỗi lần
+INSERT_BATCH = 50_000
+
+# Phần mở rộng của file log được index khi quét thư mục
+LOG_EXTENSIONS = (".csv",)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    serial TEXT NOT NULL,
+    file_id INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    row_index INTEGER NOT NULL,
+    PRIMARY KEY (serial, file_id, offset)
+) WITHOUT ROWID;
+"""
+
+
+@dataclass
+class UnitLocation:
+    """Vị trí row của một unit trong file log"""
+
+    serial: str
+    file_path: str
+    offset: int
+    length: int
+    row_index: int
+
+
+@dataclass
+class UnitRow:
+    """Row đo của một unit, giá trị (chuỗi gốc) theo tên parametric"""
+
+    serial: str
+    file_path: str
+    row_index: int
+    values: Dict[str, str] = field(default_factory=dict)
+
+
+def iter_log_files(paths: Iterable[str]) -> Iterator[str]:
+    """Các file log (đường dẫn tuyệt đối) trong danh sách file / thư mục"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(LOG_EXTENSIONS):
+                        yield os.path.realpath(os.path.join(root, name))
+        else:
+            yield os.path.realpath(path)
+
+
+def _first_field(buffer, begin: int, end: int) -> bytes:
+    """Field đầu tiên của row buffer[begin:end]"""
+    if buffer.find(QUOTE, begin, end) >= 0:
+        text = buffer[begin:end].decode("utf-8", "replace")
+        return next(csv.reader([text]), [""])[0].encode("utf-8")
+    stop = buffer.find(b",", begin, end)
+    return buffer[begin : stop if stop >= 0 else end]
+
+
+def iter_unit_spans(
+    file_path: str, config: Config
+) -> Iterator[Tuple[str, int, int, int]]:
+    """
+    Các row đo của file: (serial, offset, length, row_index)
+    row_index là index của record CSV (giống load_bundle / iter_measurement_blocks),
+    span bao cả record kể cả field có xuống dòng.
+    Offset của các row chỉ giữ trong bộ nhớ (không ghi file .rowidx cạnh log).
+    Chỉ file không nén (offset là vị trí trong file gốc)
+    """
+    data_tool = load_bundle(file_path, limits_config(config))
+    if data_tool.key_row_index < 0:
+        return
+    is_label = label_row_filter(config)
+    limit_rows = set(data_tool.limit_row_indices.values())
+    bundle = MappedBundle(file_path, persist_index=False)
+    try:
+        buffer = bundle.buffer
+        for row_index in range(data_tool.key_row_index + 1, len(bundle)):
+            if row_index in limit_rows:
+                continue
+            begin, end = bundle.rows_span(row_index, row_index + 1)
+            if begin == end:
+                continue
+            first = _first_field(buffer, begin, end)
+            if not first or is_label(first):
+                continue
+            yield first.decode("utf-8", "replace"), begin, end - begin, row_index
+    finally:
+        bundle.close()
+
+
+class SerialIndex:
+    """
+    Index serial -> vị trí row trong các file log (sqlite)
+    Một serial có thể có nhiều row (retest, nhiều log); file đã index được
+    bỏ qua nếu không thay đổi (kích thước, mtime), index lại nếu thay đổi.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM units").fetchone()[0]
+
+    def add_file(self, file_path: str, config: Optional[Config] = None) -> int:
+        """
+        Index các row đo của file, trả về số row đã index (0 nếu không đổi)
+        File nén không được index (offset không đọc trực tiếp được)
+        """
+        config = config or Config()
+        file_path = os.path.realpath(file_path)
+        if detect_compression(file_path) is not None:
+            raise ValueError(f"không index được file nén: {file_path}")
+        stat = os.stat(file_path)
+
+        cursor = self.connection.cursor()
+        row = cursor.execute(
+            "SELECT id, size, mtime_ns FROM files WHERE path = ?", (file_path,)
+        ).fetchone()
+        if row is not None:
+            if (row[1], row[2]) == (stat.st_size, stat.st_mtime_ns):
+                return 0
+            cursor.execute("DELETE FROM units WHERE file_id = ?", (row[0],))
+            cursor.execute("DELETE FROM files WHERE id = ?", (row[0],))
+
+        cursor.execute(
+            "INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+            (file_path, stat.st_size, stat.st_mtime_ns),
+        )
+        file_id = cursor.lastrowid
+
+        count = 0
+        batch = []
+        for serial, offset, length, row_index in iter_unit_spans(file_path, config):
+            batch.append((serial, file_id, offset, length, row_index))
+            if len(batch) >= INSERT_BATCH:
+                self._insert(cursor, batch)
+                count += len(batch)
+                batch = []
+        self._insert(cursor, batch)
+        count += len(batch)
+        self.connection.commit()
+        return count
+
+    @staticmethod
+    def _insert(cursor, batch: List[tuple]):
+        cursor.executemany("INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?)", batch)
+
+    def build(self, paths: Iterable[str], config: Optional[Config] = None) -> Dict:
+        """
+        Index tất cả file log trong các file / thư mục
+        Trả về: {"files": số file đã index, "rows": số row, "skipped": [file nén]}
+        """
+        stats: Dict = {"files": 0, "rows": 0, "skipped": []}
+        for file_path in iter_log_files(paths):
+            if detect_compression(file_path) is not None:
+                stats["skipped"].append(file_path)
+                continue
+            rows = self.add_file(file_path, config)
+            if rows:
+                stats["files"] += 1
+                stats["rows"] += rows
+        return stats
+
+    def locate(self, serial: str) -> List[UnitLocation]:
+        """Vị trí các row của serial (theo thứ tự file, offset)"""
+        rows = self.connection.execute(
+            "SELECT files.path, units.offset, units.length, units.row_index "
+            "FROM units JOIN files ON files.id = units.file_id "
+            "WHERE units.serial = ? ORDER BY files.path, units.offset",
+            (serial,),
+        ).fetchall()
+        return [UnitLocation(serial, *row) for row in rows]
+
+    def is_stale(self, file_path: str) -> bool:
+        """True nếu file đã thay đổi / bị xóa sau khi index"""
+        row = self.connection.execute(
+            "SELECT size, mtime_ns FROM files WHERE path = ?", (file_path,)
+        ).fetchone()
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return True
+        return row is None or (row[0], row[1]) != (stat.st_size, stat.st_mtime_ns)
+
+    def lookup(self, serial: str, config: Optional[Config] = None) -> List[UnitRow]:
+        """Các row đo của serial, giá trị theo tên parametric của từng file"""
+        config = config or Config()
+        results = []
+        for location in self.locate(serial):
+            if self.is_stale(location.file_path):
+                raise ValueError(
+                    f"file đã thay đổi sau khi index: {location.file_path}"
+                )
+            data_tool = load_bundle(location.file_path, limits_config(config))
+            with open(location.file_path, "rb") as file:
+                file.seek(location.offset)
+                raw = file.read(location.length)
+            record = next(csv.reader([raw.decode("utf-8", "replace")]), [])
+            values = {
+                param.name: record[column] if column < len(record) else ""
+                for param, column in zip(data_tool.data, data_tool.columns)
+            }
+            results.append(
+                UnitRow(serial, location.file_path, location.row_index, values)
+            )
+        return results
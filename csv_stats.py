@@ -0,0 +1,215 @@
+"""
+CSV Stats - Thống kê từng parametric (count, mean, std, min, max, Cp, Cpk)
+trên các row đo, đọc theo block để bộ nhớ chỉ phụ thuộc số cột
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from csv_measurements import BLOCK_ROWS, iter_measurement_blocks, limits_config
+from csv_processor_v2 import Config, DataTool, LimitData, load_bundle
+
+
+def limit_bounds(limit: LimitData) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (lower, upper) của limit, None nếu không có
+    Không dùng lower_limit / upper_limit vì limit bằng 0.0 sẽ bị coi là không có
+    """
+    lower = limit.data.get("min")
+    if lower is None:
+        lower = limit.data.get("lower")
+    upper = limit.data.get("max")
+    if upper is None:
+        upper = limit.data.get("upper")
+    return lower, upper
+
+
+def value_precision(bounds: np.ndarray, data_tool: DataTool) -> np.ndarray:
+    """
+    Limit làm tròn về độ chính xác của các giá trị đo (data_tool.value_dtype)
+    Giá trị float32 (thư mục columnar) đã bị làm tròn: so với limit float64 thì
+    giá trị bằng đúng limit trong file CSV có thể thành fail. Làm tròn cả hai
+    giữ nguyên thứ tự (<=), chỉ các giá trị cách limit ít hơn độ chính xác
+    float32 mới có thể được coi là bằng limit.
+    """
+    if data_tool.value_dtype == "float64":
+        return bounds
+    return bounds.astype(data_tool.value_dtype).astype(np.float64)
+
+
+def limit_arrays(data_tool: DataTool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mảng lower / upper (float64, NaN nếu không có limit) theo thứ tự data,
+    ở độ chính xác của các giá trị đo (value_precision)
+    """
+    lower = np.full(len(data_tool.data), np.nan)
+    upper = np.full(len(data_tool.data), np.nan)
+    for k, param in enumerate(data_tool.data):
+        low, high = limit_bounds(param.limit)
+        if low is not None:
+            lower[k] = low
+        if high is not None:
+            upper[k] = high
+    return value_precision(lower, data_tool), value_precision(upper, data_tool)
+
+
+@dataclass
+class ParamStats:
+    """Thống kê của một parametric (None nếu không tính được)"""
+
+    name: str
+    count: int
+    mean: Optional[float]
+    std: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    lower: Optional[float]
+    upper: Optional[float]
+    cp: Optional[float]
+    cpk: Optional[float]
+
+
+class StatsAccumulator:
+    """
+    Cộng dồn count / mean / M2 / min / max cho n cột
+    Mỗi block được tính bằng NumPy (bỏ qua NaN), sau đó gộp vào kết quả
+    bằng công thức Chan (Welford cho từng nhóm) theo đúng thứ tự block.
+    """
+
+    def __init__(self, columns: int):
+        self.count = np.zeros(columns, dtype=np.int64)
+        self.mean = np.zeros(columns)
+        self.m2 = np.zeros(columns)
+        self.min = np.full(columns, np.inf)
+        self.max = np.full(columns, -np.inf)
+
+    def add_block(self, values: np.ndarray):
+        """Thêm một block values[rows, columns] (NaN = không có giá trị)"""
+        if values.shape[0] == 0:
+            return
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        filled = np.where(valid, values, 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = filled.sum(axis=0) / count
+        mean = np.where(count > 0, mean, 0.0)
+        deviation = np.where(valid, values - mean, 0.0)
+        m2 = (deviation * deviation).sum(axis=0)
+
+        self.min = np.fmin(self.min, np.where(valid, values, np.inf).min(axis=0))
+        self.max = np.fmax(self.max, np.where(valid, values, -np.inf).max(axis=0))
+        self._combine(count, mean, m2)
+
+    def merge(self, other: "StatsAccumulator"):
+        """Gộp kết quả của một accumulator khác (các row nằm sau)"""
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self._combine(other.count, other.mean, other.m2)
+
+    def _combine(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray):
+        total = self.count + count
+        safe_total = np.where(total > 0, total, 1)
+        delta = mean - self.mean
+        self.mean = self.mean + delta * (count / safe_total)
+        self.m2 = self.m2 + m2 + delta * delta * (self.count * count / safe_total)
+        self.count = total
+
+    def std(self) -> np.ndarray:
+        """Độ lệch chuẩn mẫu (ddof=1), NaN nếu có ít hơn 2 giá trị"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+
+def capability(
+    mean: float, std: float, lower: Optional[float], upper: Optional[float]
+) -> Tuple[Optional[float], Optional[float]]:
+    """
+    (Cp, Cpk) theo limit; Cp cần cả 2 limit, Cpk chỉ dùng limit có sẵn
+    None nếu std không hợp lệ hoặc không có limit
+    """
+    if std is None or not std > 0:
+        return None, None
+    cp = None
+    if lower is not None and upper is not None:
+        cp = (upper - lower) / (6 * std)
+    sides = []
+    if upper is not None:
+        sides.append((upper - mean) / (3 * std))
+    if lower is not None:
+        sides.append((mean - lower) / (3 * std))
+    return cp, (min(sides) if sides else None)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if math.isnan(value) or math.isinf(value) else float(value)
+
+
+def param_stats(data_tool: DataTool, accumulator: StatsAccumulator) -> List[ParamStats]:
+    """Chuyển kết quả cộng dồn thành ParamStats theo thứ tự data"""
+    std = accumulator.std()
+    results = []
+    for k, param in enumerate(data_tool.data):
+        count = int(accumulator.count[k])
+        lower, upper = limit_bounds(param.limit)
+        mean = _optional(accumulator.mean[k]) if count else None
+        deviation = _optional(std[k])
+        cp, cpk = capability(mean, deviation, lower, upper) if count else (None, None)
+        results.append(
+            ParamStats(
+                name=param.name,
+                count=count,
+                mean=mean,
+                std=deviation,
+                min=_optional(accumulator.min[k]),
+                max=_optional(accumulator.max[k]),
+                lower=lower,
+                upper=upper,
+                cp=cp,
+                cpk=cpk,
+            )
+        )
+    return results
+
+
+def accumulate(blocks: Iterable[np.ndarray], columns: int) -> StatsAccumulator:
+    """Cộng dồn các block values theo thứ tự"""
+    accumulator = StatsAccumulator(columns)
+    for values in blocks:
+        accumulator.add_block(values)
+    return accumulator
+
+
+def measurement_stats(
+    file_path: str,
+    data_tool: DataTool,
+    config: Config,
+    block_rows: int = BLOCK_ROWS,
+) -> List[ParamStats]:
+    """Thống kê các row đo của file theo limit trong data_tool"""
+    blocks = iter_measurement_blocks(file_path, data_tool, config, block_rows)
+    accumulator = accumulate((block.values for block in blocks), len(data_tool.data))
+    return param_stats(data_tool, accumulator)
+
+
+def bundle_stats(
+    file_path: str,
+    config: Optional[Config] = None,
+    block_rows: int = BLOCK_ROWS,
+    workers: Optional[int] = None,
+) -> List[ParamStats]:
+    """
+    Đọc limit (load_bundle) và thống kê các row đo của file
+    workers: thống kê trên nhiều process (csv_parallel), kết quả giống nhau
+    với mọi số worker (có thể khác đọc tuần tự ở chữ số cuối)
+    """
+    config = config or Config()
+    if workers is not None:
+        # csv_parallel import module này nên import tại đây
+        from csv_parallel import parallel_stats
+
+        return parallel_stats(file_path, config, workers, block_rows)
+    data_tool = load_bundle(file_path, limits_config(config))
+    return measurement_stats(file_path, data_tool, config, block_rows)
@@ -5,9 +5,13 @@ Chức năng: Đọc và so sánh dữ liệu CSV với các tham số có thể
 """
 
 import csv
+import io
+import sys
 import argparse
 from typing import List, Dict, Optional
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
+
+from csv_reader import open_bundle_stream
 
 
 @dataclass
@@ -63,9 +67,10 @@ def read_csv_file(file_path: str) -> List[List[str]]:
     """
     Đọc file CSV và trả về records
     Tương đương với readCSVFile() trong Go
+    File nén (gzip/bz2/xz/zip) được giải nén dần khi đọc
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
+        with io.TextIOWrapper(open_bundle_stream(file_path), encoding='utf-8') as file:
             # Cấu hình CSV reader giống Go:
             # - FieldsPerRecord = -1: cho phép số field khác nhau mỗi dòng
             # - TrimLeadingSpace = False: không trim space
@@ -224,10 +229,188 @@ def print_results(new_params: List[ParametricData],
     print(f"Remain Res: {[{'old': {'name': r.old.name, 'limit': r.old.limit.data}, 'new': {'name': r.new.name, 'limit': r.new.limit.data}} for r in remain_res]}")
 
 
+def print_suggested_limits(path: str, names: List[str], args):
+    """In limit gợi ý (csv_quantiles) cho các key mới từ các row đo của path"""
+    from csv_quantiles import bundle_quantiles
+    
+    def number(value):
+        return 'N/A' if value is None else f'{value:.6g}'
+    
+    print("\nSuggested Limits (new params):")
+    for result in bundle_quantiles(path, v2_config(args), names=names):
+        if not result.count:
+            print(f"  {result.name}: no measurements")
+            continue
+        print(f"  {result.name}: lower={number(result.suggested_lower)}, "
+              f"upper={number(result.suggested_upper)} "
+              f"(n={result.count}, p0.1={number(result.p0_1)}, "
+              f"p99.9={number(result.p99_9)})")
+
+
+def check_files(args) -> int:
+    """
+    Chế độ --check: so sánh nhanh cho CI, trả về exit code
+    Chỉ đọc tới hết phần limit (stop_after_limits): limit row lặp lại sau các
+    row đo không được so sánh
+    """
+    from csv_processor_v2 import CSVProcessorV2
+    
+    config = replace(v2_config(args), stop_after_limits=True)
+    
+    try:
+        difference = CSVProcessorV2.has_differences(args.file1, args.file2, config)
+    except Exception as e:
+        print(f"Err: {e}")
+        return 2
+    
+    if difference:
+        print(f"DIFF: {difference.kind} key '{difference.name}'")
+        return 1
+    
+    print("OK: no differences")
+    return 0
+
+
+def v2_config(args):
+    """Config của csv_processor_v2 từ các tham số dòng lệnh"""
+    from csv_processor_v2 import Config as ConfigV2
+    
+    return ConfigV2(
+        parametric_name_column=args.parametric,
+        get_columns=args.get_columns.split(','),
+        begin_from_parametric=args.begin_from_parametric,
+        null_values=args.null_values.split(','),
+        key_column=args.key,
+        retest_policy=args.retest
+    )
+
+
+def is_columnar_input(path: str, input_format: str) -> bool:
+    """File đầu vào có phải thư mục columnar không (theo --input-format)"""
+    from csv_columnar import is_columnar
+    
+    if input_format == 'csv':
+        return False
+    if input_format == 'columnar':
+        if not is_columnar(path):
+            raise ValueError(f"not a columnar store: {path}")
+        return True
+    return is_columnar(path)
+
+
+def load_data(path: str, config: Config, args):
+    """Đọc key/limit từ file CSV hoặc thư mục columnar"""
+    if is_columnar_input(path, args.input_format):
+        from csv_processor_v2 import load_bundle
+        
+        return load_bundle(path, v2_config(args))
+    return convert_data(read_csv_file(path), config)
+
+
+def convert_files(args) -> int:
+    """Lệnh convert: chuyển các row đo của file1 sang thư mục columnar"""
+    from csv_columnar import convert_to_columnar
+    
+    output = args.output or args.file1 + '.columnar'
+    try:
+        store = convert_to_columnar(
+            args.file1,
+            output,
+            v2_config(args),
+            dtype=args.dtype,
+            compress=args.compress
+        )
+    except Exception as e:
+        print(f"Err: {e}")
+        return 2
+    
+    print(f"Converted {len(store)} rows x {len(store.names)} columns -> {output}")
+    return 0
+
+
+def merge_files(args) -> int:
+    """Lệnh merge: gộp các row đo của các log trong --input vào thư mục columnar"""
+    from csv_merge import merge_logs
+    from csv_serials import iter_log_files
+    
+    if not args.input:
+        print("Err: --input is required")
+        return 2
+    output = args.output or 'merged.columnar'
+    try:
+        store = merge_logs(
+            iter_log_files(args.input),
+            output,
+            v2_config(args),
+            dtype=args.dtype,
+            compress=args.compress,
+            workers=args.workers
+        )
+    except Exception as e:
+        print(f"Err: {e}")
+        return 2
+    
+    print(f"Merged {len(store)} rows x {len(store.names)} columns "
+          f"from {len(store.sources)} logs -> {output}")
+    return 0
+
+
+def index_files(args) -> int:
+    """Lệnh index: index serial number của các row đo trong --input"""
+    from csv_serials import SerialIndex
+    
+    if not args.input:
+        print("Err: --input is required")
+        return 2
+    try:
+        with SerialIndex(args.index) as index:
+            stats = index.build(args.input, v2_config(args))
+            total = len(index)
+    except Exception as e:
+        print(f"Err: {e}")
+        return 2
+    
+    print(f"Indexed {stats['rows']} rows from {stats['files']} files ({total} rows total)")
+    for path in stats['skipped']:
+        print(f"Skipped compressed file: {path}")
+    return 0
+
+
+def lookup_serial(args) -> int:
+    """Lệnh lookup: in các row đo của --serial từ index"""
+    from csv_serials import SerialIndex
+    
+    if not args.serial:
+        print("Err: --serial is required")
+        return 2
+    try:
+        with SerialIndex(args.index) as index:
+            units = index.lookup(args.serial, v2_config(args))
+    except Exception as e:
+        print(f"Err: {e}")
+        return 2
+    
+    if not units:
+        print(f"NOT FOUND: {args.serial}")
+        return 1
+    for unit in units:
+        print(f"\n{unit.serial}: {unit.file_path} (row {unit.row_index + 1})")
+        for name, value in unit.values.items():
+            print(f"  {name} = {value}")
+    return 0
+
+
 def main():
     """Hàm main - tương đương với main() trong Go"""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='CSV Tool - So sánh dữ liệu CSV')
+    parser.add_argument('command', nargs='?', default='compare',
+                       choices=['compare', 'convert', 'merge', 'index', 'lookup'],
+                       help='compare: so sánh file1 và file2; convert: chuyển các row đo '
+                            'của file1 sang thư mục columnar; merge: gộp các log trong '
+                            '--input vào một thư mục columnar; index: index serial number '
+                            'của các log trong --input; lookup: tìm row đo của --serial '
+                            '(default: compare)')
     parser.add_argument('--parametric', type=str, default='parametric',
                        help='Tên cột parametric (default: parametric)')
     parser.add_argument('--get-columns', type=str, default='min,max,avg',
@@ -242,9 +425,52 @@ def main():
                        help='File CSV đầu tiên (default: dummy.csv)')
     parser.add_argument('--file2', type=str, default='dummy2.csv',
                        help='File CSV thứ hai (default: dummy2.csv)')
+    parser.add_argument('--check', action='store_true',
+                       help='Chỉ kiểm tra có khác biệt hay không, dừng ở key khác đầu tiên '
+                            '(exit code: 0 = giống nhau, 1 = khác nhau, 2 = lỗi). '
+                            'Chỉ đọc tới hết phần limit: limit row lặp lại sau các row đo '
+                            'không được so sánh')
+    parser.add_argument('--input-format', type=str, default='auto',
+                       choices=['auto', 'csv', 'columnar'],
+                       help='Định dạng file đầu vào, auto: thư mục columnar hoặc CSV (default: auto)')
+    parser.add_argument('--output', type=str, default=None,
+                       help='Thư mục columnar cho lệnh convert (default: <file1>.columnar) '
+                            'hoặc merge (default: merged.columnar)')
+    parser.add_argument('--dtype', type=str, default='float64',
+                       choices=['float32', 'float64'],
+                       help='Kiểu dữ liệu cột cho lệnh convert (default: float64)')
+    parser.add_argument('--compress', action='store_true',
+                       help='Nén các cột (.npz) khi convert (default: False)')
+    parser.add_argument('--retest', type=str, default='all',
+                       choices=['all', 'first', 'last', 'best'],
+                       help='Unit test lại (trùng serial) khi đọc các row đo: giữ tất cả, '
+                            'lần đầu, lần cuối hoặc lần pass cuối (default: all)')
+    parser.add_argument('--input', type=str, action='append', default=[],
+                       help='File log hoặc thư mục cho lệnh merge / index (có thể lặp lại)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Số process cho lệnh merge (default: số CPU)')
+    parser.add_argument('--index', type=str, default='serials.db',
+                       help='File index serial number (default: serials.db)')
+    parser.add_argument('--serial', type=str, default=None,
+                       help='Serial number cho lệnh lookup')
+    parser.add_argument('--suggest-limits', action='store_true',
+                       help='In limit gợi ý cho các key mới từ các row đo của file2 '
+                            '(mean ± 6 sigma, default: False)')
     
     args = parser.parse_args()
     
+    if args.command == 'convert':
+        return convert_files(args)
+    if args.command == 'merge':
+        return merge_files(args)
+    if args.command == 'index':
+        return index_files(args)
+    if args.command == 'lookup':
+        return lookup_serial(args)
+    
+    if args.check:
+        return check_files(args)
+    
     # Tạo config
     config = Config(
         parametric_name_column=args.parametric,
@@ -261,14 +487,12 @@ def main():
     try:
         # Đọc file 1
         print(f"\nĐọc file: {args.file1}")
-        records = read_csv_file(args.file1)
-        old = convert_data(records, config)
+        old = load_data(args.file1, config, args)
         print(f"Old Data: parametric_index={old.parametric_index}, total_params={old.total_params}")
         print(f"  Data: {[{'name': p.name, 'limit': p.limit.data} for p in old.data]}")
         
         # Đọc file 2
         print(f"\nĐọc file: {args.file2}")
-        records = read_csv_file(args.file2)
         
         # Tạo config mới cho file 2 (vì get_columns đã bị thay đổi)
         config2 = Config(
@@ -279,7 +503,7 @@ def main():
             key_column=args.key
         )
         
-        new = convert_data(records, config2)
+        new = load_data(args.file2, config2, args)
         print(f"New Data: parametric_index={new.parametric_index}, total_params={new.total_params}")
         print(f"  Data: {[{'name': p.name, 'limit': p.limit.data} for p in new.data]}")
         
@@ -287,6 +511,8 @@ def main():
         print("\nSo sánh dữ liệu...")
         new_params, remove_params, remain_res = compare(old, new)
         print_results(new_params, remove_params, remain_res)
+        if args.suggest_limits and new_params:
+            print_suggested_limits(args.file2, [p.name for p in new_params], args)
         
     except Exception as e:
         print(f"Err: {e}")
@@ -298,4 +524,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Test cho các chế độ so sánh trong csv_processor_v2
+"""
+
+import sys
+
+import csv_tool
+from csv_rename import find_renames
+from csv_processor_v2 import (
+    AlignedPairs,
+    ComparisonSummary,
+    Config,
+    CSVProcessorV2,
+    DataTool,
+    DiffRecord,
+    Difference,
+    LimitData,
+    ParametricData,
+    _map_middle as map_middle,
+    _strictly_increasing,
+    aligned_span,
+    compare,
+    compare_indices,
+    compare_views,
+    first_difference,
+    first_stream_difference,
+    iter_diff,
+    load_bundle,
+    read_bundle,
+    match_middle,
+    summarize,
+)
+
+
+def make_data(limits):
+    """Tạo DataTool từ list (tên, min, max)"""
+    return DataTool(
+        total_params=len(limits),
+        data=[
+            ParametricData(name=name, limit=LimitData({"min": low, "max": high}))
+            for name, low, high in limits
+        ],
+    )
+
+
+OLD = make_data([("A", 0, 1), ("B", 0, 2), ("C", 0, 3), ("D", 0, 4)])
+NEW = make_data([("A", 0, 1), ("X", 0, 9), ("C", 0, 5), ("D", 0, 4)])
+
+
+def names(params):
+    return [p.name for p in params]
+
+
+def test_compare_identical_key_rows():
+    changed_new = make_data([("A", 0, 1), ("B", 0, 7), ("C", 0, 3), ("D", 0, 4)])
+    assert aligned_span(OLD.data, changed_new.data) == (4, 0)
+
+    new_params, removed, changed, overlap = compare(OLD, changed_new)
+    assert new_params == [] and removed == []
+    assert [c.old.name for c in changed] == ["B"]
+    assert [c.new.name for c in overlap] == ["A", "C", "D"]
+
+
+def test_compare_partial_alignment():
+    assert aligned_span(OLD.data, NEW.data) == (1, 2)
+
+    new_params, removed, changed, overlap = compare(OLD, NEW)
+    assert names(new_params) == ["X"]
+    assert names(removed) == ["B"]
+    assert [c.new.name for c in changed] == ["C"]
+    assert [c.new.name for c in overlap] == ["A", "D"]
+
+
+def test_sorted_key_rows_use_merge_join():
+    old = make_data([("A", 0, 1), ("C", 0, 3), ("E", 0, 5), ("G", 0, 7)])
+    new = make_data([("B", 0, 2), ("C", 0, 4), ("E", 0, 5), ("F", 0, 6)])
+    pairs = list(match_middle(names(old.data), names(new.data), 0, 4, 4))
+    # Thứ tự giống đường dùng map: theo new, key bị xóa ở cuối
+    assert pairs == [(None, 0), (1, 1), (2, 2), (None, 3), (0, None), (3, None)]
+
+    new_params, removed, changed, overlap = compare(old, new)
+    assert names(new_params) == ["B", "F"]
+    assert names(removed) == ["A", "G"]
+    assert [c.new.name for c in changed] == ["C"]
+    assert [c.new.name for c in overlap] == ["E"]
+
+    # Không sắp xếp - quay về map theo tên, kết quả như nhau
+    unsorted = make_data([("F", 0, 6), ("E", 0, 5), ("C", 0, 4), ("B", 0, 2)])
+    assert list(match_middle(names(old.data), names(unsorted.data), 0, 4, 4)) == [
+        (None, 0),
+        (2, 1),
+        (1, 2),
+        (None, 3),
+        (0, None),
+        (3, None),
+    ]
+
+
+def test_loaded_sorted_bundles_use_merge_join(tmp_path, monkeypatch):
+    # ID trong registry theo thứ tự gặp lần đầu: tên mới của build2 có ID lớn hơn
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    old_names = [f"P{k:05d}" for k in range(0, 200, 2)]
+    new_names = [f"P{k:05d}" for k in range(0, 200, 3)]
+    for path, keys in ((file1, old_names), (file2, new_names)):
+        path.write_text(f"Parametric\nkey,{','.join(keys)}\nmax,{'1,' * len(keys)}\n")
+    old = load_bundle(str(file1), Config())
+    new = load_bundle(str(file2), Config())
+
+    calls = []
+
+    def spy(keys, start, end):
+        calls.append(_strictly_increasing(keys, start, end))
+        return calls[-1]
+
+    monkeypatch.setattr("csv_processor_v2._strictly_increasing", spy)
+    new_idx, removed_idx, _, _, overlap_old, overlap_new = compare_indices(old, new)
+    assert calls == [True, True]
+    assert [new.data[j].name for j in new_idx] == sorted(
+        set(new_names) - set(old_names)
+    )
+    assert [old.data[i].name for i in removed_idx] == sorted(
+        set(old_names) - set(new_names)
+    )
+    assert [new.data[j].name for j in overlap_new] == sorted(
+        set(old_names) & set(new_names)
+    )
+    assert list(overlap_old) == [old_names.index(new.data[j].name) for j in overlap_new]
+
+
+def test_unsorted_middle_matches_on_key_ids(tmp_path, monkeypatch):
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text("Parametric\nkey,A,Z,Y,X,B\nmax,1,2,3,4,5\n")
+    file2.write_text("Parametric\nkey,A,W,X,Y,B\nmax,1,2,4,7,5\n")
+
+    # ID được lấy khi đọc key row, không intern lại tên sau khi đọc
+    def no_ids(names):
+        raise AssertionError("registry.ids")
+
+    monkeypatch.setattr("csv_processor_v2.registry.ids", no_ids)
+    old = read_bundle(str(file1), Config())
+    new = read_bundle(str(file2), Config())
+    assert len(old.key_ids) == 5 and len(new.key_ids) == 5
+
+    calls = []
+
+    def spy(old_keys, new_keys, start, old_end, new_end):
+        calls.append((old_keys, new_keys, start, old_end, new_end))
+        return map_middle(old_keys, new_keys, start, old_end, new_end)
+
+    monkeypatch.setattr("csv_processor_v2._map_middle", spy)
+    new_idx, removed_idx, changed_old, changed_new, _, _ = compare_indices(old, new)
+    assert calls == [(old.key_ids, new.key_ids, 1, 4, 4)]
+    assert [new.data[j].name for j in new_idx] == ["W"]
+    assert [old.data[i].name for i in removed_idx] == ["Z"]
+    assert [new.data[j].name for j in changed_new] == ["Y"]
+
+
+def test_compare_views_are_index_based():
+    new_params, removed, changed, overlap = compare_views(OLD, NEW)
+    assert list(overlap.old_indices) == [0, 3]
+    assert list(changed.new_indices) == [2]
+
+    # View dùng được như list: len, index âm, slice, so sánh
+    assert len(overlap) == 2 and overlap[-1].new.name == "D"
+    assert [c.new.name for c in overlap[1:]] == ["D"]
+    assert new_params == [NEW.data[1]] and removed == [OLD.data[1]]
+    assert (new_params, removed, changed, overlap) == compare(OLD, NEW)
+
+
+def test_identical_limit_sections_short_circuit(tmp_path):
+    header = "Parametric\nkey,A,B\nmin,0,1\nmax,5,6\n"
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text(header + "SN1,1,2\n")
+    file2.write_text(header + "SN2,3,4\nSN3,3,4\n")
+
+    result = CSVProcessorV2.process_files(str(file1), str(file2), Config())
+    assert isinstance(result.overlap_params, AlignedPairs)
+    assert len(result.overlap_params) == 2
+    assert result.overlap_params[1].new.name == "B"
+    assert not result.new_params and not result.removed_params
+    assert not result.changed_params
+
+
+def test_first_difference():
+    assert first_difference(OLD, OLD) is None
+    assert first_difference(OLD, NEW) == Difference("added", "X")
+
+    changed_new = make_data([("A", 0, 1), ("B", 0, 2), ("C", 0, 3), ("D", 1, 4)])
+    assert first_difference(OLD, changed_new) == Difference("changed", "D")
+
+    removed_new = make_data([("A", 0, 1), ("C", 0, 3), ("D", 0, 4)])
+    assert first_difference(OLD, removed_new) == Difference("removed", "B")
+
+
+def test_first_stream_difference():
+    def stream(data):
+        return iter(data.data)
+
+    assert first_stream_difference(stream(OLD), stream(OLD)) is None
+    # Limit thay đổi được thấy trước key mới / bị xóa (chỉ biết khi hết dãy)
+    assert first_stream_difference(stream(OLD), stream(NEW)) == Difference(
+        "changed", "C"
+    )
+    moved = make_data([("D", 0, 4), ("C", 0, 3), ("A", 0, 1), ("B", 0, 2)])
+    assert first_stream_difference(stream(OLD), stream(moved)) is None
+    twice = make_data([("A", 0, 1), ("A", 0, 2)])
+    assert first_stream_difference(stream(twice), stream(twice)) is None
+    removed_new = make_data([("A", 0, 1), ("C", 0, 3), ("D", 0, 4)])
+    assert first_stream_difference(stream(OLD), stream(removed_new)) == Difference(
+        "removed", "B"
+    )
+    added = make_data([("A", 0, 1), ("B", 0, 2), ("X", 0, 1), ("C", 0, 3), ("D", 0, 4)])
+    assert first_stream_difference(stream(OLD), stream(added)) == Difference(
+        "added", "X"
+    )
+
+
+def test_csv_tool_check_stops_after_limits(tmp_path, monkeypatch, capsys):
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    # Phần sau limit rows không được đọc (row đo lỗi, limit row lặp lại)
+    file1.write_text("Parametric\nkey,A,B\nmin,0,0\nmax,5,5\nmax,5,bad\n")
+    file2.write_text("Parametric\nkey,B,A\nmin,0,0\nmax,5,5\nSN1,1,2\n")
+    argv = ["csv_tool.py", "--check", "--file1", str(file1), "--file2", str(file2)]
+    argv += ["--get-columns", "min,max"]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert csv_tool.main() == 0
+    assert "OK: no differences" in capsys.readouterr().out
+
+    file2.write_text("Parametric\nkey,B,A,C\nmin,0,0,0\nmax,6,5,1\n")
+    assert csv_tool.main() == 1
+    assert "DIFF: changed key 'B'" in capsys.readouterr().out
+
+
+def test_summarize_counts_only(tmp_path):
+    summary = summarize(OLD, NEW, top_n=5)
+    assert summary == ComparisonSummary(
+        new_count=1,
+        removed_count=1,
+        changed_count=1,
+        overlap_count=2,
+        top_new=["X"],
+        top_removed=["B"],
+        top_changed=["C"],
+    )
+    assert summary.total_changes == 3
+    assert summarize(OLD, NEW).top_new == []
+
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text("Parametric\nkey,A,B,C\nmin,0,0,0\nmax,1,2,3\n")
+    file2.write_text("Parametric\nkey,A,C,D\nmin,0,0,0\nmax,1,5,4\n")
+
+    # Danh sách chi tiết chỉ được tạo khi truy cập, kết quả giống compare()
+    result = CSVProcessorV2.process_files(str(file1), str(file2), Config())
+    assert result.summary == CSVProcessorV2.summarize_files(
+        str(file1), str(file2), top_n=5
+    )
+    assert result.get_summary().changed_count == 1
+    assert names(result.new_params) == ["D"]
+    assert names(result.removed_params) == ["B"]
+    assert [c.new.name for c in result.changed_params] == ["C"]
+    assert [c.new.name for c in result.overlap_params] == ["A"]
+
+
+def test_iter_diff_stream_order(tmp_path):
+    records = list(iter_diff(OLD, NEW, include_unchanged=True))
+    assert [(r.kind, r.name) for r in records] == [
+        ("unchanged", "A"),
+        ("added", "X"),
+        ("removed", "B"),
+        ("changed", "C"),
+        ("unchanged", "D"),
+    ]
+    assert records[1] == DiffRecord("added", "X", None, NEW.data[1])
+    assert [r.kind for r in iter_diff(OLD, NEW)] == ["added", "removed", "changed"]
+
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text("Parametric\nkey,A,B\nmin,0,0\nmax,1,2\n")
+    file2.write_text("Parametric\nkey,A,B\nmin,0,0\nmax,1,3\n")
+    records = CSVProcessorV2.iter_diff(str(file1), str(file2))
+    assert [(r.kind, r.name, r.new.limit.data) for r in records] == [
+        ("changed", "B", {"min": 0.0, "max": 3.0})
+    ]
+
+
+def test_check_and_iter_diff_agree_with_full_compare(tmp_path):
+    # Limit row lặp lại sau các row đo: kết quả theo config.stop_after_limits
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text("Parametric\nkey,A,B\nmin,0,0\nmax,5,5\nSN1,1,2\nmax,5,9\n")
+    file2.write_text("Parametric\nkey,A,B\nmin,0,0\nmax,5,5\nSN1,1,2\nmax,5,5\n")
+
+    for early, changed in ((False, ["B"]), (True, [])):
+        config = Config(stop_after_limits=early)
+        result = CSVProcessorV2.process_files(str(file1), str(file2), config)
+        assert [c.new.name for c in result.changed_params] == changed
+        difference = CSVProcessorV2.has_differences(str(file1), str(file2), config)
+        assert ([difference.name] if difference else []) == changed
+        for budget in (None, 1 << 20):
+            records = CSVProcessorV2.iter_diff(
+                str(file1), str(file2), config, memory_budget=budget
+            )
+            assert [r.name for r in records] == changed
+
+
+def test_rename_detection(tmp_path):
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text("Parametric\nkey,VBAT_3V3,IBAT,TEMP\nmin,3.2,0,1\nmax,3.4,2,9\n")
+    file2.write_text(
+        "Parametric\nkey,VBAT_3V3_MAIN,IBAT,TEMP_SENSOR,ICHG\n"
+        "min,3.2,0,5,0\nmax,3.4,2,6,1\n"
+    )
+
+    plain = CSVProcessorV2.process_files(str(file1), str(file2), Config())
+    assert names(plain.new_params) == ["VBAT_3V3_MAIN", "TEMP_SENSOR", "ICHG"]
+    assert list(plain.renamed_params) == []
+
+    config = Config(detect_renames=True)
+    result = CSVProcessorV2.process_files(str(file1), str(file2), config)
+    # TEMP -> TEMP_SENSOR: tên giống một phần nhưng limit khác - không ghép
+    assert [(r.old.name, r.new.name) for r in result.renamed_params] == [
+        ("VBAT_3V3", "VBAT_3V3_MAIN")
+    ]
+    assert names(result.new_params) == ["TEMP_SENSOR", "ICHG"]
+    assert names(result.removed_params) == ["TEMP"]
+    summary = result.get_summary()
+    assert (summary.renamed_count, summary.new_count, summary.removed_count) == (
+        1,
+        2,
+        1,
+    )
+
+
+def test_find_renames_one_to_one():
+    removed = make_data([("RF_TX_PWR", 0, 5), ("RF_RX_GAIN", 1, 9), ("LDO1", 0, 1)])
+    added = make_data([("RF_TX_PWR_B1", 0, 5), ("RF_TX_PWR_B2", 0, 5), ("ADC", 0, 1)])
+    # Hai key mới cùng giống RF_TX_PWR - chỉ một cặp được ghép (điểm cao hơn, j nhỏ hơn)
+    assert [(i, j) for i, j, _ in find_renames(removed.data, added.data)] == [(0, 0)]
+    assert find_renames(removed.data, []) == []
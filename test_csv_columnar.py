@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_columnar và lệnh convert của csv_tool
+"""
+
+import sys
+
+import numpy as np
+import pytest
+
+import csv_tool
+from csv_columnar import ColumnarStore, convert_to_columnar, is_columnar
+from csv_failures import check_file_limits
+from csv_measurements import iter_bundle_blocks
+from csv_processor_v2 import CSVProcessorV2, Config, load_bundle
+from csv_stats import bundle_stats
+
+
+BUNDLE = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT,TEMP\n"
+    "min,,1.0,0,-20\n"
+    "max,,3.0,N/A,80\n"
+    "SN001,,2.1,1.1,25\n"
+    "SN002,,3.5,,26\n"
+    "SN003,,1.9,bad,81\n"
+    "SN004,,2.4,1.3\n"
+    "SN005,,2.0,1.2,27\n"
+)
+
+
+def test_store_round_trip(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+    expected = np.vstack([b.values for b in iter_bundle_blocks(str(path), Config())])
+
+    for compress in (False, True):
+        output = str(tmp_path / f"store_{compress}")
+        store = convert_to_columnar(
+            str(path), output, compress=compress, block_rows=2, group_rows=3
+        )
+        assert is_columnar(output)
+        assert len(store) == 5 and len(store.row_groups) == 2
+        assert np.array_equal(store.read(), expected, equal_nan=True)
+        assert np.array_equal(store.column("TEMP"), expected[:, 2], equal_nan=True)
+        assert store.serials() == ["SN001", "SN002", "SN003", "SN004", "SN005"]
+
+        # Limit, so sánh và thống kê đọc từ store giống như từ file CSV
+        original = load_bundle(str(path), Config())
+        assert load_bundle(output, Config()).data == original.data
+        # Row group cắt block khác với file CSV: tổng cộng theo thứ tự khác
+        for got, want in zip(bundle_stats(output), bundle_stats(str(path))):
+            assert vars(got) == pytest.approx(vars(want))
+        assert check_file_limits(output).units == check_file_limits(str(path)).units
+        result = CSVProcessorV2.process_files(str(path), output)
+        assert result.get_summary().total_changes == 0
+
+    # Chỉ đọc các cột được chọn
+    reopened = ColumnarStore(str(tmp_path / "store_True"))
+    assert np.array_equal(reopened.read([2, 0]), expected[:, [2, 0]], equal_nan=True)
+
+
+def test_row_groups_independent_of_blocks(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+    store = convert_to_columnar(str(path), str(tmp_path / "store"), block_rows=2)
+    assert [group["rows"] for group in store.row_groups] == [5]
+    assert [len(block.serials) for block in store.iter_blocks(block_rows=2)] == [
+        2,
+        2,
+        1,
+    ]
+
+
+def test_float32_store_limit_verdicts(tmp_path):
+    # Giá trị bằng đúng limit: pass với file CSV và với store float32
+    path = tmp_path / "bundle.csv"
+    path.write_text(
+        "header,Parametric\nkey,,VBAT,IBAT\nmin,,0.3,0\nmax,,1.1,2\n"
+        "SN001,,1.1,1\nSN002,,0.3,3\nSN003,,1.1000001,1\n"
+    )
+    expected = check_file_limits(str(path))
+    assert expected.fail_counts.tolist() == [1, 1]
+    for dtype in ("float64", "float32"):
+        output = str(tmp_path / dtype)
+        convert_to_columnar(str(path), output, dtype=dtype)
+        report = check_file_limits(output)
+        assert report.fail_counts.tolist() == expected.fail_counts.tolist()
+        assert report.units == expected.units
+
+
+def test_csv_tool_convert(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+    output = str(tmp_path / "store")
+
+    argv = ["csv_tool.py", "convert", "--file1", str(path), "--output", output]
+    argv += ["--get-columns", "min,max", "--dtype", "float32"]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert csv_tool.main() == 0
+    store = ColumnarStore(output)
+    assert store.meta["dtype"] == "float32"
+    assert np.isclose(store.column("VBAT")[0], 2.1)
+
+    argv = ["csv_tool.py", "--file1", output, "--file2", str(path)]
+    argv += ["--get-columns", "min,max", "--input-format", "auto"]
+    monkeypatch.setattr(sys, "argv", argv)
+    csv_tool.main()
+    assert "Remain Res: []" in capsys.readouterr().out
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_dedup (lọc unit test lại khi đọc các row đo)
+"""
+
+import numpy as np
+
+from csv_dedup import SerialSet, dedup_blocks
+from csv_measurements import iter_bundle_blocks
+from csv_processor_v2 import Config, load_bundle
+from csv_stats import bundle_stats
+
+
+# SN001: fail, pass, fail - SN002: fail, fail - SN003: pass
+BUNDLE = (
+    "header,Parametric\n"
+    "key,,VBAT,TEMP\n"
+    "min,,1.0,-20\n"
+    "max,,3.0,80\n"
+    "SN001,,3.5,25\n"
+    "SN002,,0.5,26\n"
+    "SN001,,2.0,27\n"
+    "SN003,,2.2,28\n"
+    "SN002,,0.6,29\n"
+    "SN001,,2.1,90\n"
+)
+
+
+def read(path, policy, **kwargs):
+    config = Config(retest_policy=policy)
+    data_tool = load_bundle(str(path), config)
+    blocks = list(dedup_blocks(str(path), data_tool, config, block_rows=2, **kwargs))
+    serials = [serial for block in blocks for serial in block.serials]
+    values = np.vstack([block.values for block in blocks])
+    return serials, values[:, 1].tolist()
+
+
+def test_retest_policies(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+
+    assert read(path, "all")[1] == [25, 26, 27, 28, 29, 90]
+    assert read(path, "first") == (["SN001", "SN002", "SN003"], [25, 26, 28])
+    assert read(path, "last") == (["SN003", "SN002", "SN001"], [28, 29, 90])
+    assert read(path, "best") == (["SN001", "SN003", "SN002"], [27, 28, 29])
+    # Spill sang sqlite cho kết quả giống nhau
+    for policy in ("first", "last", "best"):
+        assert read(path, policy, max_memory=1) == read(path, policy)
+
+    # Policy được áp dụng cho tất cả các phép đọc row đo (vd: thống kê)
+    stats = bundle_stats(str(path), Config(retest_policy="best"))
+    assert stats[1].count == 3 and stats[1].max == 29
+    blocks = iter_bundle_blocks(str(path), Config(retest_policy="first"))
+    assert sum(len(block.serials) for block in blocks) == 3
+
+
+def test_serial_set_spill():
+    seen = SerialSet(max_memory=2)
+    assert seen.add([1, 2, 1]) == [True, True, False]
+    assert seen.add([3, 2, 4, 4]) == [True, False, True, False]
+    assert seen.spilled and len(seen) == 4
+    assert seen.contains([4, 5, 1]) == [True, False, True]
+    seen.close()
+
+
+def test_serial_set_matches_python_set():
+    rng = np.random.default_rng(6)
+    seen = SerialSet()
+    expected = set()
+    for _ in range(200):
+        keys = rng.integers(-(1 << 62), 1 << 62, size=50).tolist()
+        keys += rng.integers(0, 3000, size=rng.integers(0, 60)).tolist()
+        new = []
+        for key in keys:
+            new.append(key not in expected)
+            expected.add(key)
+        assert seen.add(keys) == new
+    assert len(seen) == len(expected) and len(seen.runs) < 20
+    probe = rng.integers(0, 4000, size=500).tolist()
+    assert seen.contains(probe) == [key in expected for key in probe]
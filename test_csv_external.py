@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test cho chế độ so sánh trên đĩa (csv_external)
+"""
+
+import gzip
+
+from csv_external import iter_bundle_params, sorted_params
+from csv_processor_v2 import (
+    Config,
+    CSVProcessorV2,
+    LimitData,
+    ParametricData,
+    load_bundle,
+)
+
+
+OLD_BUNDLE = (
+    "header,A,Parametric\r\n"
+    "key,,,VBAT,IBAT,TEMP,VSYS\r\n"
+    "min,,,1.5,N/A,-20,3\r\n"
+    "SN001,,,2.1,1.1,25,3.3\r\n"
+    "max,,,3.5,2,80,4\r\n"
+)
+NEW_BUNDLE = (
+    "header,A,Parametric\r\n"
+    "key,,,VSYS,VBAT,TEMP,ICHG\r\n"
+    'min,,,3,1.5,"-25",0\r\n'
+    "max,,,4,3.5,80,1\r\n"
+)
+
+
+def test_iter_bundle_params_matches_load_bundle(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(OLD_BUNDLE)
+    compressed = tmp_path / "bundle.csv.gz"
+    compressed.write_bytes(gzip.compress(NEW_BUNDLE.encode()))
+
+    config = Config(stop_after_limits=True)
+    for bundle in (path, compressed):
+        expected = load_bundle(str(bundle), config).data
+        assert list(iter_bundle_params(str(bundle), config)) == expected
+
+
+def test_sorted_params_spills_runs(tmp_path):
+    params = [
+        ParametricData(name=name, limit=LimitData({"max": float(i)}))
+        for i, name in enumerate(["D", "B", "A", "C", "B"])
+    ]
+    # Budget nhỏ: mỗi key là một run riêng
+    result = list(sorted_params(params, memory_budget=1, tmp_dir=str(tmp_path)))
+    assert [(p.name, p.limit.data["max"]) for p in result] == [
+        ("A", 2.0),
+        ("B", 1.0),
+        ("B", 4.0),
+        ("C", 3.0),
+        ("D", 0.0),
+    ]
+
+
+def test_external_diff_matches_in_memory(tmp_path):
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text(OLD_BUNDLE)
+    file2.write_text(NEW_BUNDLE)
+
+    expected = sorted(
+        CSVProcessorV2.iter_diff(str(file1), str(file2), include_unchanged=True),
+        key=lambda record: record.name,
+    )
+    for budget in (1, 1 << 20):
+        records = list(
+            CSVProcessorV2.iter_diff(
+                str(file1), str(file2), include_unchanged=True, memory_budget=budget
+            )
+        )
+        assert records == expected
+    assert [(r.kind, r.name) for r in expected] == [
+        ("removed", "IBAT"),
+        ("added", "ICHG"),
+        ("changed", "TEMP"),
+        ("unchanged", "VBAT"),
+        ("unchanged", "VSYS"),
+    ]
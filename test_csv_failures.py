@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_failures (kiểm tra giá trị đo với limit)
+"""
+
+import csv
+
+import numpy as np
+
+from csv_failures import check_file_limits, write_failures_csv
+from csv_processor_v2 import Config
+
+
+BUNDLE = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT,TEMP\n"
+    "min,,1.0,0,N/A\n"
+    "max,,3.0,N/A,80\n"
+    "SN001,,2.1,1.1,25\n"
+    "SN002,,3.5,-0.1,26\n"
+    "SN003,,,5,81\n"
+    "SN004,,1.0,0,80\n"
+    "SN005,,0.9,1.2,N/A\n"
+)
+
+
+def test_check_limits(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+
+    report = check_file_limits(str(path), Config(), block_rows=2)
+    assert report.total_units == 5
+    assert report.failing_units == 3
+    assert report.tested.tolist() == [4, 5, 4]
+    assert report.fail_counts.tolist() == [2, 1, 1]
+    # Giá trị bằng limit (kể cả limit 0) là pass, limit trống không bao giờ fail
+    assert [(u.serial, u.failed) for u in report.units] == [
+        ("SN002", ["VBAT", "IBAT"]),
+        ("SN003", ["TEMP"]),
+        ("SN005", ["VBAT"]),
+    ]
+    assert report.units[0].row_index == 5
+    assert report.failed_params() == [0, 1, 2]
+
+    truncated = check_file_limits(str(path), Config(), max_units=1)
+    assert truncated.truncated and len(truncated.units) == 1
+    assert truncated.failing_units == 3
+
+
+def test_write_failures_csv(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+    report = check_file_limits(str(path))
+
+    output = tmp_path / "failures.csv"
+    write_failures_csv(report, str(output))
+    rows = list(csv.reader(output.open()))
+
+    assert rows[1] == ["Total Units", "5"]
+    assert rows[5] == ["VBAT", "1.0", "3.0", "4", "2"]
+    assert rows[7] == ["TEMP", "", "80.0", "4", "1"]
+    assert rows[-1] == ["9", "SN005", "1", "VBAT"]
+    assert np.isnan(report.lower[2])
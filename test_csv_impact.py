@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_impact (đánh giá log đo với limit cũ / mới)
+"""
+
+from csv_impact import changed_keys, file_limit_impact
+from csv_processor_v2 import CSVProcessorV2, Config
+
+
+OLD = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT,TEMP\n"
+    "min,,1.0,0,-20\n"
+    "max,,3.0,2,80\n"
+    "SN001,,2.1,1.1,25\n"
+    "SN002,,2.9,-0.1,26\n"
+    "SN003,,1.2,1.5,81\n"
+    "SN004,,3.2,1.9,30\n"
+)
+
+# VBAT bị siết lại, IBAT được nới ra, TEMP giữ nguyên
+NEW = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT,TEMP\n"
+    "min,,1.5,-0.5,-20\n"
+    "max,,2.5,2,80\n"
+)
+
+
+def test_limit_impact(tmp_path):
+    old = tmp_path / "old.csv"
+    new = tmp_path / "new.csv"
+    old.write_text(OLD)
+    new.write_text(NEW)
+
+    config = Config()
+    result = CSVProcessorV2.process_files(str(old), str(new), config)
+    keys = changed_keys(result.changed_params)
+    assert keys == ["VBAT", "IBAT"]
+
+    report = file_limit_impact(str(old), str(old), str(new), config, keys=keys)
+    vbat = report.get("VBAT")
+    assert (vbat.tested, vbat.old_fail, vbat.new_fail) == (4, 1, 3)
+    assert (vbat.newly_failing, vbat.newly_passing) == (2, 0)
+    assert vbat.yield_delta == -50.0
+
+    ibat = report.get("IBAT")
+    assert (ibat.newly_failing, ibat.newly_passing) == (0, 1)
+    assert report.get("TEMP") is None
+
+    # Cả limit cũ và limit mới đều chỉ có SN001 pass tất cả parametric
+    assert report.total_units == 4
+    assert (report.old_passing_units, report.new_passing_units) == (1, 1)
+    assert report.yield_delta() == 0.0
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_merge và lệnh merge của csv_tool
+"""
+
+import sys
+
+import numpy as np
+
+import csv_tool
+from csv_columnar import ColumnarStore
+from csv_merge import merge_logs
+from csv_processor_v2 import Config, load_bundle
+from csv_stats import bundle_stats
+
+
+LOG_A = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT\n"
+    "min,,1.0,0\n"
+    "max,,3.0,2\n"
+    "SN001,,2.1,1.1\n"
+    "SN002,,2.2,1.2\n"
+)
+
+# Build mới: bỏ IBAT, thêm TEMP, đổi limit của VBAT
+LOG_B = (
+    "header,Parametric\n"
+    "key,,TEMP,VBAT\n"
+    "min,,-20,1.5\n"
+    "max,,80,3.5\n"
+    "SN003,,25,2.3\n"
+    "SN004,,26,N/A\n"
+    "SN005,,27,2.5\n"
+)
+
+
+def write_logs(tmp_path):
+    paths = [tmp_path / "a.csv", tmp_path / "b.csv"]
+    paths[0].write_text(LOG_A)
+    paths[1].write_text(LOG_B)
+    return [str(path) for path in paths]
+
+
+def test_merge_union_schema(tmp_path):
+    paths = write_logs(tmp_path)
+    nan = np.nan
+    expected = np.array(
+        [
+            [2.1, 1.1, nan],
+            [2.2, 1.2, nan],
+            [2.3, nan, 25],
+            [nan, nan, 26],
+            [2.5, nan, 27],
+        ]
+    )
+    for workers in (1, 2):
+        output = str(tmp_path / f"merged_{workers}")
+        store = merge_logs(paths, output, workers=workers, block_rows=2)
+        assert store.names == ["VBAT", "IBAT", "TEMP"]
+        assert np.array_equal(store.read(), expected, equal_nan=True)
+        assert store.serials() == ["SN001", "SN002", "SN003", "SN004", "SN005"]
+        # Nguồn gốc của từng row: log và row index trong log
+        assert store.sources == paths
+        assert store.row_sources().tolist() == [0, 0, 1, 1, 1]
+        assert store.row_indices().tolist() == [4, 5, 4, 5, 6]
+
+    # Limit lấy từ log đầu tiên có parametric, thống kê trên toàn bộ row
+    merged = load_bundle(output, Config())
+    assert [param.limit.data for param in merged.data] == [
+        {"min": 1.0, "max": 3.0},
+        {"min": 0.0, "max": 2.0},
+        {"min": -20.0, "max": 80.0},
+    ]
+    assert [stats.count for stats in bundle_stats(output)] == [4, 2, 3]
+
+
+def test_csv_tool_merge(tmp_path, monkeypatch, capsys):
+    write_logs(tmp_path)
+    output = str(tmp_path / "merged")
+    argv = ["csv_tool.py", "merge", "--input", str(tmp_path), "--output", output]
+    argv += ["--workers", "1", "--compress"]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert csv_tool.main() == 0
+    assert "Merged 5 rows x 3 columns from 2 logs" in capsys.readouterr().out
+    assert ColumnarStore(output).compressed
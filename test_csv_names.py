@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test cho bảng tên parametric dùng chung (csv_names)
+"""
+
+from csv_names import NameRegistry, registry
+from csv_processor_v2 import Config, read_bundle
+
+
+def test_registry_ids(tmp_path):
+    names = NameRegistry()
+    assert names.intern("VBAT") == 0
+    assert names.intern_bytes(b"IBAT") == 1
+    assert names.intern_bytes(b"VBAT") == 0
+    assert list(names.ids(["IBAT", "TEMP", "VBAT"])) == [1, 2, 0]
+    assert names.name(2) == "TEMP" and len(names) == 3
+
+    # Lưu ra file (opt-in): ID giữ nguyên khi đọc lại
+    path = str(tmp_path / "names.json")
+    names.save(path)
+    reloaded = NameRegistry(path)
+    assert [reloaded.name(i) for i in range(len(reloaded))] == ["VBAT", "IBAT", "TEMP"]
+    assert reloaded.intern_bytes(b"TEMP") == 2 and reloaded.intern("NEW") == 3
+
+
+def test_bundles_share_interned_names(tmp_path):
+    file1 = tmp_path / "build1.csv"
+    file2 = tmp_path / "build2.csv"
+    file1.write_text("Parametric\nkey,VBAT,IBAT\nmin,1,2\n")
+    file2.write_text("Parametric\nkey,IBAT,VBAT\nmin,1,2\n")
+
+    old = read_bundle(str(file1), Config())
+    new = read_bundle(str(file2), Config())
+    assert list(old.key_ids) == [registry.intern("VBAT"), registry.intern("IBAT")]
+    assert list(new.key_ids) == list(reversed(old.key_ids))
+    assert new.data[1].name is old.data[0].name
+
+    # Cột bị lọc bỏ không được thêm vào registry
+    file1.write_text("Parametric\nkey,VBAT,SKIPPED_NAME_X\nmin,1,2\n")
+    read_bundle(str(file1), Config(exclude_keys=["SKIPPED_*"]))
+    assert "SKIPPED_NAME_X" not in registry
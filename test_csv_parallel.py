@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_parallel (thống kê trên nhiều process)
+"""
+
+import gzip
+
+import numpy as np
+
+import csv_parallel
+from csv_columnar import convert_to_columnar
+from csv_processor_v2 import Config
+from csv_sample import exact_stats
+from csv_stats import bundle_stats
+
+
+def write_bundle(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(1e6, 1e-3, size=(rows, 3))
+    lines = ["header,Parametric", "key,,A,B,C", "min,,0,0,0", "max,,2e6,2e6,2e6"]
+    for k, row in enumerate(values):
+        cells = ["" if k % 7 == 0 and j == 1 else f"{v:.9f}" for j, v in enumerate(row)]
+        lines.append(f"SN{k},," + ",".join(cells))
+    text = "\n".join(lines) + "\n"
+    path.write_text(text)
+    return text
+
+
+def test_parallel_stats_deterministic(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_parallel, "SHARD_BYTES", 4096)
+    path = tmp_path / "bundle.csv"
+    text = write_bundle(path, 1000)
+
+    serial = bundle_stats(str(path))
+    results = [bundle_stats(str(path), workers=w, block_rows=16) for w in (1, 2, 3)]
+    # Giống nhau từng bit với mọi số worker
+    assert results[0] == results[1] == results[2]
+    for parallel, expected in zip(results[0], serial):
+        assert parallel.count == expected.count
+        assert np.isclose(parallel.mean, expected.mean, rtol=0, atol=1e-9)
+        assert np.isclose(parallel.std, expected.std)
+        assert (parallel.min, parallel.max) == (expected.min, expected.max)
+    assert results[0][1].count == 1000 - 143
+    data_tool = csv_parallel.load_bundle(str(path), Config(stop_after_limits=True))
+    assert len(csv_parallel.shard_tasks(str(path), data_tool, Config(), 16)) > 10
+
+    # File nén / lọc unit test lại: đọc tuần tự, kết quả như nhau
+    compressed = tmp_path / "bundle.csv.gz"
+    compressed.write_bytes(gzip.compress(text.encode()))
+    shared = [bundle_stats(str(compressed), workers=w, block_rows=16) for w in (1, 2)]
+    assert shared[0] == shared[1]
+    assert [s.count for s in shared[0]] == [s.count for s in serial]
+    first = Config(retest_policy="first")
+    deduped = [bundle_stats(str(path), first, 16, workers=w) for w in (1, 2)]
+    assert deduped[0] == deduped[1]
+
+
+def test_parallel_stats_quoted_newline_at_shard_boundary(tmp_path, monkeypatch):
+    monkeypatch.setattr(csv_parallel, "SHARD_BYTES", 10)
+    path = tmp_path / "bundle.csv"
+    path.write_text(
+        "header,Parametric\nkey,,A,NOTE\nmin,,0,\nmax,,9,\n"
+        'SN1,,1,"a\nx,,8,"\nSN2,,3,\nSN3,,5,"b"\nSN4,,7,\n'
+    )
+    # Row là record CSV: khoảng row không bắt đầu bên trong dấu ngoặc kép
+    # (nếu tách row từ dòng 'x,,8,"' thì 8 bị tính là giá trị của A)
+    data_tool = csv_parallel.load_bundle(str(path), Config(stop_after_limits=True))
+    tasks = csv_parallel.shard_tasks(str(path), data_tool, Config(), 16)
+    assert [(task.start, task.stop) for task in tasks] == [
+        (2, 4),
+        (4, 5),
+        (5, 6),
+        (6, 7),
+        (7, 8),
+    ]
+    expected = bundle_stats(str(path))
+    assert expected[0].count == 4 and expected[0].mean == 4
+    for workers in (1, 2):
+        assert bundle_stats(str(path), workers=workers) == expected
+
+    # Thống kê chính xác (tab Exact Stats) và số fail cũng tính trên các worker
+    for workers in (1, 2):
+        (result, _) = exact_stats(str(path), workers=workers)
+        assert result.stats == expected[0] and result.fail_rate == 0.0
+
+
+def test_parallel_stats_columnar_row_groups(tmp_path):
+    path = tmp_path / "bundle.csv"
+    write_bundle(path, 500)
+    output = str(tmp_path / "store")
+    store = convert_to_columnar(str(path), output, group_rows=64)
+    assert len(store.row_groups) == 8
+
+    results = [bundle_stats(output, workers=w, block_rows=16) for w in (1, 2)]
+    assert results[0] == results[1]
+    for parallel, expected in zip(results[0], bundle_stats(str(path))):
+        assert parallel.count == expected.count
+        assert np.isclose(parallel.mean, expected.mean, rtol=0, atol=1e-9)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_quantiles (t-digest và limit gợi ý)
+"""
+
+import sys
+
+import numpy as np
+
+import csv_quantiles
+import csv_tool
+from csv_measurements import iter_measurement_blocks, limits_config
+from csv_processor_v2 import Config, load_bundle
+from csv_quantiles import (
+    REPORT_QUANTILES,
+    ColumnSketches,
+    TDigest,
+    bundle_quantiles,
+    update_digests,
+)
+
+
+def _rank_errors(digest: TDigest, values: np.ndarray):
+    ordered = np.sort(values)
+    estimates = digest.quantiles(REPORT_QUANTILES)
+    return [
+        abs(np.searchsorted(ordered, estimate) / len(values) - q)
+        for q, estimate in zip(REPORT_QUANTILES, estimates)
+    ]
+
+
+def test_tdigest_accuracy_and_merge():
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(0, 1, size=200_000)
+
+    digest = TDigest()
+    for start in range(0, len(values), 4096):
+        digest.update(values[start : start + 4096])
+    assert digest.count == len(values)
+    assert digest.size() <= 110
+    assert max(_rank_errors(digest, values)) < 5e-4
+
+    # Gộp 2 nửa cho kết quả tương đương một lần đọc
+    first, second = TDigest(), TDigest()
+    first.update(values[:100_000])
+    second.update(values[100_000:])
+    first.merge(second)
+    assert first.count == len(values)
+    assert max(_rank_errors(first, values)) < 5e-4
+    assert first.quantiles([0.0, 1.0]) == [values.min(), values.max()]
+
+
+def test_update_digests_matches_per_column_update():
+    rng = np.random.default_rng(5)
+    values = rng.normal(size=(3000, 6))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[:, 2] = np.nan
+
+    batched = [TDigest() for _ in range(6)]
+    single = [TDigest() for _ in range(6)]
+    for start in range(0, len(values), 700):
+        update_digests(batched, values[start : start + 700])
+        for column, digest in enumerate(single):
+            digest.update(values[start : start + 700, column])
+    for left, right in zip(batched, single):
+        assert left.count == right.count
+        assert np.array_equal(left.means, right.means)
+        assert np.array_equal(left.weights, right.weights)
+        assert left.quantiles([0.0, 1.0]) == right.quantiles([0.0, 1.0])
+
+
+def test_column_sketches_merge_by_name(tmp_path):
+    rng = np.random.default_rng(4)
+    a = rng.normal(5, 1, size=(3000, 2))
+    b = rng.normal(5, 1, size=(2000, 2))
+
+    left = ColumnSketches(["VBAT", "IBAT"])
+    left.add_block(a)
+    right = ColumnSketches(["IBAT", "TEMP"])
+    right.add_block(b)
+
+    path = str(tmp_path / "right.json")
+    right.save(path)
+    left.merge(ColumnSketches.load(path))
+
+    assert left.names == ["VBAT", "IBAT", "TEMP"]
+    assert left.stats.count.tolist() == [3000, 5000, 2000]
+    ibat = np.concatenate((a[:, 1], b[:, 0]))
+    assert np.isclose(left.stats.mean[1], ibat.mean())
+    assert np.isclose(left.stats.std()[1], ibat.std(ddof=1))
+    assert left.sketches[1].count == 5000
+
+
+def test_bundle_quantiles(tmp_path):
+    rows = ["header,Parametric", "key,,VBAT,NEW_KEY", "min,,1,N/A", "max,,3,N/A"]
+    rows += [f"SN{i},,{2 + (i % 11 - 5) / 10},{i % 101}" for i in range(1000)]
+    path = tmp_path / "bundle.csv"
+    path.write_text("\n".join(rows))
+
+    (new_key,) = bundle_quantiles(str(path), Config(), names=["NEW_KEY"], sigma=None)
+    assert new_key.count == 1000
+    assert (new_key.lower, new_key.upper) == (None, None)
+    assert abs(new_key.p50 - 50) <= 1
+    assert 0 <= new_key.suggested_lower <= 1 and 99 <= new_key.suggested_upper <= 100
+
+    assert bundle_quantiles(str(path), Config(), names=["MISSING"]) == []
+
+    (vbat, _) = bundle_quantiles(str(path), Config(), sigma=3.0)
+    values = np.array([2 + (i % 11 - 5) / 10 for i in range(1000)])
+    assert (vbat.lower, vbat.upper) == (1.0, 3.0)
+    assert np.isclose(vbat.suggested_upper, values.mean() + 3 * values.std(ddof=1))
+
+
+def test_bundle_quantiles_reads_only_wanted_columns(tmp_path, monkeypatch):
+    rows = ["header,Parametric", "key,,VBAT,NEW_KEY,IBAT", "max,,3,N/A,2"]
+    rows += [f"SN{i},,2,{i},1" for i in range(10)]
+    path = tmp_path / "bundle.csv"
+    path.write_text("\n".join(rows))
+    loaded = load_bundle(str(path), limits_config(Config()))
+
+    read_columns = []
+
+    def spy(file_path, data_tool, config, block_rows):
+        read_columns.append(list(data_tool.columns))
+        return iter_measurement_blocks(file_path, data_tool, config, block_rows)
+
+    monkeypatch.setattr(csv_quantiles, "iter_measurement_blocks", spy)
+    (result,) = bundle_quantiles(str(path), names=["NEW_KEY"])
+    assert read_columns == [[3]] and result.count == 10 and result.p50 == 4.5
+    # DataTool dùng chung của load_bundle không bị sửa
+    assert [param.name for param in loaded.data] == ["VBAT", "NEW_KEY", "IBAT"]
+    assert list(loaded.columns) == [2, 3, 4] and len(loaded.key_ids) == 3
+
+
+def test_csv_tool_suggest_limits(tmp_path, monkeypatch, capsys):
+    old = tmp_path / "old.csv"
+    new = tmp_path / "new.csv"
+    old.write_text("header,Parametric\nkey,,VBAT\nmin,,1\nmax,,3\nSN0,,2\n")
+    rows = ["header,Parametric", "key,,VBAT,NEW_KEY", "min,,1,N/A", "max,,3,N/A"]
+    rows += [f"SN{i},,2,{i % 3}" for i in range(30)]
+    new.write_text("\n".join(rows))
+
+    argv = ["csv_tool.py", "--file1", str(old), "--file2", str(new)]
+    monkeypatch.setattr(sys, "argv", argv + ["--suggest-limits"])
+    csv_tool.main()
+    out = capsys.readouterr().out
+    (line,) = [line for line in out.splitlines() if line.startswith("  NEW_KEY:")]
+    (result,) = bundle_quantiles(str(new), names=["NEW_KEY"])
+    assert f"lower={result.suggested_lower:.6g}" in line and "n=30" in line
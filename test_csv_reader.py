@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_reader và các hàm đọc bundle dạng bytes
+"""
+
+import bz2
+import csv
+import gzip
+import io
+import lzma
+import os
+import zipfile
+
+from csv_index import MappedBundle
+from csv_reader import iter_byte_rows
+from csv_processor_v2 import (
+    Config,
+    convert_data,
+    load_bundle,
+    read_bundle,
+    read_csv_file,
+)
+
+
+SAMPLE = (
+    "header,A,Parametric\r\n"
+    "key,,,VBAT,IBAT,TEMP\r\n"
+    'note,"a,b","multi\nline",x\r\n'
+    "min,,,1.5,N/A,-20\r\n"
+    "max,,,3.5,2,80\r\n"
+    "SN001,,,2.1,1.1,25\r\n"
+    "\r\n"
+    "SN002,,,2.2,1.2,26"
+)
+
+
+def test_iter_byte_rows_matches_csv_reader():
+    expected = list(csv.reader(io.StringIO(SAMPLE, newline=None)))
+    for chunk_size in (1, 5, 64, 4096):
+        rows = iter_byte_rows(io.BytesIO(SAMPLE.encode()), chunk_size=chunk_size)
+        assert [[v.decode() for v in row] for row in rows] == expected
+
+
+def test_read_bundle_matches_convert_data(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_bytes(SAMPLE.encode())
+
+    config = Config()
+    expected = convert_data(read_csv_file(str(path)), config)
+    result = read_bundle(str(path), config)
+
+    assert result == expected
+    assert [p.name for p in result.data] == ["VBAT", "IBAT", "TEMP"]
+    assert result.data[1].limit.data == {"max": 2.0}
+
+
+def test_read_bundle_prefilter_and_early_stop(tmp_path):
+    path = tmp_path / "scattered.csv"
+    path.write_text(
+        "Parametric\n"
+        "key,A,B\n"
+        "SN001,1,2\n"
+        "min,0,0\n"
+        "SN002,1,bad\n"
+        "max,5,5\n"
+        "max,9,9\n"
+    )
+
+    full = read_bundle(str(path), Config())
+    assert [p.limit.data for p in full.data] == [{"min": 0.0, "max": 9.0}] * 2
+
+    early = read_bundle(str(path), Config(stop_after_limits=True))
+    assert [p.limit.data for p in early.data] == [{"min": 0.0, "max": 5.0}] * 2
+
+
+def test_mapped_bundle_row_index(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_bytes(b"Parametric\r\nkey,A,B\r\nmin,1,2\r\nmax,3,4\r\nSN1,2,3")
+
+    bundle = MappedBundle(str(path))
+    assert len(bundle) == 5
+    assert bundle.row(1) == [b"key", b"A", b"B"]
+    assert bundle.row(-1) == [b"SN1", b"2", b"3"]
+    assert bundle.rows(2, 4) == [[b"min", b"1", b"2"], [b"max", b"3", b"4"]]
+    assert os.path.exists(bundle.index_path)
+
+    # Index được đọc lại từ file .rowidx
+    reopened = MappedBundle(str(path))
+    assert (reopened._load_index() == bundle.offsets).all()
+
+    data = load_bundle(str(path), Config())
+    assert load_bundle(str(path), Config()) is data
+    assert bundle.row(data.key_row_index)[0] == b"key"
+    assert bundle.row(data.limit_row_indices["max"])[0] == b"max"
+    bundle.close()
+    reopened.close()
+
+
+def test_mapped_bundle_rows_are_records(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_bytes(SAMPLE.encode())
+    expected = list(csv.reader(io.StringIO(SAMPLE, newline=None)))
+
+    bundle = MappedBundle(str(path), persist_index=False)
+    assert len(bundle) == len(expected)
+    assert [[v.decode() for v in bundle.row(k)] for k in range(len(bundle))] == expected
+    data = load_bundle(str(path), Config())
+    assert bundle.row(data.key_row_index)[0] == b"key"
+    assert bundle.row(data.limit_row_indices["min"])[0] == b"min"
+    bundle.close()
+
+    # Dấu ngoặc kép chưa đóng: phần còn lại của file là một row
+    path.write_bytes(b'key,A\nSN1,"x\ny\nSN2,2\n')
+    bundle = MappedBundle(str(path), persist_index=False)
+    assert len(bundle) == 2 and bundle.rows_bytes(1, 2) == b'SN1,"x\ny\nSN2,2'
+    bundle.close()
+
+
+def test_compressed_bundles(tmp_path):
+    raw = SAMPLE.encode()
+    plain = tmp_path / "bundle.csv"
+    plain.write_bytes(raw)
+    expected = read_bundle(str(plain), Config())
+
+    (tmp_path / "bundle.csv.gz").write_bytes(gzip.compress(raw))
+    (tmp_path / "bundle.csv.bz2").write_bytes(bz2.compress(raw))
+    (tmp_path / "bundle.csv.xz").write_bytes(lzma.compress(raw))
+    with zipfile.ZipFile(tmp_path / "bundle.zip", "w") as archive:
+        archive.writestr("bundle.csv", raw)
+
+    for name in ("bundle.csv.gz", "bundle.csv.bz2", "bundle.csv.xz", "bundle.zip"):
+        path = str(tmp_path / name)
+        assert read_csv_file(path) == read_csv_file(str(plain))
+        assert load_bundle(path, Config()) == expected
+
+
+def test_key_projection(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text("Parametric\nkey,RF_A,RF_B,DC_A\nmin,1,bad,3\n")
+
+    config = Config(include_keys=["RF_*", "DC_A"], exclude_keys=["RF_B"])
+    data = read_bundle(str(path), config)
+
+    # RF_B bị bỏ khi đọc key row nên giá trị "bad" không bị chuyển đổi
+    assert [p.name for p in data.data] == ["RF_A", "DC_A"]
+    assert data.total_params == 2
+    assert convert_data(read_csv_file(str(path)), config) == data
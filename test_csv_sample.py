@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_sample (thống kê gần đúng trên mẫu các row đo)
+"""
+
+import numpy as np
+
+from csv_measurements import MeasurementBlock
+from csv_processor_v2 import Config
+from csv_sample import bundle_sample_stats, exact_stats, reservoir_sample
+from csv_stats import bundle_stats
+
+
+def write_bundle(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    lines = ["header,Parametric", "key,,VBAT,TEMP", "min,,-2.5,-20", "max,,2.5,80"]
+    vbat = rng.normal(size=rows)
+    temp = rng.normal(25, 2, rows)
+    for k in range(rows):
+        lines.append(f"SN{k:05d},,{vbat[k]:.5f},{temp[k]:.3f}")
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_reservoir_uniform():
+    blocks = [
+        MeasurementBlock(
+            np.arange(start, start + 50),
+            [str(k) for k in range(start, start + 50)],
+            np.arange(start, start + 50, dtype=float).reshape(-1, 1),
+        )
+        for start in range(0, 1000, 50)
+    ]
+    hits = np.zeros(1000)
+    rng = np.random.default_rng(1)
+    for _ in range(400):
+        sample, seen = reservoir_sample(blocks, 100, rng)
+        assert seen == 1000 and len(set(sample.serials)) == 100
+        assert sample.row_indices.tolist() == [int(s) for s in sample.serials]
+        hits[sample.values[:, 0].astype(int)] += 1
+    # Mỗi row có xác suất 100 / 1000 được chọn, không phụ thuộc vị trí
+    rates = hits.reshape(4, 250).mean(axis=1) / 400
+    assert np.allclose(rates, 0.1, atol=0.01)
+
+    sample, seen = reservoir_sample(blocks[:1], 100, rng)
+    assert seen == 50 and sample.serials == [str(k) for k in range(50)]
+
+
+def test_sample_stats(tmp_path):
+    path = tmp_path / "bundle.csv"
+    write_bundle(path, 5000)
+    exact = bundle_stats(str(path))
+
+    for method in ("seek", "reservoir"):
+        sample, results = bundle_sample_stats(
+            str(path), size=500, seed=3, method=method
+        )
+        assert len(sample) == 500 and sample.method == method
+        assert abs(sample.population - 5000) <= (0 if method == "reservoir" else 500)
+        for result, truth in zip(results, exact):
+            assert abs(result.stats.mean - truth.mean) <= result.mean_error
+            assert abs(result.stats.std - truth.std) <= result.std_error
+        counts, _ = sample.histogram(0, bins=10)
+        assert abs(counts.sum() - sample.population) < 1e-6
+
+    # Khoảng tin cậy 95% của từng bin chứa số row thực tế của cả file
+    vbat = np.loadtxt(str(path), delimiter=",", skiprows=4, usecols=2)
+    covered = 0
+    for seed in range(20):
+        sample, _ = bundle_sample_stats(str(path), size=500, seed=seed)
+        counts, errors, edges = sample.histogram_errors(0, bins=10)
+        inside = (vbat >= edges[0]) & (vbat <= edges[-1])
+        truth, _ = np.histogram(vbat[inside], bins=edges)
+        covered += np.count_nonzero(np.abs(counts - truth) <= errors)
+    assert covered >= 0.85 * 200
+
+    # Mẫu là toàn bộ file: giống thống kê chính xác, sai số 0
+    sample, results = bundle_sample_stats(str(path), size=10_000, seed=3)
+    assert sample.population == 5000 and results[0].mean_error == 0.0
+    assert not sample.histogram_errors(0)[1].any()
+    assert np.isclose(results[0].stats.mean, exact[0].mean)
+
+    full = exact_stats(str(path), Config())
+    assert [result.stats for result in full] == exact
+    assert full[0].mean_error is None
+    assert np.isclose(full[0].fail_rate, 100 * np.mean(np.abs(vbat) > 2.5))
+
+
+def test_seek_and_reservoir_agree_on_multiline_rows(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(
+        "header,Parametric\nkey,,A,B\nmin,,0,0\nmax,,9,9\n"
+        'SN001,"x\ny",1,2\nSN002,,3,4\n'
+    )
+    for method in ("seek", "reservoir"):
+        sample, _ = bundle_sample_stats(str(path), size=10, seed=1, method=method)
+        assert sample.serials == ["SN001", "SN002"]
+        assert sample.row_indices.tolist() == [4, 5]
+        assert sample.values.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+        assert sample.population == 2
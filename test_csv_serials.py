@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_serials và lệnh index / lookup của csv_tool
+"""
+
+import os
+import sys
+
+import pytest
+
+import csv_tool
+from csv_measurements import iter_bundle_blocks
+from csv_processor_v2 import Config
+from csv_serials import SerialIndex
+
+
+LOG_A = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT,TEMP\n"
+    "min,,1.0,0,-20\n"
+    "max,,3.0,N/A,80\n"
+    "SN001,,2.1,1.1,25\n"
+    '"SN002",,3.5,"1,2",26\n'
+    "\n"
+    "SN003,,1.9,bad\n"
+)
+
+LOG_B = (
+    "header,Parametric\n"
+    "key,,TEMP,VBAT\n"
+    "min,,-20,1.0\n"
+    "max,,80,3.0\n"
+    "SN001,,30,2.2\n"
+    "SN004,,31,2.3\n"
+)
+
+
+def write_logs(tmp_path):
+    logs = tmp_path / "logs"
+    (logs / "b").mkdir(parents=True)
+    (logs / "a.csv").write_text(LOG_A)
+    (logs / "b" / "b.csv").write_text(LOG_B)
+    (logs / "notes.txt").write_text("SN001\n")
+    return logs
+
+
+def test_index_lookup(tmp_path):
+    logs = write_logs(tmp_path)
+    with SerialIndex(str(tmp_path / "serials.db")) as index:
+        assert index.build([str(logs)]) == {"files": 2, "rows": 5, "skipped": []}
+        # Không ghi file index cạnh các log
+        assert not list(logs.rglob("*.rowidx"))
+        # File không thay đổi không được index lại
+        assert index.build([str(logs)])["rows"] == 0
+        assert len(index) == 5
+
+        units = index.lookup("SN001")
+        files = [os.path.basename(unit.file_path) for unit in units]
+        assert files == ["a.csv", "b.csv"]
+        assert units[0].values == {"VBAT": "2.1", "IBAT": "1.1", "TEMP": "25"}
+        assert units[1].values == {"TEMP": "30", "VBAT": "2.2"}
+        assert index.lookup("SN002")[0].values["IBAT"] == "1,2"
+        assert index.lookup("SN003")[0].values == {
+            "VBAT": "1.9",
+            "IBAT": "bad",
+            "TEMP": "",
+        }
+        assert index.lookup("SN999") == []
+
+        # File thay đổi sau khi index: lookup báo lỗi, build index lại
+        (logs / "a.csv").write_text(LOG_A + "SN005,,2.0,1.2,27\n")
+        with pytest.raises(ValueError):
+            index.lookup("SN001")
+        assert index.build([str(logs)]) == {"files": 1, "rows": 4, "skipped": []}
+        assert index.lookup("SN005")[0].row_index == 8
+
+
+def test_index_exact_labels_and_multiline_rows(tmp_path):
+    log = tmp_path / "log.csv"
+    log.write_text(
+        "header,Parametric\n"
+        "key,,VBAT,NOTE\n"
+        "min,,1.0,\n"
+        "max,,3.0,\n"
+        "SNMAX01,,2.1,ok\n"
+        'SNKEY02,,2.2,"line 1\nline 2, SN999"\n'
+        "SN003,,2.3,\n"
+        "MAX,,3.0,\n"
+    )
+    with SerialIndex(str(tmp_path / "serials.db")) as index:
+        assert index.add_file(str(log)) == 3
+        assert index.lookup("SNMAX01")[0].values == {"VBAT": "2.1", "NOTE": "ok"}
+        (unit,) = index.lookup("SNKEY02")
+        assert unit.row_index == 5
+        assert unit.values["NOTE"] == "line 1\nline 2, SN999"
+        assert index.lookup("SN003")[0].row_index == 6
+        # row_index là index của record, giống các block row đo
+        (block,) = iter_bundle_blocks(str(log), Config())
+        assert block.row_indices.tolist() == [4, 5, 6]
+        assert index.lookup("line 2") == [] and index.lookup("MAX") == []
+
+
+def test_csv_tool_index_lookup(tmp_path, monkeypatch, capsys):
+    logs = write_logs(tmp_path)
+    db = str(tmp_path / "serials.db")
+
+    argv = ["csv_tool.py", "index", "--input", str(logs), "--index", db]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert csv_tool.main() == 0
+    assert "Indexed 5 rows from 2 files" in capsys.readouterr().out
+
+    argv = ["csv_tool.py", "lookup", "--index", db, "--serial", "SN004"]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert csv_tool.main() == 0
+    out = capsys.readouterr().out
+    assert "b.csv (row 6)" in out and "VBAT = 2.3" in out
+
+    argv = ["csv_tool.py", "lookup", "--index", db, "--serial", "SN999"]
+    monkeypatch.setattr(sys, "argv", argv)
+    assert csv_tool.main() == 1
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test cho csv_measurements và csv_stats
+"""
+
+import numpy as np
+
+import csv_measurements
+from csv_measurements import iter_bundle_blocks
+from csv_processor_v2 import Config
+from csv_stats import StatsAccumulator, bundle_stats
+
+
+BUNDLE = (
+    "header,Parametric\n"
+    "key,,VBAT,IBAT,TEMP\n"
+    "min,,1.0,0,-20\n"
+    "max,,3.0,N/A,80\n"
+    "SN001,,2.1,1.1,25\n"
+    '"SN002",,2.2,,26\n'
+    "\n"
+    "SN003,,1.9,bad,24\n"
+    "SN004,,2.4,1.3\n"
+    "SN005,,2.0,1.2,27\n"
+)
+
+
+def test_measurement_blocks(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+
+    blocks = list(iter_bundle_blocks(str(path), Config(), block_rows=2))
+    assert [len(block.serials) for block in blocks] == [2, 2, 1]
+    assert blocks[0].serials == ["SN001", "SN002"]
+    assert blocks[1].row_indices.tolist() == [7, 8]
+
+    values = np.vstack([block.values for block in blocks])
+    assert np.isnan(values[1, 1]) and np.isnan(values[2, 1]) and np.isnan(values[3, 2])
+    assert values[4].tolist() == [2.0, 1.2, 27.0]
+
+
+def test_measurement_rows_exact_labels(tmp_path, monkeypatch):
+    path = tmp_path / "bundle.csv"
+    path.write_text(
+        "header,Parametric\nkey,,VBAT,IBAT\nmin,,1,0\nmax limit,,3,2\n"
+        "SNMAX01,,2.1,\nKEYSN2,,2.2,1.1\n MAX ,,3,2\nSN3,,2.3\n"
+    )
+    # Cell rỗng luôn là NaN: không chuyển từng cell (float) dù "" không có trong
+    # null_values
+    def no_per_cell(value):
+        raise AssertionError("chuyển từng cell")
+
+    monkeypatch.setattr(csv_measurements, "float", no_per_cell, raising=False)
+    (block,) = iter_bundle_blocks(str(path), Config(null_values=["N/A"]))
+    assert block.serials == ["SNMAX01", "KEYSN2", "SN3"]
+    assert np.array_equal(
+        block.values, [[2.1, np.nan], [2.2, 1.1], [2.3, np.nan]], equal_nan=True
+    )
+
+
+def test_stats_match_numpy(tmp_path):
+    path = tmp_path / "bundle.csv"
+    path.write_text(BUNDLE)
+
+    stats = {s.name: s for s in bundle_stats(str(path), Config(), block_rows=2)}
+    vbat = np.array([2.1, 2.2, 1.9, 2.4, 2.0])
+    assert stats["VBAT"].count == 5
+    assert np.isclose(stats["VBAT"].mean, vbat.mean())
+    assert np.isclose(stats["VBAT"].std, vbat.std(ddof=1))
+    assert (stats["VBAT"].min, stats["VBAT"].max) == (1.9, 2.4)
+    sigma = vbat.std(ddof=1)
+    assert np.isclose(stats["VBAT"].cp, 2.0 / (6 * sigma))
+    assert np.isclose(stats["VBAT"].cpk, (3.0 - vbat.mean()) / (3 * sigma))
+
+    # Limit bằng 0 vẫn được dùng, chỉ có lower limit => không có Cp
+    assert stats["IBAT"].count == 3
+    assert stats["IBAT"].lower == 0.0 and stats["IBAT"].cp is None
+    assert np.isclose(stats["IBAT"].cpk, 1.2 / (3 * np.std([1.1, 1.3, 1.2], ddof=1)))
+
+
+def test_accumulator_block_merge():
+    rng = np.random.default_rng(1)
+    values = rng.normal(1e6, 0.5, size=(1000, 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+
+    accumulator = StatsAccumulator(3)
+    for start in range(0, len(values), 37):
+        accumulator.add_block(values[start : start + 37])
+
+    assert np.allclose(accumulator.mean, np.nanmean(values, axis=0))
+    assert np.allclose(accumulator.std(), np.nanstd(values, axis=0, ddof=1))
+    assert (accumulator.count == (~np.isnan(values)).sum(axis=0)).all()